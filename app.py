@@ -1,5 +1,12 @@
+import time
+from src.startup import StartupProfile
+
+# Created first so the import time of everything below is measured
+startup = StartupProfile()
+
 from flask import (
     Flask,
+    Response,
     render_template,
     request,
     jsonify,
@@ -7,26 +14,53 @@ from flask import (
     redirect,
     url_for,
     jsonify,
+    stream_with_context,
 )
 from flask_bcrypt import Bcrypt
 from dotenv import load_dotenv
 from datetime import datetime, timezone
+import hmac
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 import pymongo
 from pymongo.errors import ServerSelectionTimeoutError
 from bson.objectid import ObjectId
+from werkzeug.http import http_date
 
-# LangChain + RAG
-from langchain_pinecone import PineconeVectorStore
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.chains import create_retrieval_chain
+# LangChain + RAG (Pinecone, Gemini and HuggingFace clients are imported in init_rag())
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain.prompts import ChatPromptTemplate
-from langchain_community.embeddings import HuggingFaceEmbeddings
 
 # Utilities
 from deep_translator import GoogleTranslator
 from src.medical_news import fetch_latest_medical_news
+from src.news_cache import NewsCache
+from src import conversations as conversation_summaries
+from src import history as message_pages
+from src import metrics
+from src.metrics import StageTimer
+from src.local_index import LocalVectorStore
+from src.lexical_index import BM25Index, reciprocal_rank_fusion
+from src.onnx_embeddings import OnnxEmbeddings
+from src.embedding_batcher import BatchingEmbeddings
+from src.history_writer import HistoryWriter
+from src.streaming import sse_event, sentence_chunks
+from src.single_flight import SingleFlight, coalesce_key
+from src.reranker import CrossEncoderReranker, pack_context, context_tokens, CONTEXT_TOKEN_BUCKETS
+from src.language import detect_language
+from src.translation_cache import (
+    TranslationMemory,
+    prewarm_from_ui_strings,
+    prewarm_from_history,
+)
+from src.answer_cache import (
+    SemanticAnswerCache,
+    InMemoryCacheBackend,
+    MongoCacheBackend,
+)
+
+startup.lap("imports")
 
 
 # ================================================================
@@ -42,8 +76,11 @@ bcrypt = Bcrypt(app)
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+# /metrics needs a login session, or "Authorization: Bearer <METRICS_TOKEN>" for scrapers
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
-os.environ["PINECONE_API_KEY"] = PINECONE_API_KEY
+if PINECONE_API_KEY:
+    os.environ["PINECONE_API_KEY"] = PINECONE_API_KEY
 os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
 
 
@@ -54,6 +91,24 @@ client = None
 db = None
 users_collection = None
 history_collection = None
+history_buckets_collection = None  # HISTORY_SCHEMA=buckets, see src/history.py
+conversations_collection = None  # materialized summaries, see src/conversations.py
+
+# messages: one chat_history document per message; buckets: up to
+# HISTORY_BUCKET_SIZE messages per chat_history_buckets document
+HISTORY_SCHEMA = os.getenv("HISTORY_SCHEMA", "messages")  # messages | buckets
+HISTORY_BUCKET_SIZE = int(os.getenv("HISTORY_BUCKET_SIZE", message_pages.BUCKET_SIZE))
+db_checked = threading.Event()  # set once init_db() has pinged MongoDB
+
+
+class MockCursor(list):
+    """Empty result that accepts the cursor calls the routes chain onto find()"""
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args, **kwargs):
+        return self
 
 
 class MockCollection:
@@ -65,39 +120,91 @@ class MockCollection:
     def insert_one(self, *args, **kwargs):
         raise RuntimeError("Database not connected")
 
+    def insert_many(self, *args, **kwargs):
+        raise RuntimeError("Database not connected")
+
+    def bulk_write(self, *args, **kwargs):
+        raise RuntimeError("Database not connected")
+
     def delete_many(self, *args, **kwargs):
         raise RuntimeError("Database not connected")
 
+    def update_one(self, *args, **kwargs):
+        raise RuntimeError("Database not connected")
+
+    def find_one_and_update(self, *args, **kwargs):
+        raise RuntimeError("Database not connected")
+
+    def delete_one(self, *args, **kwargs):
+        raise RuntimeError("Database not connected")
+
     def find(self, *args, **kwargs):
-        return []
+        return MockCursor()
 
     def aggregate(self, *args, **kwargs):
         return []
 
 
+def connect_db():
+    """Create the client and collection handles (pymongo connects lazily, no I/O here)."""
+    global client, db, users_collection, history_collection, conversations_collection
+    global history_buckets_collection
+    client = pymongo.MongoClient(
+        MONGO_URL, serverSelectionTimeoutMS=5000, connectTimeoutMS=5000
+    )
+    db = client["medical_chatbot"]
+    users_collection = db["users"]
+    history_collection = db["chat_history"]
+    history_buckets_collection = db["chat_history_buckets"]
+    conversations_collection = db["conversations"]
+
+
 def init_db():
-    global client, db, users_collection, history_collection
+    """Ping MongoDB and create indexes; fall back to MockCollection if it is unreachable."""
+    global db, users_collection, history_collection, conversations_collection
+    global history_buckets_collection
     try:
-        client = pymongo.MongoClient(
-            MONGO_URL, serverSelectionTimeoutMS=5000, connectTimeoutMS=5000
-        )
+        if client is None:
+            connect_db()
         client.admin.command("ismaster")
-        db = client["medical_chatbot"]
-        users_collection = db["users"]
-        history_collection = db["chat_history"]
 
         # Indexes for performance
         history_collection.create_index([("user_id", 1), ("timestamp", -1)])
         history_collection.create_index([("user_id", 1), ("conversation_id", 1)])
+        message_pages.ensure_indexes(history_collection)
+        if HISTORY_SCHEMA == "buckets":
+            message_pages.ensure_bucket_indexes(history_buckets_collection)
+        conversation_summaries.ensure_indexes(conversations_collection)
 
         print("MongoDB Connected Successfully")
     except Exception as e:
         print("MongoDB Connection Failed:", e)
+        db = None
         users_collection = MockCollection()
         history_collection = MockCollection()
-
-
-init_db()
+        history_buckets_collection = MockCollection()
+        conversations_collection = MockCollection()
+    finally:
+        db_checked.set()
+
+
+# The ping (up to 5s when MongoDB is down) runs in warmup(), not at import
+connect_db()
+
+# Chat messages are written behind the response (src/history_writer.py);
+# HISTORY_WRITE_MODE=sync writes them inline as before
+HISTORY_WRITE_MODE = os.getenv("HISTORY_WRITE_MODE", "behind")  # behind | sync
+history_writer = None
+if HISTORY_WRITE_MODE == "behind":
+    history_writer = HistoryWriter(
+        lambda: history_buckets_collection if HISTORY_SCHEMA == "buckets" else history_collection,
+        lambda: conversations_collection,
+        max_batch=int(os.getenv("HISTORY_BATCH_MAX", 100)),
+        flush_interval_ms=float(os.getenv("HISTORY_FLUSH_MS", 200)),
+        spill_dir=os.getenv("HISTORY_SPILL_DIR", "cache/history_spill") or None,
+        max_spill_bytes=int(float(os.getenv("HISTORY_SPILL_MAX_MB", 50)) * 1024 * 1024),
+        bucket_size=HISTORY_BUCKET_SIZE if HISTORY_SCHEMA == "buckets" else None,
+    )
 
 
 # ================================================================
@@ -113,50 +220,532 @@ SYSTEM_PROMPT = (
 SUPPORTED_LANGUAGES = {"en", "hi", "ta", "te"}
 
 
+# Embedding engine: "torch" (sentence-transformers) or "onnx" (int8, see src/onnx_embeddings.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/minilm-int8")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0)) or None  # default: all cores
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+# Cross-request micro-batching of query embeddings (EMBED_BATCH_MAX=1 disables)
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", 16))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", 5))
+
+
 def get_embeddings():
-    return HuggingFaceEmbeddings(
-        model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    if EMBEDDING_BACKEND == "onnx":
+        model = OnnxEmbeddings(
+            ONNX_MODEL_DIR, threads=EMBEDDING_THREADS, batch_size=EMBEDDING_BATCH_SIZE
+        )
+    else:
+        model = HuggingFaceEmbeddings(
+            model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+        )
+    if EMBED_BATCH_MAX > 1:
+        return BatchingEmbeddings(model, EMBED_BATCH_MAX, EMBED_BATCH_WAIT_MS)
+    return model
+
+
+# Translation memory: in-process LRU + SQLite file shared across restarts/workers
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", "cache/translations.sqlite3")
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", 5000))
+TRANSLATION_PREWARM_HISTORY = int(os.getenv("TRANSLATION_PREWARM_HISTORY", 200))
+TRANSLATION_PREWARM_DAYS = int(os.getenv("TRANSLATION_PREWARM_DAYS", 30))
+
+with startup.step("translation_memory"):
+    translation_memory = TranslationMemory(
+        TRANSLATION_CACHE_PATH, max_memory_entries=TRANSLATION_CACHE_MAX_ENTRIES
+    )
+    prewarm_from_ui_strings(
+        translation_memory, os.path.join(app.static_folder, "translations.json")
     )
 
 
 def translate(text: str, target_lang: str, source_lang: str = "auto") -> str:
     if target_lang not in SUPPORTED_LANGUAGES or not text.strip():
         return text
+
+    cached = translation_memory.get(source_lang, target_lang, text)
+    if cached is not None:
+        return cached
+
     try:
-        return GoogleTranslator(source=source_lang, target=target_lang).translate(text)
+        result = GoogleTranslator(source=source_lang, target=target_lang).translate(text)
     except:
         return text
 
+    # Failed translations echo the input; don't remember those
+    if result and result != text:
+        translation_memory.put(source_lang, target_lang, text, result)
+    return result or text
+
+
+def start_translation_prewarm():
+    if TRANSLATION_PREWARM_HISTORY > 0:
+        threading.Thread(
+            target=prewarm_from_history,
+            args=(translation_memory, *history_source(), translate),
+            kwargs={"limit": TRANSLATION_PREWARM_HISTORY, "days": TRANSLATION_PREWARM_DAYS},
+            daemon=True,
+        ).start()
+
+
+# Vector store: "pinecone" (managed index) or "local" (in-process, built by store_index.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "vector_index")
+LOCAL_INDEX_MODE = os.getenv("LOCAL_INDEX_MODE") or None  # exact | hnsw (default: as built)
+
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", 3))
+# Minimum cosine similarity of the best chunk for the answer to use RAG context
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", 0.25))
+SCORE_BUCKETS = [round(0.1 * i, 1) for i in range(-10, 11)]
+
+# "dense": vector search only; "hybrid": also search the BM25 index built by
+# store_index.py and fuse both rankings, so exact terms (drug names, "HbA1c")
+# reach the knowledge base even when their cosine score is low
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense")
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "lexical_index")
+# A BM25 hit below the similarity threshold counts as relevant only if it
+# contains LEXICAL_MIN_COVERAGE of the query's terms and scores at least
+# LEXICAL_MIN_SCORE, so queries of common words ("fever pain") matched by
+# any chunk mentioning them stay behind the dense gate
+LEXICAL_MIN_COVERAGE = float(os.getenv("LEXICAL_MIN_COVERAGE", 1.0))
+LEXICAL_MIN_SCORE = float(os.getenv("LEXICAL_MIN_SCORE", 5.0))
+
+# Cross-encoder reranking (off unless RERANK_MODEL is set, e.g.
+# cross-encoder/ms-marco-MiniLM-L-6-v2): fetch RERANK_CANDIDATES chunks,
+# keep the RERANK_TOP_N best by (query, chunk) score
+RERANK_MODEL = os.getenv("RERANK_MODEL", "")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 10))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", 3))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", 16))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", 4096))
+SEARCH_K = RERANK_CANDIDATES if RERANK_MODEL else RETRIEVAL_K
+# Estimated prompt tokens the context chunks may use (0 = no limit)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 0))
+
+# "translate": translate the query to English, then embed (translate-first)
+# "native": embed the query as written (the model is multilingual); the English
+#           translation for the prompt runs alongside retrieval, only on cache misses
+QUERY_MODE = os.getenv("QUERY_MODE", "translate")
+# Local langdetect check: English text sent with lang != "en" skips translation
+LANGUAGE_CHECK = os.getenv("LANGUAGE_CHECK", "1") == "1"
+query_translation_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="query-translate")
+
+# Concurrent identical questions (same normalized text and lang) share one
+# translate → retrieve → Gemini run per worker process; history is still
+# saved for every user
+CHAT_COALESCE = os.getenv("CHAT_COALESCE", "1") == "1"
+chat_flight = SingleFlight("chat")
+
+# Semantic answer cache: "memory" (per worker), "mongo" (shared) or "off"
+ANSWER_CACHE_BACKEND = os.getenv("ANSWER_CACHE_BACKEND", "memory")
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 24 * 3600))
+ANSWER_CACHE_MAX_BYTES = int(os.getenv("ANSWER_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+SERVICE_UNAVAILABLE = "Service temporarily unavailable. Please try again later."
+
+# When to build the RAG stack: "eager" (at import, use with gunicorn --preload),
+# "background" (thread started at import) or "lazy" (first chat request / /ready)
+RAG_INIT = os.getenv("RAG_INIT", "background")
+RAG_INIT_WAIT = float(os.getenv("RAG_INIT_WAIT", 30))  # seconds a request waits for warm-up
+
+embeddings = None
+vectorstore = None
+llm = None
+question_answer_chain = None
+answer_cache = None
+reranker = None
+lexical_index = None
+rag_ready = False
+rag_error = None
+
+_warmup_lock = threading.Lock()
+_warmup_started = False
+_warmup_done = threading.Event()
+
+
+def init_rag():
+    """Load the embedding model, open the vector store and build the chain."""
+    global embeddings, vectorstore, llm, question_answer_chain, answer_cache, reranker
+    global lexical_index
+    global rag_ready, rag_error
+
+    print("Initializing RAG system...")
+    try:
+        with startup.step("embeddings"):
+            embeddings = get_embeddings()
+
+        with startup.step("vectorstore"):
+            if VECTOR_BACKEND == "local":
+                vectorstore = LocalVectorStore.load(
+                    LOCAL_INDEX_PATH, embeddings, mode=LOCAL_INDEX_MODE
+                )
+            else:
+                from langchain_pinecone import PineconeVectorStore
 
-# Initialize RAG Chain
-print("Initializing RAG system...")
-try:
-    embeddings = get_embeddings()
-    vectorstore = PineconeVectorStore.from_existing_index(
-        index_name="medical-chatbot-pdf-wiki", embedding=embeddings
-    )
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
+                vectorstore = PineconeVectorStore.from_existing_index(
+                    index_name="medical-chatbot-pdf-wiki", embedding=embeddings
+                )
+
+        if RETRIEVAL_MODE == "hybrid":
+            with startup.step("lexical_index"):
+                try:
+                    lexical_index = BM25Index.load(LEXICAL_INDEX_PATH)
+                except OSError as e:
+                    print(f"Lexical index unavailable ({e}); using dense retrieval only")
+
+        with startup.step("llm"):
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.3)
+
+            prompt = ChatPromptTemplate.from_messages(
+                [("system", SYSTEM_PROMPT), ("human", "{input}")]
+            )
+
+            # Documents are retrieved once in build_answer() and passed in as "context",
+            # so no retrieval chain is wrapped around the stuff-documents chain.
+            question_answer_chain = create_stuff_documents_chain(llm, prompt)
+
+        if RERANK_MODEL:
+            with startup.step("reranker"):
+                reranker = CrossEncoderReranker(
+                    RERANK_MODEL, batch_size=RERANK_BATCH_SIZE, cache_size=RERANK_CACHE_SIZE
+                )
+                reranker.model  # load now rather than on the first question
+
+        with startup.step("answer_cache"):
+            answer_cache = init_answer_cache()
+        rag_ready = True
+
+        print("RAG System Ready")
+    except Exception as e:
+        print("RAG Setup Failed:", e)
+        rag_error = str(e)
+        rag_ready = False
+
+
+def warmup():
+    """Connect MongoDB, then build the RAG stack. Runs once per process."""
+    with startup.step("mongodb"):
+        init_db()
+    start_translation_prewarm()
+    if LANGUAGE_CHECK:
+        with startup.step("langdetect"):
+            detect_language("load the language profiles")
+    init_rag()
+    _warmup_done.set()
+    startup.report()
+
+
+def start_warmup(block: bool = False):
+    """Start warmup() unless it already ran; block=True runs it in this thread."""
+    global _warmup_started
+    with _warmup_lock:
+        if _warmup_started:
+            return
+        _warmup_started = True
+
+    if block:
+        warmup()
+    else:
+        threading.Thread(target=warmup, name="rag-warmup", daemon=True).start()
+
+
+def ensure_rag() -> bool:
+    """True once the RAG stack is usable; waits (up to RAG_INIT_WAIT) while it loads."""
+    if rag_ready:
+        return True
+    start_warmup()
+    _warmup_done.wait(RAG_INIT_WAIT)
+    return rag_ready
+
+
+def embed_query(query: str, timer: StageTimer):
+    """Embed the query once; the vector feeds both the answer cache and retrieval."""
+    with timer.stage("embed"):
+        return embeddings.embed_query(query)
+
+
+def retrieve_context(query_vector, timer: StageTimer):
+    """Run a single scored vector search for an already embedded query."""
+    with timer.stage("search"):
+        results = vectorstore.similarity_search_by_vector_with_score(
+            query_vector, k=SEARCH_K
+        )
+    return attach_scores(results)
+
+
+def attach_scores(results):
+    """
+    Turn (doc, score) pairs into docs with metadata["score"] set,
+    recording the score histograms on the way.
+    """
+    docs = []
+    for doc, score in results:
+        doc.metadata["score"] = float(score)
+        docs.append(doc)
+
+    if docs:
+        metrics.histogram(
+            "retrieval_top_score", SCORE_BUCKETS, "best similarity score per query"
+        ).observe(docs[0].metadata["score"])
+    for doc in docs:
+        metrics.histogram(
+            "retrieval_score", SCORE_BUCKETS, "similarity score per retrieved chunk"
+        ).observe(doc.metadata["score"])
+    return docs
+
+
+def fuse_lexical(query_en: str, dense_docs, timer: StageTimer):
+    """Add the BM25 hits for the English query and re-rank both lists by reciprocal rank."""
+    with timer.stage("lexical"):
+        hits = [doc for doc, _ in lexical_index.search(query_en, k=SEARCH_K)]
+    return reciprocal_rank_fusion(dense_docs, hits, k=SEARCH_K)
+
+
+def relevance_gate(retrieved_docs):
+    """
+    Keep only the chunks whose score clears SIMILARITY_THRESHOLD, or (hybrid
+    retrieval) that contain LEXICAL_MIN_COVERAGE of the query's terms with
+    a BM25 score of at least LEXICAL_MIN_SCORE.
+    """
+    relevant_docs = [
+        doc for doc in retrieved_docs
+        if doc.metadata.get("score", -1.0) >= SIMILARITY_THRESHOLD
+        or (
+            doc.metadata.get("lexical_coverage", 0.0) >= LEXICAL_MIN_COVERAGE
+            and doc.metadata.get("bm25_score", 0.0) >= LEXICAL_MIN_SCORE
+        )
+    ]
+    if relevant_docs and all(
+        doc.metadata.get("score", -1.0) < SIMILARITY_THRESHOLD for doc in relevant_docs
+    ):
+        metrics.counter(
+            "chat_lexical_rescue_total", "answers with RAG context from BM25 hits only"
+        ).inc()
+    if relevant_docs:
+        print(f"✅ {len(relevant_docs)} relevant chunks → Using RAG pipeline")
+        metrics.counter("chat_rag_total", "answers with RAG context").inc()
+    else:
+        print("⚠️ No relevant context found → Direct Gemini fallback")
+        metrics.counter("chat_fallback_total", "answers without RAG context").inc()
+    return relevant_docs
+
+
+def select_context(query_vector, timer: StageTimer, query_en=None):
+    """
+    Retrieve and keep only the chunks that clear the relevance gate. With a
+    lexical index and query_en given, BM25 hits are fused in after the
+    vector search (a background translation is awaited only then).
+    """
+    docs = retrieve_context(query_vector, timer)
+    if lexical_index is not None and query_en is not None:
+        docs = fuse_lexical(english_query(query_en, timer), docs, timer)
+    return relevance_gate(docs)
+
+
+def finalize_context(query_en: str, docs, timer: StageTimer):
+    """
+    Rerank the gated candidates against the English query (when a reranker
+    is configured) and pack the best of them into CONTEXT_TOKEN_BUDGET.
+    """
+    if reranker is not None and docs:
+        with timer.stage("rerank"):
+            docs = reranker.rerank(query_en, docs, top_n=RERANK_TOP_N)
+    docs = pack_context(docs, CONTEXT_TOKEN_BUDGET)
+    if docs:
+        metrics.histogram(
+            "chat_context_tokens", CONTEXT_TOKEN_BUCKETS, "estimated prompt tokens of RAG context"
+        ).observe(context_tokens(docs))
+    return docs
+
+
+def english_query(query_en, timer: StageTimer) -> str:
+    """query_en is a str, or a Future when its translation was started in the background."""
+    if isinstance(query_en, Future):
+        with timer.stage("translate"):
+            return query_en.result()
+    return query_en
+
+
+def answer_query(query_en, query_vector, timer: StageTimer) -> str:
+    """Retrieve → decide RAG vs fallback → generate (English in, English out)."""
+    # 1️⃣ Retrieve + relevance gate (single search on the precomputed vector)
+    relevant_docs = select_context(query_vector, timer, query_en)
+    query_en = english_query(query_en, timer)
+    relevant_docs = finalize_context(query_en, relevant_docs, timer)
+
+    # 2️⃣ Fallback: no context or low score → direct Gemini
+    with timer.stage("generate"):
+        if not relevant_docs:
+            return llm.invoke(query_en).content
+
+        answer_en = question_answer_chain.invoke(
+            {"input": query_en, "context": relevant_docs}
+        )
+        return answer_en or "I'm not sure how to help with that."
+
+
+def stream_answer_query(query_en, query_vector, timer: StageTimer):
+    """Same as answer_query() but yields English tokens as Gemini produces them."""
+    relevant_docs = select_context(query_vector, timer, query_en)
+    query_en = english_query(query_en, timer)
+    relevant_docs = finalize_context(query_en, relevant_docs, timer)
+
+    if not relevant_docs:
+        tokens = (chunk.content for chunk in llm.stream(query_en))
+    else:
+        tokens = question_answer_chain.stream(
+            {"input": query_en, "context": relevant_docs}
+        )
+
+    with timer.stage("generate"):
+        for token in tokens:
+            if token:
+                yield token
+
+
+def init_answer_cache():
+    if ANSWER_CACHE_BACKEND == "off":
+        return None
+
+    backend = None
+    if ANSWER_CACHE_BACKEND == "mongo" and db is not None:
+        try:
+            backend = MongoCacheBackend(
+                db["answer_cache"], ANSWER_CACHE_MAX_BYTES, ANSWER_CACHE_TTL
+            )
+        except Exception as e:
+            # The cache is an optimisation: never let it stop the RAG stack
+            print("Answer cache: MongoDB backend unavailable, using memory:", e)
+    if backend is None:
+        backend = InMemoryCacheBackend(ANSWER_CACHE_MAX_BYTES, ANSWER_CACHE_TTL)
+
+    print(f"Answer cache: {type(backend).__name__}")
+    return SemanticAnswerCache(backend, threshold=ANSWER_CACHE_THRESHOLD)
+
+
+def resolve_language(user_message: str, lang: str) -> str:
+    """Language of this turn: English text skips translation even when lang != "en"."""
+    if lang != "en" and LANGUAGE_CHECK and detect_language(user_message, default=lang) == "en":
+        metrics.counter(
+            "chat_language_override_total", "non-English turns detected as English"
+        ).inc()
+        return "en"
+    return lang
+
+
+def prepare_native_query(user_message: str, lang: str, timer: StageTimer):
+    """
+    QUERY_MODE=native: embed the message as written. The English translation
+    the prompt needs is started only on a cache miss and overlaps the vector
+    search; query_en is returned as a Future (see english_query()).
+    """
+    query_vector = embed_query(user_message, timer)
+
+    cached = answer_cache.get(query_vector, lang) if answer_cache is not None else None
+    if cached is not None:
+        return None, query_vector, cached
+
+    query_en = query_translation_pool.submit(translate, user_message, "en", lang)
+    return query_en, query_vector, None
+
+
+def prepare_query(user_message: str, lang: str, timer: StageTimer):
+    """Translate to English and embed once. Returns (query_en, query_vector, cached)."""
+    if lang != "en" and QUERY_MODE == "native":
+        return prepare_native_query(user_message, lang, timer)
+
+    # 1️⃣ Translate to English (internal processing language)
+    with timer.stage("translate"):
+        query_en = user_message if lang == "en" else translate(user_message, "en", lang)
+
+    # 2️⃣ Embed once; reuse the vector for the cache and for retrieval
+    query_vector = embed_query(query_en, timer)
+
+    cached = answer_cache.get(query_vector, lang) if answer_cache is not None else None
+    return query_en, query_vector, cached
 
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.3)
 
-    prompt = ChatPromptTemplate.from_messages(
-        [("system", SYSTEM_PROMPT), ("human", "{input}")]
+def build_answer(user_message: str, lang: str, timer: StageTimer) -> str:
+    """Full pipeline for one chat turn: translate → embed → cache/RAG → translate back."""
+    if not ensure_rag():
+        return SERVICE_UNAVAILABLE
+
+    lang = resolve_language(user_message, lang)
+    query_en, query_vector, cached = prepare_query(user_message, lang, timer)
+    if cached is not None:
+        return cached
+
+    # 3️⃣ Retrieve and generate
+    answer_en = answer_query(query_en, query_vector, timer)
+
+    # 4️⃣ Translate back to user's chosen language
+    with timer.stage("translate"):
+        answer = answer_en if lang == "en" else translate(answer_en, lang, "en")
+
+    if answer_cache is not None:
+        answer_cache.put(query_vector, lang, answer)
+    return answer
+
+
+def stream_answer(user_message: str, lang: str, timer: StageTimer):
+    """
+    Streaming variant of build_answer(). English answers are yielded token by
+    token; other languages are yielded one translated sentence at a time.
+    """
+    if not ensure_rag():
+        yield SERVICE_UNAVAILABLE
+        return
+
+    lang = resolve_language(user_message, lang)
+    query_en, query_vector, cached = prepare_query(user_message, lang, timer)
+    if cached is not None:
+        yield cached
+        return
+
+    tokens = stream_answer_query(query_en, query_vector, timer)
+    if lang == "en":
+        pieces = tokens
+    else:
+        pieces = _translate_sentences(sentence_chunks(tokens), lang, timer)
+
+    parts = []
+    for piece in pieces:
+        parts.append(piece)
+        yield piece
+
+    if answer_cache is not None and parts:
+        answer_cache.put(query_vector, lang, "".join(parts))
+
+
+def shared_answer(user_message: str, lang: str, timer: StageTimer) -> str:
+    """build_answer(), run once for concurrent identical questions (CHAT_COALESCE)."""
+    if not CHAT_COALESCE:
+        return build_answer(user_message, lang, timer)
+    return chat_flight.do(
+        coalesce_key(user_message, lang), lambda: build_answer(user_message, lang, timer)
     )
 
-    question_answer_chain = create_stuff_documents_chain(llm, prompt)
-    rag_chain = create_retrieval_chain(retriever, question_answer_chain)
 
-    print("RAG System Ready")
-except Exception as e:
-    print("RAG Setup Failed:", e)
+def shared_stream_answer(user_message: str, lang: str, timer: StageTimer):
+    """stream_answer(), one run streamed to every concurrent identical question."""
+    if not CHAT_COALESCE:
+        return stream_answer(user_message, lang, timer)
+    return chat_flight.stream(
+        coalesce_key(user_message, lang), lambda: stream_answer(user_message, lang, timer)
+    )
 
-    class FallbackRAG:
-        def invoke(self, inputs):
-            return {
-                "answer": "Service temporarily unavailable. Please try again later."
-            }
 
-    rag_chain = FallbackRAG()
+def _translate_sentences(sentences, lang: str, timer: StageTimer):
+    for sentence in sentences:
+        text = sentence.strip()
+        trailing = sentence[len(sentence.rstrip()):]
+        with timer.stage("translate"):
+            translated = translate(text, lang, "en") if text else ""
+        yield translated + trailing
 
 
 # ================================================================
@@ -176,15 +765,26 @@ def auth_guard():
         "/end_chat",
         "/conversation/delete/",
         "/news",
+        "/metrics",
     ]
     path = request.path
     if any(path.startswith(p) for p in protected):
+        if path == "/metrics" and metrics_token_ok():
+            return None
         if "user_id" not in session:
             if request.path.startswith("/get"):
                 return "Unauthorized", 403
             return jsonify({"status": "error", "message": "Unauthorized"}), 403
 
 
+def metrics_token_ok() -> bool:
+    """True if the request carries the METRICS_TOKEN bearer token."""
+    if not METRICS_TOKEN:
+        return False
+    header = request.headers.get("Authorization", "")
+    return hmac.compare_digest(header.encode(), f"Bearer {METRICS_TOKEN}".encode())
+
+
 def get_current_conversation_id() -> str:
     """Get or create a conversation ID for the current session"""
     if not session.get("current_chat_id"):
@@ -192,6 +792,72 @@ def get_current_conversation_id() -> str:
     return session["current_chat_id"]
 
 
+def save_message(user_id: str, conversation_id: str, role: str, message: str, lang: str):
+    """Append one message to chat_history and update its conversation summary."""
+    timestamp = datetime.now(timezone.utc)
+    doc = {
+        "user_id": user_id,
+        "conversation_id": conversation_id,
+        "role": role,
+        "message": message,
+        "lang": lang,
+        "timestamp": timestamp,
+    }
+    summary = conversation_summaries.summary_update(
+        user_id, conversation_id, role, message, timestamp
+    )
+    if history_writer is not None:
+        history_writer.submit(doc, summary)
+        return
+
+    if HISTORY_SCHEMA == "buckets":
+        doc["_id"] = ObjectId()
+        message_pages.append_to_bucket(history_buckets_collection, doc, HISTORY_BUCKET_SIZE)
+    else:
+        history_collection.insert_one(doc)
+    query, update, upsert = summary
+    conversations_collection.update_one(query, update, upsert=upsert)
+
+
+def settle_history(user_id: str):
+    """Read-your-writes: let this user's write-behind messages land before a history read."""
+    if history_writer is not None:
+        history_writer.wait_for_user(user_id)
+
+
+def read_messages(user_id: str, conversation_id: str, limit: int, selected,
+                  before: str = None, since: str = None) -> list:
+    """
+    Up to limit + 1 raw messages for message_pages.to_page(), from either
+    schema. Raises ValueError on a malformed cursor.
+    """
+    if HISTORY_SCHEMA == "buckets":
+        query, sort = message_pages.bucket_query(user_id, conversation_id, before, since)
+        buckets = history_buckets_collection.find(query).sort(sort)
+        return message_pages.messages_from_buckets(buckets, limit, before, since)
+
+    query, sort = message_pages.page_query(user_id, conversation_id, before=before, since=since)
+    return list(
+        history_collection.find(query, message_pages.projection(selected))
+        .sort(sort)
+        .limit(limit + 1)
+    )
+
+
+def delete_messages(user_id: str, conversation_id: str) -> int:
+    if HISTORY_SCHEMA == "buckets":
+        return message_pages.delete_buckets(history_buckets_collection, user_id, conversation_id)
+    result = history_collection.delete_many({"user_id": user_id, "conversation_id": conversation_id})
+    return result.deleted_count
+
+
+def history_source():
+    """(collection, leading pipeline stages) to aggregate over one document per message."""
+    if HISTORY_SCHEMA == "buckets":
+        return history_buckets_collection, message_pages.UNWIND_BUCKETS
+    return history_collection, []
+
+
 # ================================================================
 # 5. ROUTES: AUTH
 # ================================================================
@@ -326,116 +992,114 @@ def chat():
     lang = request.form.get("lang", "en")
 
     # Save user message
-    history_collection.insert_one(
-        {
-            "user_id": user_id,
-            "conversation_id": conversation_id,
-            "role": "user",
-            "message": user_message,
-            "lang": lang,
-            "timestamp": datetime.now(timezone.utc),
-        }
-    )
+    save_message(user_id, conversation_id, "user", user_message, lang)
 
+    timer = StageTimer()
     try:
-        # 1️⃣ Translate to English (internal processing language)
-        query_en = user_message if lang == "en" else translate(user_message, "en", lang)
-
-        # 2️⃣ Manually retrieve relevant docs
-        retrieved_docs = retriever.get_relevant_documents(query_en)
-
-        # 3️⃣ Decide whether to use RAG or fallback
-        similarity_threshold = 0.25
-        use_rag = False
-
-        if retrieved_docs:
-            # Try to read similarity score
-            top_score = retrieved_docs[0].metadata.get("score", None)
-
-            if top_score is None:
-                # If score missing, assume retriever supports only content → try RAG
-                use_rag = True
-            else:
-                use_rag = top_score >= similarity_threshold
-
-        else:
-            use_rag = False
-
-        # 4️⃣ Fallback: no context or low score → direct Gemini
-        if not use_rag:
-            print("⚠️ No relevant context found → Direct Gemini fallback")
-            llm_response = llm.invoke(query_en)
-            answer_en = llm_response.content
-        else:
-            print("✅ Context found → Using RAG pipeline")
-            rag_result = rag_chain.invoke({"input": query_en})
-            answer_en = rag_result.get("answer", "I'm not sure how to help with that.")
-
-        # 5️⃣ Translate back to user's chosen language
-        answer = answer_en if lang == "en" else translate(answer_en, lang)
-
+        answer = shared_answer(user_message, lang, timer)
     except Exception as e:
         print("Chat error:", e)
+        metrics.counter("chat_errors_total", "failed chat turns").inc()
         answer = "Sorry, something went wrong. Please try again."
 
+    timer.record("chat")
+    print(f"[chat] timings {timer.summary()}")
+
     # Save bot message
-    history_collection.insert_one(
-        {
-            "user_id": user_id,
-            "conversation_id": conversation_id,
-            "role": "bot",
-            "message": answer,
-            "lang": lang,
-            "timestamp": datetime.now(timezone.utc),
-        }
-    )
+    save_message(user_id, conversation_id, "bot", answer, lang)
 
     return answer
 
 
-@app.route("/conversations", methods=["GET"])
-def list_conversations():
+@app.route("/get/stream", methods=["POST"])
+def chat_stream():
+    """Server-Sent Events version of /get: `data: {"token": ...}` per chunk."""
     user_id = session["user_id"]
+    conversation_id = get_current_conversation_id()
+    user_message = request.form["msg"]
+    lang = request.form.get("lang", "en")
 
-    pipeline = [
-        {"$match": {"user_id": user_id, "role": "user"}},
-        {"$sort": {"timestamp": 1}},
-        {
-            "$group": {
-                "_id": "$conversation_id",
-                "title": {"$first": "$message"},
-                "timestamp": {"$first": "$timestamp"},
-            }
-        },
-        {"$sort": {"timestamp": -1}},
-        {
-            "$project": {
-                "_id": 0,
-                "id": "$_id",
-                "title": {"$substrCP": ["$title", 0, 40]},
-                "timestamp": 1,
-            }
-        },
-    ]
+    # Save user message
+    save_message(user_id, conversation_id, "user", user_message, lang)
+
+    def generate():
+        timer = StageTimer()
+        parts = []
+        try:
+            for piece in shared_stream_answer(user_message, lang, timer):
+                if not parts:
+                    metrics.histogram(
+                        "chat_stream_first_chunk_ms", help="time to first streamed chunk"
+                    ).observe(timer.total_ms())
+                parts.append(piece)
+                yield sse_event({"token": piece})
+        except Exception as e:
+            print("Chat stream error:", e)
+            metrics.counter("chat_errors_total", "failed chat turns").inc()
+            error = "Sorry, something went wrong. Please try again."
+            parts.append(error)
+            yield sse_event({"token": error})
+        finally:
+            timer.record("chat_stream")
+            print(f"[chat/stream] timings {timer.summary()}")
+
+            # Save bot message (whatever was sent, even if the client left early)
+            save_message(user_id, conversation_id, "bot", "".join(parts), lang)
+
+        yield sse_event({"conversation_id": conversation_id}, event="done")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    conversations = list(history_collection.aggregate(pipeline))
-    return jsonify({"status": "success", "conversations": conversations})
+
+@app.route("/conversations", methods=["GET"])
+def list_conversations():
+    """Newest conversations first; pass ?cursor=<next_cursor> for the next page."""
+    user_id = session["user_id"]
+    limit = conversation_summaries.page_size(request.args.get("limit"))
+    try:
+        query = conversation_summaries.page_filter(user_id, request.args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    settle_history(user_id)
+    docs = list(
+        conversations_collection.find(query, conversation_summaries.SUMMARY_PROJECTION)
+        .sort(conversation_summaries.PAGE_SORT)
+        .limit(limit + 1)
+    )
+    conversations, next_cursor = conversation_summaries.to_page(docs, limit)
+    return jsonify(
+        {"status": "success", "conversations": conversations, "next_cursor": next_cursor}
+    )
 
 
 @app.route("/conversation/<conv_id>", methods=["GET"])
 def load_conversation(conv_id):
+    """
+    One page of a conversation, oldest first. Without a cursor: the newest
+    ?limit messages. ?before=<next_cursor> pages back, ?since=<latest_cursor>
+    returns only newer messages; ?fields=role,message trims the payload.
+    """
     user_id = session["user_id"]
     session["current_chat_id"] = conv_id
 
-    messages = list(
-        history_collection.find(
-            {"user_id": user_id, "conversation_id": conv_id}, {"_id": 0}
-        ).sort("timestamp", 1)
-    )
+    limit = message_pages.page_size(request.args.get("limit"))
+    selected = message_pages.select_fields(request.args.get("fields"))
+    before = request.args.get("before")
+    since = request.args.get("since")
+    settle_history(user_id)
+    try:
+        docs = read_messages(user_id, conv_id, limit, selected, before=before, since=since)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
 
-    return jsonify(
-        {"status": "success", "messages": messages, "conversation_id": conv_id}
-    )
+    page = message_pages.to_page(docs, limit, selected, before=before, since=since)
+
+    return jsonify({"status": "success", "conversation_id": conv_id, **page})
 
 
 @app.route("/end_chat", methods=["POST"])
@@ -447,68 +1111,150 @@ def start_new_chat():
 @app.route("/conversation/delete/<conv_id>", methods=["POST"])
 def delete_conversation(conv_id):
     user_id = session["user_id"]
-    result = history_collection.delete_many(
-        {"user_id": user_id, "conversation_id": conv_id}
-    )
+    deleted = delete_messages(user_id, conv_id)
+    conversations_collection.delete_one({"user_id": user_id, "conversation_id": conv_id})
 
     if session.get("current_chat_id") == conv_id:
         session["current_chat_id"] = None
 
-    return jsonify(
-        {"status": "success", "message": f"Deleted {result.deleted_count} messages"}
-    )
+    return jsonify({"status": "success", "message": f"Deleted {deleted} messages"})
 
 
 # ================================================================
 # 7. MEDICAL NEWS ROUTE
 # ================================================================
+NEWS_TTL = int(os.getenv("NEWS_TTL", 600))  # seconds before a request triggers a refresh
+NEWS_REFRESH_INTERVAL = int(os.getenv("NEWS_REFRESH_INTERVAL", 900))  # scheduled refresh
+NEWS_SNAPSHOT_PATH = os.getenv("NEWS_SNAPSHOT_PATH", "cache/news_snapshot.json")
+
+# Only shown until the first successful fetch has been saved as a snapshot
+FALLBACK_NEWS = [
+    {
+        "title": "India launches nationwide diabetes screening program",
+        "summary": "Free testing camps in 500+ districts starting December 2025...",
+        "link": "https://pib.gov.in",
+        "published": "2025-11-20",
+        "image": "https://images.unsplash.com/photo-1576091160399-112ba8d25d1d?w=800&q=80",  # Real medical image
+    },
+    {
+        "title": "Breakthrough in cancer immunotherapy research",
+        "summary": "Indian scientists develop affordable CAR-T cell therapy...",
+        "link": "https://thehindu.com/sci-tech/health",
+        "published": "2025-11-19",
+        "image": "https://images.unsplash.com/photo-1532187863486-abf9dbad1b69?w=800&q=80",
+    },
+    {
+        "title": "New hypertension guidelines released by ICMR",
+        "summary": "Updated blood pressure targets for Indian population...",
+        "link": "https://icmr.gov.in",
+        "published": "2025-11-18",
+        "image": "https://images.unsplash.com/photo-1559757148-5c350d575016?w=800&q=80",
+    },
+    {
+        "title": "COVID nasal vaccine gets emergency approval",
+        "summary": "Bharat Biotech's iNCOVACC now available across India...",
+        "link": "https://ndtv.com/health",
+        "published": "2025-11-17",
+        "image": "https://images.unsplash.com/photo-1612277795508-6b200b0e5d4b?w=800&q=80",
+    },
+]
+
+
+news_cache = NewsCache(
+    lambda lang: fetch_latest_medical_news(lang, max_items=10, raise_errors=True),
+    ttl=NEWS_TTL,
+    refresh_interval=NEWS_REFRESH_INTERVAL,
+    snapshot_path=NEWS_SNAPSHOT_PATH,
+    fallback=FALLBACK_NEWS,
+)
+
+
+def news_headers(entry) -> dict:
+    headers = {"ETag": f'"{entry.etag}"', "Cache-Control": f"private, max-age={NEWS_TTL}"}
+    if entry.updated_at:
+        headers["Last-Modified"] = http_date(entry.updated_at)
+    return headers
+
+
+def news_not_modified(req, entry) -> bool:
+    """Conditional GET: the browser already has this version of the news."""
+    if req.if_none_match:
+        return req.if_none_match.contains(entry.etag)
+    since = req.if_modified_since
+    return bool(since and entry.updated_at and int(entry.updated_at) <= since.timestamp())
+
+
 @app.route("/news")
 def get_news():
     lang = request.args.get("lang", "en")
     if lang not in SUPPORTED_LANGUAGES:
         lang = "en"
 
-    news = fetch_latest_medical_news(lang, max_items=10)
-
-    # If API fails or returns nothing → beautiful fallback with real-looking images
-    if not news:
-        fallback_news = [
-            {
-                "title": "India launches nationwide diabetes screening program",
-                "summary": "Free testing camps in 500+ districts starting December 2025...",
-                "link": "https://pib.gov.in",
-                "published": "2025-11-20",
-                "image": "https://images.unsplash.com/photo-1576091160399-112ba8d25d1d?w=800&q=80",  # Real medical image
-            },
-            {
-                "title": "Breakthrough in cancer immunotherapy research",
-                "summary": "Indian scientists develop affordable CAR-T cell therapy...",
-                "link": "https://thehindu.com/sci-tech/health",
-                "published": "2025-11-19",
-                "image": "https://images.unsplash.com/photo-1532187863486-abf9dbad1b69?w=800&q=80",
-            },
-            {
-                "title": "New hypertension guidelines released by ICMR",
-                "summary": "Updated blood pressure targets for Indian population...",
-                "link": "https://icmr.gov.in",
-                "published": "2025-11-18",
-                "image": "https://images.unsplash.com/photo-1559757148-5c350d575016?w=800&q=80",
-            },
-            {
-                "title": "COVID nasal vaccine gets emergency approval",
-                "summary": "Bharat Biotech's iNCOVACC now available across India...",
-                "link": "https://ndtv.com/health",
-                "published": "2025-11-17",
-                "image": "https://images.unsplash.com/photo-1612277795508-6b200b0e5d4b?w=800&q=80",
-            },
-        ]
-        news = fallback_news
-
-    return jsonify({"status": "success", "news": news})
+    # Served from memory / the last-good snapshot; refreshed in the background
+    entry = news_cache.get(lang)
+    headers = news_headers(entry)
+    if news_not_modified(request, entry):
+        return "", 304, headers
+
+    return jsonify({"status": "success", "news": entry.news}), 200, headers
+
+
+# ================================================================
+# 8. METRICS & READINESS
+# ================================================================
+@app.route("/metrics")
+def get_metrics():
+    return jsonify({"status": "success", "metrics": metrics.snapshot()})
+
+
+@app.route("/ready")
+def readiness():
+    """200 once the RAG stack is loaded, 503 while warming up (starts warm-up in lazy mode)."""
+    start_warmup()
+    if rag_ready:
+        status, code = "ready", 200
+    elif _warmup_done.is_set():
+        status, code = "failed", 503
+    else:
+        status, code = "starting", 503
+
+    if not db_checked.is_set():
+        database = "pending"
+    else:
+        database = "connected" if db is not None else "unavailable"
+
+    return jsonify(
+        {
+            "status": status,
+            "rag_init": RAG_INIT,
+            "database": database,
+            "error": rag_error,
+            "startup_ms": startup.snapshot(),
+        }
+    ), code
+
+
+def after_fork():
+    """
+    Re-open per-process resources in a worker forked from a preloaded master
+    (see gunicorn.conf.py). Model weights loaded before the fork stay shared.
+    """
+    global answer_cache
+    connect_db()
+    init_db()
+    translation_memory.reopen()
+    if rag_ready:
+        answer_cache = init_answer_cache()
+
+
+if RAG_INIT == "eager":
+    start_warmup(block=True)
+elif RAG_INIT == "background":
+    start_warmup()
 
 
 # ================================================================
-# 8. MAIN ROUTE
+# 9. MAIN ROUTE
 # ================================================================
 @app.route("/")
 def index():
@@ -518,8 +1264,8 @@ def index():
 
 
 # ================================================================
-# 8. RUN SERVER
+# 10. RUN SERVER
 # ================================================================
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
-    app.run(host="0.0.0.0", port=port, debug=True)
+    app.run(host="0.0.0.0", port=port, debug=os.getenv("FLASK_DEBUG", "1") == "1")
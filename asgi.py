@@ -0,0 +1,529 @@
+"""
+Async (ASGI) serving mode.
+
+The chat, news and history routes are served by an async Quart app that
+uses ainvoke/astream and Motor (async MongoDB); news comes from the shared
+background-refreshed cache. Every other route (auth pages, /metrics, /ready,
+/) is delegated to the Flask app in app.py, so both modes share one session
+cookie, config and RAG stack.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8080
+"""
+import asyncio
+import os
+from datetime import datetime, timezone
+
+from asgiref.wsgi import WsgiToAsgi
+from motor.motor_asyncio import AsyncIOMotorClient
+from quart import Quart, Response, jsonify, request, session
+
+import app as core
+from src import conversations as conversation_summaries
+from src import history as message_pages
+from src import metrics
+from src.metrics import StageTimer
+from src.streaming import sse_event, asentence_chunks
+from src.single_flight import AsyncSingleFlight, coalesce_key
+
+# Paths handled by the async app; everything else goes to Flask
+ASYNC_PREFIXES = ("/get", "/conversation", "/end_chat", "/news")
+
+quart_app = Quart(__name__)
+quart_app.secret_key = core.app.secret_key
+
+# Set in before_serving (must be created on the serving event loop)
+ahistory_collection = None
+aconversations_collection = None
+
+# Coalesces identical concurrent questions on this worker's event loop (core.CHAT_COALESCE)
+chat_flight = AsyncSingleFlight("chat")
+
+
+# ================================================================
+# 1. ASYNC CLIENTS
+# ================================================================
+class ThreadedCollection:
+    """
+    Async facade over a synchronous collection (MockCollection, mongomock),
+    used when MongoDB is not reachable so the async routes behave like
+    the sync ones.
+    """
+
+    class _Cursor:
+        def __init__(self, fn):
+            self._fn = fn
+            self._sort = None
+            self._limit = None
+
+        def sort(self, *args):
+            self._sort = args
+            return self
+
+        def limit(self, n):
+            self._limit = n
+            return self
+
+        async def to_list(self, length=None):
+            def run():
+                result = self._fn()
+                if self._sort and not isinstance(result, list):
+                    result = result.sort(*self._sort)
+                if self._limit and not isinstance(result, list):
+                    result = result.limit(self._limit)
+                return list(result)
+
+            return await asyncio.to_thread(run)
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def insert_one(self, *args, **kwargs):
+        return await asyncio.to_thread(self._collection.insert_one, *args, **kwargs)
+
+    async def delete_many(self, *args, **kwargs):
+        return await asyncio.to_thread(self._collection.delete_many, *args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return await asyncio.to_thread(self._collection.update_one, *args, **kwargs)
+
+    async def delete_one(self, *args, **kwargs):
+        return await asyncio.to_thread(self._collection.delete_one, *args, **kwargs)
+
+    def find(self, *args, **kwargs):
+        return self._Cursor(lambda: self._collection.find(*args, **kwargs))
+
+    def aggregate(self, *args, **kwargs):
+        return self._Cursor(lambda: self._collection.aggregate(*args, **kwargs))
+
+
+@quart_app.before_serving
+async def open_clients():
+    global ahistory_collection, aconversations_collection
+
+    if core.RAG_INIT != "lazy":
+        # Wait for the MongoDB ping in app.warmup() so an unreachable DB
+        # falls back to MockCollection like the sync app
+        await asyncio.to_thread(core.db_checked.wait, 10)
+
+    if core.db is not None:
+        client = AsyncIOMotorClient(
+            core.MONGO_URL, serverSelectionTimeoutMS=5000, connectTimeoutMS=5000
+        )
+        ahistory_collection = client["medical_chatbot"]["chat_history"]
+        aconversations_collection = client["medical_chatbot"]["conversations"]
+    else:
+        ahistory_collection = ThreadedCollection(core.history_collection)
+        aconversations_collection = ThreadedCollection(core.conversations_collection)
+
+
+@quart_app.after_serving
+async def flush_history():
+    if core.history_writer is not None:
+        await asyncio.to_thread(core.history_writer.close)
+
+
+@quart_app.before_request
+async def auth_guard():
+    if "user_id" not in session:
+        if request.path.startswith("/get"):
+            return "Unauthorized", 403
+        return jsonify({"status": "error", "message": "Unauthorized"}), 403
+
+
+def get_current_conversation_id() -> str:
+    if not session.get("current_chat_id"):
+        session["current_chat_id"] = str(core.ObjectId())
+    return session["current_chat_id"]
+
+
+async def save_message(user_id, conversation_id, role, message, lang):
+    """Async twin of app.save_message()."""
+    if core.history_writer is not None:
+        # Write-behind: only queues the message, never waits on MongoDB
+        core.save_message(user_id, conversation_id, role, message, lang)
+        return
+    if core.HISTORY_SCHEMA == "buckets":
+        await asyncio.to_thread(core.save_message, user_id, conversation_id, role, message, lang)
+        return
+
+    timestamp = datetime.now(timezone.utc)
+    await ahistory_collection.insert_one(
+        {
+            "user_id": user_id,
+            "conversation_id": conversation_id,
+            "role": role,
+            "message": message,
+            "lang": lang,
+            "timestamp": timestamp,
+        }
+    )
+    query, update, upsert = conversation_summaries.summary_update(
+        user_id, conversation_id, role, message, timestamp
+    )
+    await aconversations_collection.update_one(query, update, upsert=upsert)
+
+
+# ================================================================
+# 2. ASYNC CHAT PIPELINE
+# ================================================================
+async def atranslate(text: str, target_lang: str, source_lang: str = "auto") -> str:
+    # deep_translator is blocking; run it (and its cache) off the event loop
+    return await asyncio.to_thread(core.translate, text, target_lang, source_lang)
+
+
+async def aresolve_language(user_message: str, lang: str) -> str:
+    # langdetect scores n-grams in Python: CPU-bound, so only hop when it runs
+    if lang == "en" or not core.LANGUAGE_CHECK:
+        return lang
+    return await asyncio.to_thread(core.resolve_language, user_message, lang)
+
+
+async def aprepare_query(user_message: str, lang: str, timer: StageTimer):
+    if lang != "en" and core.QUERY_MODE == "native":
+        return await aprepare_native_query(user_message, lang, timer)
+
+    with timer.stage("translate"):
+        query_en = (
+            user_message if lang == "en" else await atranslate(user_message, "en", lang)
+        )
+
+    with timer.stage("embed"):
+        query_vector = await core.embeddings.aembed_query(query_en)
+
+    cached = None
+    if core.answer_cache is not None:
+        cached = await asyncio.to_thread(core.answer_cache.get, query_vector, lang)
+    return query_en, query_vector, cached
+
+
+async def aprepare_native_query(user_message: str, lang: str, timer: StageTimer):
+    """Async twin of app.prepare_native_query(); query_en is an asyncio.Task."""
+    with timer.stage("embed"):
+        query_vector = await core.embeddings.aembed_query(user_message)
+
+    if core.answer_cache is not None:
+        cached = await asyncio.to_thread(core.answer_cache.get, query_vector, lang)
+        if cached is not None:
+            return None, query_vector, cached
+
+    query_en = asyncio.ensure_future(atranslate(user_message, "en", lang))
+    return query_en, query_vector, None
+
+
+async def aenglish_query(query_en, timer: StageTimer) -> str:
+    if isinstance(query_en, asyncio.Future):
+        with timer.stage("translate"):
+            return await query_en
+    return query_en
+
+
+async def aselect_context(query_vector, timer: StageTimer, query_en=None):
+    with timer.stage("search"):
+        results = await core.vectorstore.asimilarity_search_by_vector_with_score(
+            query_vector, k=core.SEARCH_K
+        )
+    docs = core.attach_scores(results)
+    if core.lexical_index is not None and query_en is not None:
+        # BM25 scoring and fusion are CPU-bound; keep them off the event loop
+        docs = await asyncio.to_thread(
+            core.fuse_lexical, await aenglish_query(query_en, timer), docs, timer
+        )
+    return core.relevance_gate(docs)
+
+
+async def afinalize_context(query_en: str, docs, timer: StageTimer):
+    # The cross-encoder is CPU-bound; keep it off the event loop
+    if core.reranker is None:
+        return core.finalize_context(query_en, docs, timer)
+    return await asyncio.to_thread(core.finalize_context, query_en, docs, timer)
+
+
+async def abuild_answer(user_message: str, lang: str, timer: StageTimer) -> str:
+    """Async twin of app.build_answer()."""
+    if not core.rag_ready and not await asyncio.to_thread(core.ensure_rag):
+        return core.SERVICE_UNAVAILABLE
+
+    lang = await aresolve_language(user_message, lang)
+    query_en, query_vector, cached = await aprepare_query(user_message, lang, timer)
+    if cached is not None:
+        return cached
+
+    relevant_docs = await aselect_context(query_vector, timer, query_en)
+    query_en = await aenglish_query(query_en, timer)
+    relevant_docs = await afinalize_context(query_en, relevant_docs, timer)
+    with timer.stage("generate"):
+        if not relevant_docs:
+            answer_en = (await core.llm.ainvoke(query_en)).content
+        else:
+            answer_en = await core.question_answer_chain.ainvoke(
+                {"input": query_en, "context": relevant_docs}
+            )
+            answer_en = answer_en or "I'm not sure how to help with that."
+
+    with timer.stage("translate"):
+        answer = answer_en if lang == "en" else await atranslate(answer_en, lang, "en")
+
+    if core.answer_cache is not None:
+        await asyncio.to_thread(core.answer_cache.put, query_vector, lang, answer)
+    return answer
+
+
+async def astream_answer(user_message: str, lang: str, timer: StageTimer):
+    """Async twin of app.stream_answer()."""
+    if not core.rag_ready and not await asyncio.to_thread(core.ensure_rag):
+        yield core.SERVICE_UNAVAILABLE
+        return
+
+    lang = await aresolve_language(user_message, lang)
+    query_en, query_vector, cached = await aprepare_query(user_message, lang, timer)
+    if cached is not None:
+        yield cached
+        return
+
+    relevant_docs = await aselect_context(query_vector, timer, query_en)
+    query_en = await aenglish_query(query_en, timer)
+    relevant_docs = await afinalize_context(query_en, relevant_docs, timer)
+
+    async def tokens():
+        if not relevant_docs:
+            stream = core.llm.astream(query_en)
+        else:
+            stream = core.question_answer_chain.astream(
+                {"input": query_en, "context": relevant_docs}
+            )
+        with timer.stage("generate"):
+            async for chunk in stream:
+                token = getattr(chunk, "content", chunk)
+                if token:
+                    yield token
+
+    parts = []
+    if lang == "en":
+        async for token in tokens():
+            parts.append(token)
+            yield token
+    else:
+        async for sentence in asentence_chunks(tokens()):
+            text = sentence.strip()
+            trailing = sentence[len(sentence.rstrip()):]
+            with timer.stage("translate"):
+                translated = await atranslate(text, lang, "en") if text else ""
+            parts.append(translated + trailing)
+            yield translated + trailing
+
+    if core.answer_cache is not None and parts:
+        await asyncio.to_thread(core.answer_cache.put, query_vector, lang, "".join(parts))
+
+
+async def ashared_answer(user_message: str, lang: str, timer: StageTimer) -> str:
+    """Async twin of app.shared_answer()."""
+    if not core.CHAT_COALESCE:
+        return await abuild_answer(user_message, lang, timer)
+    return await chat_flight.do(
+        coalesce_key(user_message, lang), lambda: abuild_answer(user_message, lang, timer)
+    )
+
+
+def ashared_stream_answer(user_message: str, lang: str, timer: StageTimer):
+    """Async twin of app.shared_stream_answer()."""
+    if not core.CHAT_COALESCE:
+        return astream_answer(user_message, lang, timer)
+    return chat_flight.stream(
+        coalesce_key(user_message, lang), lambda: astream_answer(user_message, lang, timer)
+    )
+
+
+# ================================================================
+# 3. ROUTES: CHAT & HISTORY
+# ================================================================
+@quart_app.route("/get", methods=["POST"])
+async def chat():
+    user_id = session["user_id"]
+    conversation_id = get_current_conversation_id()
+    form = await request.form
+    user_message = form["msg"]
+    lang = form.get("lang", "en")
+
+    await save_message(user_id, conversation_id, "user", user_message, lang)
+
+    timer = StageTimer()
+    try:
+        answer = await ashared_answer(user_message, lang, timer)
+    except Exception as e:
+        print("Chat error:", e)
+        metrics.counter("chat_errors_total", "failed chat turns").inc()
+        answer = "Sorry, something went wrong. Please try again."
+
+    timer.record("chat")
+    print(f"[chat/async] timings {timer.summary()}")
+
+    await save_message(user_id, conversation_id, "bot", answer, lang)
+    return answer
+
+
+@quart_app.route("/get/stream", methods=["POST"])
+async def chat_stream():
+    user_id = session["user_id"]
+    conversation_id = get_current_conversation_id()
+    form = await request.form
+    user_message = form["msg"]
+    lang = form.get("lang", "en")
+
+    await save_message(user_id, conversation_id, "user", user_message, lang)
+
+    async def generate():
+        timer = StageTimer()
+        parts = []
+        try:
+            async for piece in ashared_stream_answer(user_message, lang, timer):
+                if not parts:
+                    metrics.histogram(
+                        "chat_stream_first_chunk_ms", help="time to first streamed chunk"
+                    ).observe(timer.total_ms())
+                parts.append(piece)
+                yield sse_event({"token": piece})
+        except Exception as e:
+            print("Chat stream error:", e)
+            metrics.counter("chat_errors_total", "failed chat turns").inc()
+            error = "Sorry, something went wrong. Please try again."
+            parts.append(error)
+            yield sse_event({"token": error})
+        finally:
+            timer.record("chat_stream")
+            print(f"[chat/stream/async] timings {timer.summary()}")
+            await save_message(user_id, conversation_id, "bot", "".join(parts), lang)
+
+        yield sse_event({"conversation_id": conversation_id}, event="done")
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def asettle_history(user_id: str):
+    """Async twin of app.settle_history()."""
+    if core.history_writer is not None:
+        await asyncio.to_thread(core.history_writer.wait_for_user, user_id)
+
+
+@quart_app.route("/conversations", methods=["GET"])
+async def list_conversations():
+    user_id = session["user_id"]
+    limit = conversation_summaries.page_size(request.args.get("limit"))
+    try:
+        query = conversation_summaries.page_filter(user_id, request.args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    await asettle_history(user_id)
+    docs = await (
+        aconversations_collection.find(query, conversation_summaries.SUMMARY_PROJECTION)
+        .sort(conversation_summaries.PAGE_SORT)
+        .limit(limit + 1)
+        .to_list(None)
+    )
+    conversations, next_cursor = conversation_summaries.to_page(docs, limit)
+    return jsonify(
+        {"status": "success", "conversations": conversations, "next_cursor": next_cursor}
+    )
+
+
+@quart_app.route("/conversation/<conv_id>", methods=["GET"])
+async def load_conversation(conv_id):
+    user_id = session["user_id"]
+    session["current_chat_id"] = conv_id
+
+    limit = message_pages.page_size(request.args.get("limit"))
+    selected = message_pages.select_fields(request.args.get("fields"))
+    before = request.args.get("before")
+    since = request.args.get("since")
+    await asettle_history(user_id)
+    try:
+        if core.HISTORY_SCHEMA == "buckets":
+            # Reads buckets one by one until the page is full
+            docs = await asyncio.to_thread(
+                core.read_messages, user_id, conv_id, limit, selected, before, since
+            )
+        else:
+            query, sort = message_pages.page_query(user_id, conv_id, before=before, since=since)
+            docs = await (
+                ahistory_collection.find(query, message_pages.projection(selected))
+                .sort(sort)
+                .limit(limit + 1)
+                .to_list(None)
+            )
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    page = message_pages.to_page(docs, limit, selected, before=before, since=since)
+
+    return jsonify({"status": "success", "conversation_id": conv_id, **page})
+
+
+@quart_app.route("/end_chat", methods=["POST"])
+async def start_new_chat():
+    session["current_chat_id"] = None
+    return jsonify({"status": "success", "message": "New chat started"})
+
+
+@quart_app.route("/conversation/delete/<conv_id>", methods=["POST"])
+async def delete_conversation(conv_id):
+    user_id = session["user_id"]
+    if core.HISTORY_SCHEMA == "buckets":
+        deleted = await asyncio.to_thread(core.delete_messages, user_id, conv_id)
+    else:
+        result = await ahistory_collection.delete_many(
+            {"user_id": user_id, "conversation_id": conv_id}
+        )
+        deleted = result.deleted_count
+    await aconversations_collection.delete_one(
+        {"user_id": user_id, "conversation_id": conv_id}
+    )
+
+    if session.get("current_chat_id") == conv_id:
+        session["current_chat_id"] = None
+
+    return jsonify({"status": "success", "message": f"Deleted {deleted} messages"})
+
+
+# ================================================================
+# 4. ROUTES: NEWS
+# ================================================================
+@quart_app.route("/news")
+async def get_news():
+    lang = request.args.get("lang", "en")
+    if lang not in core.SUPPORTED_LANGUAGES:
+        lang = "en"
+
+    # In-memory lookup; the shared news cache refreshes in its own thread
+    entry = core.news_cache.get(lang)
+    headers = core.news_headers(entry)
+    if core.news_not_modified(request, entry):
+        return "", 304, headers
+
+    return jsonify({"status": "success", "news": entry.news}), 200, headers
+
+
+# ================================================================
+# 5. ASGI ENTRY POINT
+# ================================================================
+flask_asgi = WsgiToAsgi(core.app)
+
+
+async def application(scope, receive, send):
+    """Route async paths to Quart, the rest to the Flask app."""
+    if scope["type"] == "lifespan":
+        return await quart_app(scope, receive, send)
+    if scope["type"] == "http" and scope["path"].startswith(ASYNC_PREFIXES):
+        return await quart_app(scope, receive, send)
+    return await flask_asgi(scope, receive, send)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "asgi:application", host="0.0.0.0", port=int(os.environ.get("PORT", 8080))
+    )
@@ -0,0 +1,80 @@
+"""
+Chunking comparison: fixed 500-char windows vs section-aware chunks, with and without near-duplicate removal.
+
+Loads the same corpus store_index.py indexes (PDFs in data/ plus the cached
+Wikipedia topics; --offline uses only the cache) once, then chunks it four
+ways and reports, per variant, the number of chunks (= vectors in the
+index), the characters to embed, how many chunks end on a sentence
+boundary and, with --embed, the measured embedding time for the variant.
+
+    python benchmarks/chunking.py --offline --threshold 0.8 --embed
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("VECTOR_BACKEND", "local")  # store_index needs no Pinecone key then
+
+
+def variants(threshold):
+    from src.chunking import NearDuplicateFilter, SectionChunker
+    from src.helper import iter_text_chunks
+
+    def recursive(docs):
+        return iter_text_chunks(docs)
+
+    def section(docs):
+        return SectionChunker().split_documents(docs)
+
+    def deduped(split):
+        return lambda docs: NearDuplicateFilter(threshold=threshold).filter(split(docs))
+
+    return [
+        ("recursive", recursive),
+        ("recursive+dedupe", deduped(recursive)),
+        ("section", section),
+        ("section+dedupe", deduped(section)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threshold", type=float, default=0.8, help="near-duplicate Jaccard threshold")
+    parser.add_argument("--offline", action="store_true", help="use only the local Wikipedia cache")
+    parser.add_argument("--embed", action="store_true", help="also time embedding every variant")
+    args = parser.parse_args()
+
+    import store_index
+    from src.helper import iter_minimal_docs
+
+    docs = list(iter_minimal_docs(store_index.iter_all_documents(offline=args.offline)))
+    print(f"{len(docs)} pages/articles loaded")
+    embeddings = store_index.get_embeddings() if args.embed else None
+
+    baseline = None
+    for name, split in variants(args.threshold):
+        start = time.perf_counter()
+        chunks = list(split(iter(docs)))
+        split_seconds = time.perf_counter() - start
+        chars = sum(len(c.page_content) for c in chunks)
+        sentence_ends = sum(c.page_content.rstrip().endswith((".", "!", "?", '."')) for c in chunks)
+        baseline = baseline or (len(chunks), chars)
+
+        line = (
+            f"{name:>17}: {len(chunks):6d} chunks ({(len(chunks) / baseline[0] - 1) * 100:+6.1f}%), "
+            f"{chars:9d} chars ({(chars / baseline[1] - 1) * 100:+6.1f}%), "
+            f"{sentence_ends / max(len(chunks), 1) * 100:5.1f}% end a sentence, split {split_seconds:.1f}s"
+        )
+        if embeddings is not None:
+            start = time.perf_counter()
+            for i in range(0, len(chunks), 64):
+                embeddings.embed_documents([c.page_content for c in chunks[i:i + 64]])
+            line += f", embed {time.perf_counter() - start:.1f}s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Request coalescing check: N users ask the same question at the same moment.
+
+Uses the stubs of benchmarks/loadtest.py (Gemini, the vector store, the
+translator and MongoDB replaced by sleeps) with every upstream call
+counted. --users sessions post the same question, differing only in case
+and punctuation, to /get and /get/stream of both the Flask and the ASGI
+app at once. The script reports the embed, search and generate calls, the
+chat_coalesced_total counter and the latency, and checks that every user
+got the answer and has their own history entries. It exits non-zero unless
+each burst made exactly one upstream call (compare --no-coalesce).
+
+    python benchmarks/coalescing.py --users 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import loadtest  # noqa: E402  (sets the stub environment first)
+
+os.environ["HISTORY_WRITE_MODE"] = "sync"  # history is counted right after each burst
+
+QUESTION = "What are the symptoms of dengue fever?"
+VARIANTS = [QUESTION, QUESTION.lower(), QUESTION.rstrip("?") + " ?", "  " + QUESTION.upper()]
+
+
+class Calls:
+    lock = threading.Lock()
+    counts = {}
+
+    @classmethod
+    def hit(cls, name):
+        with cls.lock:
+            cls.counts[name] = cls.counts.get(name, 0) + 1
+
+    @classmethod
+    def reset(cls):
+        cls.counts = {}
+
+
+class CountingEmbeddings(loadtest.StubEmbeddings):
+    def embed_query(self, text):
+        Calls.hit("embed")
+        return super().embed_query(text)
+
+    async def aembed_query(self, text):
+        Calls.hit("embed")
+        return await super().aembed_query(text)
+
+
+class CountingVectorStore(loadtest.StubVectorStore):
+    def similarity_search_by_vector_with_score(self, vector, k=3, **kwargs):
+        Calls.hit("search")
+        return super().similarity_search_by_vector_with_score(vector, k, **kwargs)
+
+    async def asimilarity_search_by_vector_with_score(self, vector, k=3, **kwargs):
+        Calls.hit("search")
+        return await super().asimilarity_search_by_vector_with_score(vector, k, **kwargs)
+
+
+class CountingChain(loadtest.StubChain):
+    def invoke(self, inputs):
+        Calls.hit("generate")
+        return super().invoke(inputs)
+
+    async def ainvoke(self, inputs):
+        Calls.hit("generate")
+        return await super().ainvoke(inputs)
+
+    def stream(self, inputs):
+        Calls.hit("generate")
+        time.sleep(loadtest.Latency.generate)
+        yield from ("Stub answer. ", "It has two sentences.")
+
+    async def astream(self, inputs):
+        Calls.hit("generate")
+        await asyncio.sleep(loadtest.Latency.generate)
+        for token in ("Stub answer. ", "It has two sentences."):
+            yield token
+
+
+def install_counting_stubs(core, asgi):
+    loadtest.install_stubs(core, asgi)
+    core.embeddings = CountingEmbeddings()
+    core.vectorstore = CountingVectorStore()
+    core.question_answer_chain = CountingChain(message=False)
+
+
+def cookies(core, users):
+    serializer = core.app.session_interface.get_signing_serializer(core.app)
+    return [serializer.dumps({"user_id": f"user-{i}"}) for i in range(users)]
+
+
+def answer_text(path, body):
+    if path == "/get":
+        return body
+    # SSE: concatenate the token events
+    import json
+
+    return "".join(
+        json.loads(line[len("data: "):]).get("token", "")
+        for line in body.splitlines() if line.startswith("data: ")
+    )
+
+
+def run_sync(core, user_cookies, path):
+    barrier = threading.Barrier(len(user_cookies))
+
+    def ask(i):
+        client = core.app.test_client()
+        client.set_cookie("session", user_cookies[i])
+        barrier.wait()
+        res = client.post(path, data={"msg": VARIANTS[i % len(VARIANTS)], "lang": "en"})
+        return answer_text(path, res.get_data(as_text=True))
+
+    with ThreadPoolExecutor(max_workers=len(user_cookies)) as pool:
+        return list(pool.map(ask, range(len(user_cookies))))
+
+
+async def run_async(asgi, user_cookies, path):
+    import httpx
+
+    async with asgi.quart_app.test_app():
+        transport = httpx.ASGITransport(app=asgi.application)
+
+        async def ask(i):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://coalescing", cookies={"session": user_cookies[i]}
+            ) as client:
+                res = await client.post(path, data={"msg": VARIANTS[i % len(VARIANTS)], "lang": "en"})
+                return answer_text(path, res.text)
+
+        return await asyncio.gather(*(ask(i) for i in range(len(user_cookies))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--no-coalesce", action="store_true", help="run with CHAT_COALESCE=0")
+    args = parser.parse_args()
+    os.environ["CHAT_COALESCE"] = "0" if args.no_coalesce else "1"
+
+    import app as core
+    import asgi
+    from src import metrics
+
+    install_counting_stubs(core, asgi)
+    user_cookies = cookies(core, args.users)
+    failed = False
+
+    for mode in ("sync", "async"):
+        for path in ("/get", "/get/stream"):
+            Calls.reset()
+            core.history_collection.delete_many({})
+            coalesced_before = metrics.counter("chat_coalesced_total").value
+            start = time.perf_counter()
+            if mode == "sync":
+                answers = run_sync(core, user_cookies, path)
+            else:
+                answers = asyncio.run(run_async(asgi, user_cookies, path))
+            elapsed = time.perf_counter() - start
+
+            users_with_history = len(core.history_collection.distinct("user_id"))
+            answered = sum(answer == "Stub answer. It has two sentences." for answer in answers)
+            coalesced = metrics.counter("chat_coalesced_total").value - coalesced_before
+            print(
+                f"{mode:>5} {path:<12} {args.users} users in {elapsed:.2f}s: "
+                f"embed={Calls.counts.get('embed', 0)} search={Calls.counts.get('search', 0)} "
+                f"generate={Calls.counts.get('generate', 0)}, coalesced={coalesced:.0f}, "
+                f"answered={answered}, users with history={users_with_history}"
+            )
+            failed |= answered != args.users or users_with_history != args.users
+            if not args.no_coalesce:
+                failed |= Calls.counts.get("generate", 0) != 1
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Embedding backend check: accuracy and speed of the int8 ONNX engine
+(src/onnx_embeddings.py) against the PyTorch sentence-transformers model.
+
+Reports load time, single-query queries/sec, batched documents/sec, the
+cosine similarity between both backends' vectors for the same text, and
+how often both backends pick the same top-k neighbours over a small corpus.
+
+    python -m src.onnx_embeddings --out models/minilm-int8   # once
+    python benchmarks/embeddings.py --model-dir models/minilm-int8 --threads 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.onnx_embeddings import MODEL_NAME, OnnxEmbeddings  # noqa: E402
+
+QUERIES = [
+    "What are the symptoms of diabetes?",
+    "How is high blood pressure treated?",
+    "Can dengue fever cause a rash?",
+    "What should I eat when I have typhoid?",
+    "Is a migraine different from a normal headache?",
+    "मधुमेह के लक्षण क्या हैं?",
+    "डेंगू बुखार में क्या करना चाहिए?",
+    "உயர் இரத்த அழுத்தத்தை எவ்வாறு கட்டுப்படுத்துவது?",
+    "మలేరియా ఎలా వ్యాపిస్తుంది?",
+    "fever and sore throat for three days",
+]
+
+CORPUS = [
+    "Diabetes mellitus causes increased thirst, frequent urination and fatigue.",
+    "Hypertension is managed with lifestyle changes and antihypertensive drugs.",
+    "Dengue fever often presents with high fever, joint pain and a skin rash.",
+    "Typhoid patients should eat soft, easily digestible, high-calorie food.",
+    "Migraine is a recurrent headache with nausea and sensitivity to light.",
+    "Malaria is transmitted by the bite of infected Anopheles mosquitoes.",
+    "Asthma is a chronic inflammatory disease of the airways.",
+    "Conjunctivitis is inflammation of the outer layer of the eye.",
+    "Tuberculosis is caused by Mycobacterium tuberculosis and spreads through the air.",
+    "The common cold is a viral infection of the nose and throat.",
+    "Anemia is a decrease in red blood cells or hemoglobin.",
+    "Stroke occurs when blood flow to part of the brain is interrupted.",
+    "Gastroenteritis causes diarrhoea, vomiting and abdominal pain.",
+    "Arthritis is inflammation of one or more joints, causing pain and stiffness.",
+    "Obesity increases the risk of heart disease and type 2 diabetes.",
+    "Sore throat is usually caused by a viral infection and resolves in a week.",
+]
+
+
+def normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def timed_load(factory):
+    start = time.perf_counter()
+    model = factory()
+    return model, time.perf_counter() - start
+
+
+def measure_speed(name, model, load_s, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        model.embed_query(QUERIES[i % len(QUERIES)])
+    qps = repeats / (time.perf_counter() - start)
+
+    docs = CORPUS * max(1, repeats // len(CORPUS))
+    start = time.perf_counter()
+    model.embed_documents(docs)
+    dps = len(docs) / (time.perf_counter() - start)
+
+    print(f"{name:>6}: load {load_s:.2f}s, {qps:.1f} queries/sec, {dps:.1f} docs/sec (batched)")
+
+
+def compare(reference, candidate, k):
+    texts = QUERIES + CORPUS
+    ref = normalize(reference.embed_documents(texts))
+    cand = normalize(candidate.embed_documents(texts))
+    cosines = (ref * cand).sum(axis=1)
+    print(
+        f"vector cosine (onnx vs torch): mean={cosines.mean():.4f} "
+        f"min={cosines.min():.4f} over {len(texts)} texts"
+    )
+
+    n = len(QUERIES)
+    overlaps = []
+    for q in range(n):
+        ref_top = set(np.argsort(-(ref[n:] @ ref[q]))[:k])
+        cand_top = set(np.argsort(-(cand[n:] @ cand[q]))[:k])
+        overlaps.append(len(ref_top & cand_top) / k)
+    print(f"top-{k} neighbour agreement: {statistics.mean(overlaps) * 100:.1f}%")
+    return cosines.min()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model-dir", default="models/minilm-int8")
+    parser.add_argument("--threads", type=int, default=None, help="onnxruntime intra-op threads")
+    parser.add_argument("--repeats", type=int, default=200, help="single queries to time")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="fail below this")
+    parser.add_argument("--skip-torch", action="store_true", help="only time the ONNX engine")
+    args = parser.parse_args()
+
+    onnx, onnx_load = timed_load(lambda: OnnxEmbeddings(args.model_dir, threads=args.threads))
+    measure_speed("onnx", onnx, onnx_load, args.repeats)
+    if args.skip_torch:
+        return
+
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    torch_model, torch_load = timed_load(lambda: HuggingFaceEmbeddings(model_name=MODEL_NAME))
+    measure_speed("torch", torch_model, torch_load, args.repeats)
+
+    worst = compare(torch_model, onnx, args.k)
+    if worst < args.min_cosine:
+        print(f"FAIL: min cosine {worst:.4f} < {args.min_cosine}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Local stand-in for the newsdata.io /latest endpoint.
+
+Serves newsdata-shaped JSON so the /news cache can be exercised without the
+real API: slow responses (--delay), failures (--fail-rate) and changing
+content (a new headline every --rotate seconds).
+
+    python benchmarks/fake_news_server.py --port 8765 --delay 2
+    NEWS_API_URL=http://127.0.0.1:8765/api/1/latest python app.py
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HEADLINES = [
+    "State health department expands dengue surveillance",
+    "New guidelines on managing type 2 diabetes in primary care",
+    "Hospitals report rise in seasonal influenza cases",
+    "Study links air pollution to increased asthma admissions",
+    "Free hypertension screening camps announced",
+    "Researchers trial low-cost tuberculosis test",
+]
+
+
+class FakeNewsHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_rate = 0.0
+    rotate = 60.0
+    requests_served = 0
+
+    def do_GET(self):
+        type(self).requests_served += 1
+        time.sleep(self.delay)
+
+        if random.random() < self.fail_rate:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        lang = parse_qs(urlparse(self.path).query).get("language", ["en"])[0]
+        generation = int(time.time() // self.rotate)
+        results = [
+            {
+                "title": f"[{lang}] {HEADLINES[(generation + i) % len(HEADLINES)]}",
+                "description": "Fake article served by benchmarks/fake_news_server.py.",
+                "link": f"https://example.org/news/{generation}-{i}",
+                "pubDate": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "image_url": None,
+            }
+            for i in range(5)
+        ]
+        body = json.dumps(
+            {"status": "success", "totalResults": len(results), "results": results}
+        ).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        print(f"[fake_news] #{self.requests_served} {self.path.split('?')[0]} {fmt % args}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--rotate", type=float, default=60.0, help="seconds per headline set")
+    args = parser.parse_args()
+
+    FakeNewsHandler.delay = args.delay
+    FakeNewsHandler.fail_rate = args.fail_rate
+    FakeNewsHandler.rotate = args.rotate
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), FakeNewsHandler)
+    print(f"Fake news API on http://127.0.0.1:{args.port}/api/1/latest")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Local stand-in for a Pinecone index's data plane.
+
+Keeps vectors in memory and answers the REST calls store_index.py makes
+(/vectors/upsert, /vectors/delete, /describe_index_stats), with optional
+per-request latency (--delay) and failures (--fail-rate), so the upload
+pipeline can be exercised without a Pinecone account.
+
+    python benchmarks/fake_vector_server.py --port 8766 --delay 0.2
+    PINECONE_INDEX_HOST=http://127.0.0.1:8766 python store_index.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeVectorHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_rate = 0.0
+    vectors = {}
+    lock = threading.Lock()
+    upsert_requests = 0
+
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload or {}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stats(self):
+        dimension = len(next(iter(self.vectors.values()))["values"]) if self.vectors else 0
+        return {
+            "namespaces": {"": {"vectorCount": len(self.vectors)}},
+            "dimension": dimension,
+            "totalVectorCount": len(self.vectors),
+        }
+
+    def do_GET(self):
+        if self.path.startswith("/describe_index_stats"):
+            return self._reply(200, self._stats())
+        self._reply(404, {"message": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.delay)
+
+        if random.random() < self.fail_rate:
+            return self._reply(503, {"message": "injected failure"})
+
+        cls = type(self)
+        if self.path == "/vectors/upsert":
+            with cls.lock:
+                cls.upsert_requests += 1
+                for vector in payload.get("vectors", []):
+                    cls.vectors[vector["id"]] = vector
+            return self._reply(200, {"upsertedCount": len(payload.get("vectors", []))})
+        if self.path == "/vectors/delete":
+            with cls.lock:
+                if payload.get("deleteAll"):
+                    cls.vectors.clear()
+                for vector_id in payload.get("ids", []):
+                    cls.vectors.pop(vector_id, None)
+            return self._reply(200, {})
+        if self.path.startswith("/describe_index_stats"):
+            return self._reply(200, self._stats())
+        self._reply(404, {"message": "not found"})
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(port: int = 8766, delay: float = 0.0, fail_rate: float = 0.0, background: bool = False):
+    FakeVectorHandler.delay = delay
+    FakeVectorHandler.fail_rate = fail_rate
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeVectorHandler)
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    print(f"Fake vector index on http://127.0.0.1:{port} (delay={delay}s, fail-rate={fail_rate})")
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of 503 responses")
+    args = parser.parse_args()
+    serve(args.port, args.delay, args.fail_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Per-message vs bucketed chat_history: storage, index size and read latency.
+
+Seeds --conversations conversations of --messages messages into chat_history
+(one document per message, with the app's indexes), converts them with the
+same code as `python migrate.py buckets`, then reports for both schemas the
+document count, data size, index size, and the median latency of reading the
+newest page and a page from the middle of a conversation (app.read_messages).
+
+With --mongo the sizes come from MongoDB's collStats (MONGO_URL; a throwaway
+`medical_chatbot_bench` database is used and dropped). mongomock has no
+storage engine, so there the data size is the summed BSON size and the index
+size is shown as index entries (one per document per index).
+
+    python benchmarks/history_buckets.py --conversations 50 --messages 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import bson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("PINECONE_API_KEY", "stub")
+os.environ.setdefault("GOOGLE_API_KEY", "stub")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ["RAG_INIT"] = "lazy"
+os.environ["TRANSLATION_PREWARM_HISTORY"] = "0"
+os.environ["HISTORY_WRITE_MODE"] = "sync"
+
+BENCH_DB = "medical_chatbot_bench"
+USER_ID = "bench-user"
+
+
+def seed(collection, conversations, messages):
+    start = datetime.now(timezone.utc) - timedelta(days=1)
+    for c in range(conversations):
+        collection.insert_many(
+            [
+                {
+                    "user_id": USER_ID,
+                    "conversation_id": f"conv-{c}",
+                    "role": "user" if i % 2 == 0 else "bot",
+                    "message": f"Message {i}: " + "symptoms and treatment options " * 4,
+                    "lang": "en",
+                    "timestamp": start + timedelta(seconds=c * messages + i),
+                }
+                for i in range(messages)
+            ]
+        )
+
+
+def sizes(db, name, use_mongo):
+    collection = db[name]
+    if use_mongo:
+        stats = db.command("collStats", name)
+        return stats["count"], stats["size"], f"{stats['totalIndexSize']:,} B"
+    docs = list(collection.find())
+    data = sum(len(bson.encode(doc)) for doc in docs)
+    indexes = len(collection.index_information())
+    return len(docs), data, f"{len(docs) * indexes:,} entries"
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=500, help="messages per conversation")
+    parser.add_argument("--bucket-size", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=50, help="page size")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--mongo", action="store_true", help="use MONGO_URL instead of mongomock")
+    args = parser.parse_args()
+
+    import pymongo
+    import app as core
+
+    if args.mongo:
+        client = pymongo.MongoClient(core.MONGO_URL, serverSelectionTimeoutMS=5000)
+    else:
+        import mongomock
+
+        client = mongomock.MongoClient()
+    client.drop_database(BENCH_DB)
+    db = client[BENCH_DB]
+
+    core.history_collection = db["chat_history"]
+    core.history_buckets_collection = db["chat_history_buckets"]
+    core.history_collection.create_index([("user_id", 1), ("timestamp", -1)])
+    core.history_collection.create_index([("user_id", 1), ("conversation_id", 1)])
+    core.message_pages.ensure_indexes(core.history_collection)
+
+    print(
+        f"backend={'mongo' if args.mongo else 'mongomock'} conversations={args.conversations} "
+        f"messages={args.messages} bucket={args.bucket_size} page={args.limit}"
+    )
+    try:
+        seed(core.history_collection, args.conversations, args.messages)
+        core.message_pages.migrate_to_buckets(
+            core.history_collection, core.history_buckets_collection, bucket_size=args.bucket_size
+        )
+
+        # A page from the middle of a conversation, as reached by scrolling up
+        core.HISTORY_SCHEMA = "messages"
+        middle = core.history_collection.find_one(
+            {"user_id": USER_ID, "conversation_id": "conv-0"},
+            sort=[("timestamp", 1)], skip=args.messages // 2,
+        )
+        cursor = core.message_pages.encode_cursor(middle)
+
+        print(f"{'schema':<9} {'docs':>8} {'data bytes':>12} {'index size':>18} "
+              f"{'newest ms':>10} {'middle ms':>10}")
+        fields = core.message_pages.MESSAGE_FIELDS
+        for schema, name in (("messages", "chat_history"), ("buckets", "chat_history_buckets")):
+            core.HISTORY_SCHEMA = schema
+            newest = median_ms(
+                lambda: core.read_messages(USER_ID, "conv-0", args.limit, fields), args.repeat
+            )
+            middle_ms = median_ms(
+                lambda: core.read_messages(USER_ID, "conv-0", args.limit, fields, before=cursor),
+                args.repeat,
+            )
+            docs, data, index = sizes(db, name, args.mongo)
+            print(f"{schema:<9} {docs:>8,} {data:>12,} {index:>18} {newest:>10.2f} {middle_ms:>10.2f}")
+    finally:
+        client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    main()
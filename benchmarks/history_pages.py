@@ -0,0 +1,133 @@
+"""
+Payload size and latency of /conversation/<id>: whole conversation vs pages.
+
+Seeds conversations of 10, 1k and 10k messages and times, through the Flask
+test client, the old full load (every message, every field) against the
+paged endpoint: the first page, the next older page, the same page with
+?fields=role,message, and a ?since= poll with nothing new.
+
+By default the data lives in an in-process mongomock database, which shows
+payload sizes and the Python-side cost; pass --mongo to run against
+MONGO_URL (a throwaway `medical_chatbot_bench` database is used and dropped).
+
+    python benchmarks/history_pages.py --sizes 10 1000 10000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("PINECONE_API_KEY", "stub")
+os.environ.setdefault("GOOGLE_API_KEY", "stub")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ["RAG_INIT"] = "lazy"
+os.environ["TRANSLATION_PREWARM_HISTORY"] = "0"
+
+BENCH_DB = "medical_chatbot_bench"
+USER_ID = "bench-user"
+
+
+def seed(collection, conversation_id, size):
+    start = datetime.now(timezone.utc) - timedelta(seconds=size)
+    collection.insert_many(
+        [
+            {
+                "user_id": USER_ID,
+                "conversation_id": conversation_id,
+                "role": "user" if i % 2 == 0 else "bot",
+                "message": f"Message {i}: " + "symptoms and treatment options " * 8,
+                "lang": "en",
+                "timestamp": start + timedelta(seconds=i),
+            }
+            for i in range(size)
+        ]
+    )
+
+
+def measure(fn, repeat):
+    timings, size = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return size, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--limit", type=int, default=50, help="page size")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--mongo", action="store_true", help="use MONGO_URL instead of mongomock")
+    args = parser.parse_args()
+
+    import pymongo
+    import app as core
+    from flask import jsonify
+
+    if args.mongo:
+        client = pymongo.MongoClient(core.MONGO_URL, serverSelectionTimeoutMS=5000)
+    else:
+        import mongomock
+
+        client = mongomock.MongoClient()
+    db = client[BENCH_DB]
+    db["chat_history"].drop()
+    core.history_collection = db["chat_history"]
+    core.history_collection.create_index([("user_id", 1), ("conversation_id", 1)])
+    core.message_pages.ensure_indexes(core.history_collection)
+
+    http = core.app.test_client()
+    with http.session_transaction() as sess:
+        sess["user_id"] = USER_ID
+
+    def old_full_load(conversation_id):
+        # The pre-pagination endpoint: every message, every field
+        with core.app.test_request_context():
+            messages = list(
+                core.history_collection.find(
+                    {"user_id": USER_ID, "conversation_id": conversation_id}, {"_id": 0}
+                ).sort("timestamp", 1)
+            )
+            body = jsonify(
+                {"status": "success", "messages": messages, "conversation_id": conversation_id}
+            )
+            return len(body.get_data())
+
+    def page(conversation_id, query=""):
+        res = http.get(f"/conversation/{conversation_id}?limit={args.limit}{query}")
+        assert res.status_code == 200, res.data
+        return len(res.data)
+
+    print(f"backend={'mongo' if args.mongo else 'mongomock'} page={args.limit} repeat={args.repeat}")
+    print(f"{'messages':>9} {'mode':<18} {'bytes':>11} {'median ms':>10}")
+    try:
+        for size in args.sizes:
+            conversation_id = f"bench-{size}"
+            seed(core.history_collection, conversation_id, size)
+            first = http.get(f"/conversation/{conversation_id}?limit={args.limit}").json
+
+            modes = [
+                ("full (old)", lambda: old_full_load(conversation_id)),
+                ("first page", lambda: page(conversation_id)),
+                ("first page, fields", lambda: page(conversation_id, "&fields=role,message")),
+                ("since (no new)", lambda: page(conversation_id, f"&since={first['latest_cursor']}")),
+            ]
+            if first["next_cursor"]:
+                modes.insert(
+                    2, ("older page", lambda: page(conversation_id, f"&before={first['next_cursor']}"))
+                )
+
+            for name, fn in modes:
+                size_bytes, median = measure(fn, args.repeat)
+                print(f"{size:>9} {name:<18} {size_bytes:>11,} {median:>10.2f}")
+    finally:
+        client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    main()
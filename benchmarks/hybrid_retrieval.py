@@ -0,0 +1,102 @@
+"""
+Offline retrieval evaluation: dense vector search vs hybrid (BM25 + dense, reciprocal rank fusion).
+
+For every query in EVAL_SET (short exact-term queries as users type them,
+plus full questions as a control) the script retrieves context from the
+configured index (VECTOR_BACKEND, same settings as the app) and the BM25
+index built by store_index.py (LEXICAL_INDEX_PATH), and reports per mode:
+
+    recall@k   a retrieved chunk mentions the expected term
+    rag rate   the relevance gate kept some context (no direct-Gemini fallback)
+    latency    mean embed + search (+ BM25 + fusion) time
+
+    python benchmarks/hybrid_retrieval.py --k 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("RAG_INIT", "lazy")
+os.environ.setdefault("TRANSLATION_PREWARM_HISTORY", "0")
+os.environ["RETRIEVAL_MODE"] = "hybrid"  # load the lexical index; "dense" runs disable it
+
+# (kind, query, terms a relevant chunk mentions)
+EVAL_SET = [
+    ("keyword", "HbA1c", ["hba1c", "glycated"]),
+    ("keyword", "dengue NS1", ["ns1"]),
+    ("keyword", "metformin", ["metformin"]),
+    ("keyword", "paracetamol dose", ["paracetamol", "acetaminophen"]),
+    ("keyword", "ibuprofen", ["ibuprofen"]),
+    ("keyword", "insulin", ["insulin"]),
+    ("keyword", "ORS", ["oral rehydration", "ors"]),
+    ("keyword", "Widal test", ["widal"]),
+    ("keyword", "Aedes aegypti", ["aedes"]),
+    ("keyword", "salbutamol inhaler", ["salbutamol", "albuterol"]),
+    ("keyword", "chloroquine", ["chloroquine"]),
+    ("keyword", "BCG vaccine", ["bcg"]),
+    ("question", "What are the symptoms of diabetes?", ["diabet"]),
+    ("question", "How does malaria spread?", ["malaria"]),
+    ("question", "How is high blood pressure treated?", ["hypertension", "blood pressure"]),
+    ("question", "What causes migraine?", ["migraine"]),
+]
+
+
+def mentions(doc, terms) -> bool:
+    text = doc.page_content.lower()
+    return any(term in text for term in terms)
+
+
+def evaluate(core, mode, lexical_index, k):
+    from src.metrics import StageTimer
+
+    core.lexical_index = lexical_index if mode == "hybrid" else None
+    core.SEARCH_K = k
+    results = {}
+    for kind, query, terms in EVAL_SET:
+        timer = StageTimer()
+        start = time.perf_counter()
+        vector = core.embed_query(query, timer)
+        retrieved = core.retrieve_context(vector, timer)
+        if core.lexical_index is not None:
+            retrieved = core.fuse_lexical(query, retrieved, timer)
+        relevant = core.relevance_gate(retrieved)
+        elapsed = time.perf_counter() - start
+        results.setdefault(kind, []).append(
+            (any(mentions(doc, terms) for doc in retrieved), bool(relevant), elapsed)
+        )
+
+    for kind, rows in results.items():
+        print(
+            f"{mode:>7} {kind:>8}: recall@{k}={sum(r[0] for r in rows) / len(rows) * 100:5.1f}%, "
+            f"rag rate {sum(r[1] for r in rows) / len(rows) * 100:5.1f}%, "
+            f"mean latency {statistics.mean(r[2] for r in rows) * 1000:.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    import app as core
+
+    if not core.ensure_rag():
+        sys.exit(f"RAG stack not available: {core.rag_error}")
+    if core.lexical_index is None:
+        sys.exit(f"No lexical index at '{core.LEXICAL_INDEX_PATH}': run store_index.py first")
+
+    print(
+        f"{len(EVAL_SET)} queries, backend={core.VECTOR_BACKEND}, "
+        f"{len(core.lexical_index)} chunks in the BM25 index"
+    )
+    lexical_index = core.lexical_index
+    for mode in ("dense", "hybrid"):
+        evaluate(core, mode, lexical_index, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Load-test harness: concurrent-user throughput of the sync (Flask) and async
+(ASGI) serving modes against local stubs.
+
+Pinecone, Gemini, the translator and MongoDB are replaced by in-process stubs
+that only wait (time.sleep / asyncio.sleep) for a configurable latency, so the
+numbers show how well each mode overlaps I/O, not how fast the real services
+are. The sync mode is driven by a fixed pool of worker threads (like
+`gunicorn --threads N`); the async mode runs every user on one event loop.
+
+    python benchmarks/loadtest.py --users 50 --requests 4 --threads 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Stub mode: no caches that would short-circuit repeated requests
+os.environ.setdefault("PINECONE_API_KEY", "stub")
+os.environ.setdefault("GOOGLE_API_KEY", "stub")
+os.environ.setdefault("SECRET_KEY", "loadtest")
+os.environ["ANSWER_CACHE_BACKEND"] = "off"
+os.environ["RAG_INIT"] = "lazy"  # stubs are installed instead of warming up
+os.environ["TRANSLATION_CACHE_PATH"] = ""
+os.environ["TRANSLATION_PREWARM_HISTORY"] = "0"
+
+import mongomock  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+
+
+# ================================================================
+# STUBS
+# ================================================================
+class Latency:
+    embed = 0.01
+    search = 0.04
+    generate = 0.4
+    translate = 0.1
+    db = 0.005
+
+
+class StubEmbeddings:
+    def embed_query(self, text):
+        time.sleep(Latency.embed)
+        return [0.1] * 384
+
+    async def aembed_query(self, text):
+        await asyncio.sleep(Latency.embed)
+        return [0.1] * 384
+
+
+class StubVectorStore:
+    def _results(self, k):
+        return [(Document(page_content=f"chunk {i}"), 0.8 - i * 0.1) for i in range(k)]
+
+    def similarity_search_by_vector_with_score(self, vector, k=3, **kwargs):
+        time.sleep(Latency.search)
+        return self._results(k)
+
+    async def asimilarity_search_by_vector_with_score(self, vector, k=3, **kwargs):
+        await asyncio.sleep(Latency.search)
+        return self._results(k)
+
+
+class StubChain:
+    """Stands in for both the LLM and the stuff-documents chain."""
+
+    def __init__(self, message: bool):
+        self.message = message
+
+    def _answer(self):
+        text = "Stub answer. It has two sentences."
+        return AIMessage(content=text) if self.message else text
+
+    def invoke(self, inputs):
+        time.sleep(Latency.generate)
+        return self._answer()
+
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(Latency.generate)
+        return self._answer()
+
+
+class StubTranslator:
+    def __init__(self, source="auto", target="en"):
+        self.target = target
+
+    def translate(self, text):
+        time.sleep(Latency.translate)
+        return f"[{self.target}] {text}"
+
+
+class SlowCollection:
+    """mongomock collection with a fixed per-call delay."""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            time.sleep(Latency.db)
+            return attr(*args, **kwargs)
+
+        return call
+
+
+def install_stubs(core, asgi):
+    core.embeddings = StubEmbeddings()
+    core.vectorstore = StubVectorStore()
+    core.llm = StubChain(message=True)
+    core.question_answer_chain = StubChain(message=False)
+    core.GoogleTranslator = StubTranslator
+    core.rag_ready = True
+
+    stub_db = mongomock.MongoClient()["medical_chatbot"]
+    core.history_collection = SlowCollection(stub_db["chat_history"])
+    core.conversations_collection = SlowCollection(stub_db["conversations"])
+    core.db = None  # makes the async app wrap the same stub collection
+
+
+def session_cookie(core) -> str:
+    serializer = core.app.session_interface.get_signing_serializer(core.app)
+    return serializer.dumps({"user_id": "loadtest-user"})
+
+
+def summarize(mode, latencies, elapsed):
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{mode:>5}: {len(latencies)} requests in {elapsed:.2f}s → "
+        f"{len(latencies) / elapsed:.1f} req/s, "
+        f"p50={statistics.median(latencies) * 1000:.0f}ms p95={p95 * 1000:.0f}ms"
+    )
+
+
+# ================================================================
+# DRIVERS
+# ================================================================
+def run_sync(core, cookie, users, requests_per_user, threads, lang):
+    def user_session(user):
+        client = core.app.test_client()
+        client.set_cookie("session", cookie)
+        latencies = []
+        for i in range(requests_per_user):
+            start = time.perf_counter()
+            res = client.post("/get", data={"msg": f"question {user}-{i}", "lang": lang})
+            assert res.status_code == 200, res.status_code
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(user_session, range(users)))
+    summarize("sync", [l for r in results for l in r], time.perf_counter() - start)
+
+
+async def run_async(asgi, cookie, users, requests_per_user, lang):
+    import httpx
+
+    async with asgi.quart_app.test_app():  # runs before_serving / after_serving
+        transport = httpx.ASGITransport(app=asgi.application)
+
+        async def user_session(user):
+            async with httpx.AsyncClient(
+                transport=transport,
+                base_url="http://loadtest",
+                cookies={"session": cookie},
+            ) as client:
+                latencies = []
+                for i in range(requests_per_user):
+                    start = time.perf_counter()
+                    res = await client.post(
+                        "/get", data={"msg": f"question {user}-{i}", "lang": lang}
+                    )
+                    assert res.status_code == 200, res.status_code
+                    latencies.append(time.perf_counter() - start)
+                return latencies
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(user_session(u) for u in range(users)))
+        summarize("async", [l for r in results for l in r], time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=50, help="concurrent users")
+    parser.add_argument("--requests", type=int, default=4, help="requests per user")
+    parser.add_argument("--threads", type=int, default=8, help="sync worker threads")
+    parser.add_argument("--lang", default="hi", help="chat language (en skips translation)")
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    args = parser.parse_args()
+
+    import app as core
+    import asgi
+
+    install_stubs(core, asgi)
+    cookie = session_cookie(core)
+
+    print(
+        f"{args.users} users × {args.requests} requests, lang={args.lang}, "
+        f"stub latency: embed={Latency.embed}s search={Latency.search}s "
+        f"generate={Latency.generate}s translate={Latency.translate}s db={Latency.db}s"
+    )
+    if args.mode in ("sync", "both"):
+        run_sync(core, cookie, args.users, args.requests, args.threads, args.lang)
+    if args.mode in ("async", "both"):
+        asyncio.run(run_async(asgi, cookie, args.users, args.requests, args.lang))
+
+
+if __name__ == "__main__":
+    main()
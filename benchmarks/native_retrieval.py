@@ -0,0 +1,103 @@
+"""
+Offline retrieval evaluation: translate-first vs native-language queries.
+
+For every Hindi / Tamil / Telugu question in EVAL_SET the script retrieves
+the top-k chunks from the configured index (VECTOR_BACKEND, same settings
+as the app) three ways:
+
+    translate  translate the question to English (GoogleTranslator), then embed
+    reference  embed the hand-written English question (upper bound)
+    native     embed the question as written (QUERY_MODE=native)
+
+and reports recall@k (a chunk mentioning the expected topic was retrieved)
+and mean latency of translate + embed + search per path.
+
+    python benchmarks/native_retrieval.py --k 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("RAG_INIT", "lazy")
+os.environ.setdefault("TRANSLATION_PREWARM_HISTORY", "0")
+
+# (lang, question, English reference, topic keywords a relevant chunk mentions)
+EVAL_SET = [
+    ("hi", "मधुमेह के लक्षण क्या हैं?", "What are the symptoms of diabetes?", ["diabet"]),
+    ("hi", "डेंगू बुखार में क्या करना चाहिए?", "What should be done in dengue fever?", ["dengue"]),
+    ("hi", "उच्च रक्तचाप का इलाज कैसे होता है?", "How is high blood pressure treated?", ["hypertension", "blood pressure"]),
+    ("hi", "मलेरिया कैसे फैलता है?", "How does malaria spread?", ["malaria"]),
+    ("hi", "अस्थमा के दौरे से कैसे बचें?", "How to prevent an asthma attack?", ["asthma"]),
+    ("hi", "टाइफाइड में क्या खाना चाहिए?", "What should I eat in typhoid?", ["typhoid"]),
+    ("ta", "நீரிழிவு நோயின் அறிகுறிகள் என்ன?", "What are the symptoms of diabetes?", ["diabet"]),
+    ("ta", "டெங்கு காய்ச்சலுக்கு என்ன சிகிச்சை?", "What is the treatment for dengue fever?", ["dengue"]),
+    ("ta", "காசநோய் எவ்வாறு பரவுகிறது?", "How does tuberculosis spread?", ["tuberculosis"]),
+    ("ta", "ஒற்றைத் தலைவலிக்கு என்ன காரணம்?", "What causes migraine?", ["migraine"]),
+    ("ta", "இரத்த சோகை என்றால் என்ன?", "What is anemia?", ["anemia", "anaemia"]),
+    ("te", "మలేరియా ఎలా వ్యాపిస్తుంది?", "How does malaria spread?", ["malaria"]),
+    ("te", "చికున్‌గున్యా లక్షణాలు ఏమిటి?", "What are the symptoms of chikungunya?", ["chikungunya"]),
+    ("te", "గుండె జబ్బును ఎలా నివారించాలి?", "How to prevent heart disease?", ["heart", "cardiovascular"]),
+    ("te", "కండ్లకలక ఎలా వస్తుంది?", "How does conjunctivitis occur?", ["conjunctivitis"]),
+    ("te", "ఊబకాయం వల్ల వచ్చే ప్రమాదాలు ఏమిటి?", "What are the risks of obesity?", ["obesity", "obese"]),
+]
+
+
+def is_relevant(doc, keywords) -> bool:
+    text = f"{doc.metadata.get('source', '')} {doc.page_content}".lower()
+    return any(keyword in text for keyword in keywords)
+
+
+def evaluate(core, path, k):
+    from deep_translator import GoogleTranslator
+
+    hits, latencies = [], []
+    for lang, question, reference, keywords in EVAL_SET:
+        start = time.perf_counter()
+        if path == "translate":
+            query = GoogleTranslator(source=lang, target="en").translate(question)
+        elif path == "reference":
+            query = reference
+        else:
+            query = question
+        vector = core.embeddings.embed_query(query)
+        results = core.vectorstore.similarity_search_by_vector_with_score(vector, k=k)
+        latencies.append(time.perf_counter() - start)
+        hits.append(any(is_relevant(doc, keywords) for doc, _ in results))
+
+    by_lang = {}
+    for (lang, *_), hit in zip(EVAL_SET, hits):
+        by_lang.setdefault(lang, []).append(hit)
+    per_lang = " ".join(
+        f"{lang}={sum(v) / len(v) * 100:.0f}%" for lang, v in sorted(by_lang.items())
+    )
+    print(
+        f"{path:>9}: recall@{k}={sum(hits) / len(hits) * 100:5.1f}% ({per_lang}), "
+        f"mean latency {statistics.mean(latencies) * 1000:.0f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument(
+        "--paths", nargs="+", default=["translate", "reference", "native"],
+        choices=["translate", "reference", "native"],
+    )
+    args = parser.parse_args()
+
+    import app as core
+
+    if not core.ensure_rag():
+        sys.exit(f"RAG stack not available: {core.rag_error}")
+
+    print(f"{len(EVAL_SET)} questions, backend={core.VECTOR_BACKEND}")
+    for path in args.paths:
+        evaluate(core, path, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Context selection benchmark: top-k vector search vs cross-encoder rerank + token budget.
+
+For every English question in EVAL_SET the script builds the RAG context
+from the configured index (VECTOR_BACKEND, same settings as the app) two
+ways:
+
+    baseline  the top RETRIEVAL_K chunks of the vector search, passed in full
+    rerank    the top --candidates chunks, reranked by --model, the best
+              --top-n kept and packed into --budget estimated tokens
+
+and reports the estimated prompt tokens (system prompt + context +
+question), the share of context chunks that mention the expected topic and
+how often the first chunk does. Unless --no-llm is given, each prompt is
+also sent to Gemini and the end-to-end latency (retrieve, rerank,
+generate) and whether the answer mentions the topic are reported.
+
+    python benchmarks/rerank.py --candidates 10 --top-n 3 --budget 400
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("RAG_INIT", "lazy")
+os.environ.setdefault("TRANSLATION_PREWARM_HISTORY", "0")
+
+# (question, topic keywords a relevant chunk or answer mentions)
+EVAL_SET = [
+    ("What are the early symptoms of type 2 diabetes?", ["diabet"]),
+    ("What should be done in dengue fever?", ["dengue"]),
+    ("How is high blood pressure treated?", ["hypertension", "blood pressure"]),
+    ("How does malaria spread?", ["malaria"]),
+    ("How can an asthma attack be prevented?", ["asthma"]),
+    ("What should I eat when I have typhoid?", ["typhoid"]),
+    ("How does tuberculosis spread?", ["tuberculosis"]),
+    ("What causes migraine headaches?", ["migraine"]),
+    ("What is anemia and how is it treated?", ["anemia", "anaemia"]),
+    ("What are the symptoms of chikungunya?", ["chikungunya"]),
+    ("How can heart disease be prevented?", ["heart", "cardiovascular"]),
+    ("How does conjunctivitis spread?", ["conjunctivitis"]),
+    ("What are the health risks of obesity?", ["obesity", "obese"]),
+    ("What are the side effects of ibuprofen?", ["ibuprofen", "nsaid"]),
+    ("How is pneumonia diagnosed?", ["pneumonia"]),
+]
+
+
+def mentions(text, keywords) -> bool:
+    text = text.lower()
+    return any(keyword in text for keyword in keywords)
+
+
+def prompt_tokens(core, question, docs) -> int:
+    from src.reranker import estimate_tokens
+
+    context = "\n\n".join(doc.page_content for doc in docs)
+    return estimate_tokens(core.SYSTEM_PROMPT.replace("{context}", context)) + estimate_tokens(question)
+
+
+def configure(core, mode, args, reranker):
+    if mode == "baseline":
+        core.reranker, core.SEARCH_K, core.CONTEXT_TOKEN_BUDGET = None, core.RETRIEVAL_K, 0
+    else:
+        core.reranker, core.SEARCH_K, core.CONTEXT_TOKEN_BUDGET = reranker, args.candidates, args.budget
+        core.RERANK_TOP_N = args.top_n
+
+
+def evaluate(core, mode, args, reranker):
+    from src.metrics import StageTimer
+
+    configure(core, mode, args, reranker)
+    tokens, precision, first_hits, latencies, answer_hits = [], [], [], [], []
+    for question, keywords in EVAL_SET:
+        timer = StageTimer()
+        start = time.perf_counter()
+        vector = core.embed_query(question, timer)
+        docs = core.select_context(vector, timer, question)
+        docs = core.finalize_context(question, docs, timer)
+
+        if not args.no_llm:
+            if docs:
+                answer = core.question_answer_chain.invoke({"input": question, "context": docs})
+            else:
+                answer = core.llm.invoke(question).content
+            latencies.append(time.perf_counter() - start)
+            answer_hits.append(mentions(answer or "", keywords))
+
+        tokens.append(prompt_tokens(core, question, docs))
+        if docs:
+            precision.append(sum(mentions(d.page_content, keywords) for d in docs) / len(docs))
+            first_hits.append(mentions(docs[0].page_content, keywords))
+
+    line = (
+        f"{mode:>8}: prompt tokens mean {statistics.mean(tokens):6.0f} "
+        f"(max {max(tokens)}), context precision "
+        f"{statistics.mean(precision or [0]) * 100:5.1f}%, "
+        f"first chunk on topic {sum(first_hits) / len(EVAL_SET) * 100:5.1f}%"
+    )
+    if latencies:
+        line += (
+            f", latency p50 {statistics.median(latencies) * 1000:.0f}ms, "
+            f"answer on topic {sum(answer_hits) / len(answer_hits) * 100:.0f}%"
+        )
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--candidates", type=int, default=10)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--budget", type=int, default=400, help="context token budget (0 = none)")
+    parser.add_argument("--no-llm", action="store_true", help="skip generation (no Gemini calls)")
+    args = parser.parse_args()
+
+    import app as core
+    from src.reranker import CrossEncoderReranker
+
+    if not core.ensure_rag():
+        sys.exit(f"RAG stack not available: {core.rag_error}")
+
+    reranker = CrossEncoderReranker(args.model)
+    start = time.perf_counter()
+    reranker.model
+    print(
+        f"{len(EVAL_SET)} questions, backend={core.VECTOR_BACKEND}, "
+        f"{args.model} loaded in {time.perf_counter() - start:.1f}s"
+    )
+    for mode in ("baseline", "rerank"):
+        evaluate(core, mode, args, reranker)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Vector upload throughput: sequential vs batched, overlapped upserts.
+
+Uploads --chunks synthetic chunks to an in-process fake Pinecone data plane
+(benchmarks/fake_vector_server.py, --delay seconds per request) through the
+real Pinecone client, with a stub embedder that costs --embed-ms per chunk.
+Runs the pipeline once with a single upsert worker (embedding and upserts
+take turns) and once with --workers, then shows resuming: a run that is cut
+off by an injected failure continues from its checkpoint.
+
+    python benchmarks/upsert.py --chunks 2000 --delay 0.2 --workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.schema import Document  # noqa: E402
+from pinecone import Pinecone  # noqa: E402
+
+from benchmarks.fake_vector_server import FakeVectorHandler, serve  # noqa: E402
+from src.upsert_pipeline import UpsertCheckpoint, upsert_in_batches  # noqa: E402
+
+DIMENSION = 384
+
+
+def make_embedder(embed_ms):
+    def embed_documents(texts):
+        time.sleep(len(texts) * embed_ms / 1000)
+        return [[0.01 * (hash(t) % 100)] * DIMENSION for t in texts]
+    return embed_documents
+
+
+def make_upsert(index):
+    def upsert(ids, vectors, chunks):
+        index.upsert(
+            vectors=[
+                {"id": cid, "values": vector, "metadata": {**chunk.metadata, "text": chunk.page_content}}
+                for cid, vector, chunk in zip(ids, vectors, chunks)
+            ]
+        )
+    return upsert
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.2, help="fake server seconds per request")
+    parser.add_argument("--embed-ms", type=float, default=0.5, help="stub embedding ms per chunk")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = serve(args.port, delay=args.delay, background=True)
+    index = Pinecone(api_key="fake").Index(host=f"http://127.0.0.1:{args.port}")
+    chunks = [
+        Document(page_content=f"chunk {i} about symptoms", metadata={"source": f"doc-{i // 50}"})
+        for i in range(args.chunks)
+    ]
+    ids = [f"id-{i}" for i in range(args.chunks)]
+    embed = make_embedder(args.embed_ms)
+    upsert = make_upsert(index)
+
+    for workers in (1, args.workers):
+        FakeVectorHandler.vectors.clear()
+        print(f"\n== {workers} upsert worker(s)")
+        upsert_in_batches(chunks, ids, embed, upsert, batch_size=args.batch_size, workers=workers)
+        print(f"   server holds {len(FakeVectorHandler.vectors)} vectors")
+
+    print("\n== interrupted run, then resume")
+    FakeVectorHandler.vectors.clear()
+    path = os.path.join(tempfile.mkdtemp(), "checkpoint.jsonl")
+    calls = {"n": 0}
+
+    def flaky_upsert(batch_ids, vectors, batch_chunks):
+        calls["n"] += 1
+        if calls["n"] > args.chunks // args.batch_size // 2:
+            raise ConnectionError("injected outage")
+        upsert(batch_ids, vectors, batch_chunks)
+
+    try:
+        upsert_in_batches(
+            chunks, ids, embed, flaky_upsert, batch_size=args.batch_size,
+            workers=args.workers, checkpoint=UpsertCheckpoint(path), retries=1,
+        )
+    except RuntimeError as e:
+        print(f"   stopped: {e}")
+    upsert_in_batches(
+        chunks, ids, embed, upsert, batch_size=args.batch_size,
+        workers=args.workers, checkpoint=UpsertCheckpoint(path),
+    )
+    print(f"   server holds {len(FakeVectorHandler.vectors)} vectors")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
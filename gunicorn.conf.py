@@ -0,0 +1,48 @@
+"""
+Gunicorn settings for the sync (Flask) serving mode.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+PRELOAD_MODEL=1 imports app.py (and loads the embedding model) once in the
+master before forking, so every worker shares the same copy-on-write model
+weights instead of loading its own copy. Workers then re-open their MongoDB
+and SQLite connections in post_fork.
+"""
+import gc
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 1))
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+
+# onnxruntime sessions are not fork-safe, so preloading only applies to the
+# torch backend; with EMBEDDING_BACKEND=onnx each worker loads the model itself.
+preload_app = (
+    os.getenv("PRELOAD_MODEL", "0") == "1"
+    and os.getenv("EMBEDDING_BACKEND", "torch") != "onnx"
+)
+if preload_app:
+    # Build the RAG stack at import, i.e. in the master, before forking
+    os.environ["RAG_INIT"] = "eager"
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the GC's reach, so collections in
+    # the workers don't write to (and un-share) the preloaded pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import app
+
+        app.after_fork()
+
+
+def worker_exit(server, worker):
+    # Write out chat messages still queued in the history writer
+    core = sys.modules.get("app")
+    if core is not None and core.history_writer is not None:
+        core.history_writer.close()
@@ -0,0 +1,71 @@
+import argparse
+import os
+import time
+
+from dotenv import load_dotenv
+import pymongo
+
+from src import conversations as conversation_summaries
+from src import history as message_pages
+
+
+# =================================================================
+# 1. CONFIG & ENVIRONMENT
+# =================================================================
+load_dotenv()
+
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
+DB_NAME = "medical_chatbot"
+HISTORY_SCHEMA = os.getenv("HISTORY_SCHEMA", "messages")  # messages | buckets
+HISTORY_BUCKET_SIZE = int(os.getenv("HISTORY_BUCKET_SIZE", message_pages.BUCKET_SIZE))
+
+
+# =================================================================
+# 2. MIGRATIONS
+# =================================================================
+def backfill_conversations(db):
+    """Build the `conversations` summaries from existing chat history"""
+    if HISTORY_SCHEMA == "buckets":
+        source, stages = db["chat_history_buckets"], message_pages.UNWIND_BUCKETS
+    else:
+        source, stages = db["chat_history"], []
+    print(f"Backfilling conversation summaries from {source.name}...")
+    start = time.perf_counter()
+    written = conversation_summaries.backfill(source, db["conversations"], source_stages=stages)
+    print(f"SUCCESS: {written} conversations written in {time.perf_counter() - start:.1f}s")
+
+
+def migrate_buckets(db):
+    """Copy chat_history into chat_history_buckets (then set HISTORY_SCHEMA=buckets)"""
+    print(f"Bucketing chat_history ({HISTORY_BUCKET_SIZE} messages per bucket)...")
+    start = time.perf_counter()
+    messages, buckets = message_pages.migrate_to_buckets(
+        db["chat_history"], db["chat_history_buckets"], bucket_size=HISTORY_BUCKET_SIZE
+    )
+    print(
+        f"SUCCESS: {messages} messages in {buckets} buckets "
+        f"in {time.perf_counter() - start:.1f}s (chat_history left in place)"
+    )
+
+
+MIGRATIONS = {
+    "conversations": backfill_conversations,
+    "buckets": migrate_buckets,
+}
+
+
+# =================================================================
+# 3. MAIN EXECUTION
+# =================================================================
+def main():
+    parser = argparse.ArgumentParser(description="One-off MongoDB data migrations")
+    parser.add_argument("migration", choices=sorted(MIGRATIONS))
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient(MONGO_URL, serverSelectionTimeoutMS=5000)
+    client.admin.command("ismaster")
+    MIGRATIONS[args.migration](client[DB_NAME])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+# src/answer_cache.py
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+import numpy as np
+from pymongo.errors import OperationFailure
+
+from src import metrics
+
+# Rough per-entry bookkeeping overhead (dict/key/timestamps) in bytes
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def _normalize(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+def _entry_size(vector: np.ndarray, answer: str) -> int:
+    return vector.nbytes + len(answer.encode("utf-8")) + ENTRY_OVERHEAD_BYTES
+
+
+def _as_utc(value: datetime) -> datetime:
+    # pymongo returns naive UTC datetimes unless the client is tz_aware
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+# =================================================================
+# BACKENDS
+# =================================================================
+class InMemoryCacheBackend:
+    """
+    Per-process cache: LRU order + TTL + byte cap.
+    Vectors of one language are stacked into a matrix so a lookup is a
+    single dot product instead of a Python loop. A second index keeps
+    entries in creation order, so expiry only looks at the oldest ones.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: int):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()  # LRU order
+        self._created: "OrderedDict[int, float]" = OrderedDict()  # creation order
+        self._matrices = {}  # lang -> (ids, matrix), rebuilt lazily
+        self._next_id = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def _drop(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        self._created.pop(entry_id, None)
+        self._bytes -= entry["size"]
+        self._matrices.pop(entry["lang"], None)
+
+    def _expire(self, now: float):
+        expired = 0
+        while self._created:
+            eid, created = next(iter(self._created.items()))
+            if now - created <= self.ttl_seconds:
+                break
+            self._drop(eid)
+            expired += 1
+        return expired
+
+    def _matrix(self, lang: str) -> Tuple[List[int], Optional[np.ndarray]]:
+        if lang not in self._matrices:
+            ids = [eid for eid, e in self._entries.items() if e["lang"] == lang]
+            matrix = (
+                np.vstack([self._entries[eid]["vector"] for eid in ids])
+                if ids else None
+            )
+            self._matrices[lang] = (ids, matrix)
+        return self._matrices[lang]
+
+    def nearest(
+        self, vector: np.ndarray, lang: str, threshold: float = 0.0
+    ) -> Tuple[Optional[str], float]:
+        with self._lock:
+            evicted = self._expire(time.time())
+            if evicted:
+                metrics.counter("answer_cache_evictions_total").inc(evicted)
+
+            ids, matrix = self._matrix(lang)
+            if matrix is None:
+                return None, 0.0
+
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < threshold:
+                return None, score  # a miss does not refresh recency
+            entry_id = ids[best]
+            self._entries.move_to_end(entry_id)  # LRU touch
+            return self._entries[entry_id]["answer"], score
+
+    def put(self, vector: np.ndarray, lang: str, answer: str):
+        size = _entry_size(vector, answer)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            evicted = 0
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._drop(next(iter(self._entries)))  # least recently used
+                evicted += 1
+            if evicted:
+                metrics.counter("answer_cache_evictions_total").inc(evicted)
+
+            created = time.time()
+            self._entries[self._next_id] = {
+                "vector": vector,
+                "lang": lang,
+                "answer": answer,
+                "created": created,
+                "size": size,
+            }
+            self._created[self._next_id] = created
+            self._next_id += 1
+            self._bytes += size
+            self._matrices.pop(lang, None)
+
+
+class MongoCacheBackend:
+    """
+    Shared cache for all gunicorn workers, stored in a MongoDB collection.
+    TTL is enforced by a TTL index; the byte cap evicts least recently hit.
+
+    Each worker keeps the embeddings of every language in a local matrix,
+    topped up on each lookup with only the rows created since the last one,
+    so a lookup is one indexed query (usually empty) plus a dot product;
+    the answer is fetched only on a hit. The cache size is a running
+    counter, recomputed from the collection every SIZE_RESYNC_SECONDS to
+    pick up other workers' inserts and TTL deletions.
+    """
+
+    SIZE_RESYNC_SECONDS = 60
+    # Re-read rows created this long before the newest one seen, so a row
+    # another worker inserted with a slightly older timestamp is not missed
+    SYNC_OVERLAP = timedelta(seconds=5)
+
+    def __init__(self, collection, max_bytes: int, ttl_seconds: int):
+        self.collection = collection
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._rows = {}  # lang -> {"ids", "created", "matrix", "synced"}
+        self._bytes = 0
+        self._bytes_synced = 0.0
+        self._lock = threading.Lock()
+
+        try:
+            self._ensure_indexes()
+        except Exception as e:
+            # Lookups filter expired rows themselves; the TTL index only cleans up
+            print("[answer_cache] index setup failed:", e)
+
+    def _ensure_indexes(self):
+        try:
+            self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+        except OperationFailure:
+            # IndexOptionsConflict: ANSWER_CACHE_TTL changed since the index was built
+            try:
+                self.collection.database.command(
+                    {
+                        "collMod": self.collection.name,
+                        "index": {
+                            "keyPattern": {"created_at": 1},
+                            "expireAfterSeconds": self.ttl_seconds,
+                        },
+                    }
+                )
+            except Exception:
+                self.collection.drop_index("created_at_1")
+                self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+            print(f"[answer_cache] TTL index updated to {self.ttl_seconds}s")
+        self.collection.create_index([("lang", 1), ("created_at", 1)])
+        self.collection.create_index("last_hit")
+
+    @property
+    def size_bytes(self) -> int:
+        if time.time() - self._bytes_synced > self.SIZE_RESYNC_SECONDS:
+            result = list(
+                self.collection.aggregate(
+                    [{"$group": {"_id": None, "bytes": {"$sum": "$size"}}}]
+                )
+            )
+            self._bytes = result[0]["bytes"] if result else 0
+            self._bytes_synced = time.time()
+        return self._bytes
+
+    def _sync(self, lang: str, cutoff: datetime) -> dict:
+        """Drop expired rows of lang from the local matrix and append new ones."""
+        rows = self._rows.get(lang)
+        if rows is None:
+            rows = self._rows[lang] = {
+                "ids": [], "created": np.zeros(0), "matrix": None, "synced": cutoff,
+            }
+
+        expired = rows["created"] < cutoff.timestamp()
+        if expired.any():
+            self._keep(rows, np.flatnonzero(~expired))
+
+        since = max(cutoff, rows["synced"] - self.SYNC_OVERLAP)
+        known = set(rows["ids"])
+        new = [
+            d for d in self.collection.find(
+                {"lang": lang, "created_at": {"$gte": since}},
+                {"embedding": 1, "created_at": 1},
+            ).sort("created_at", 1)
+            if d["_id"] not in known
+        ]
+        if new:
+            vectors = np.asarray([d["embedding"] for d in new], dtype=np.float32)
+            created = [_as_utc(d["created_at"]) for d in new]
+            rows["matrix"] = vectors if rows["matrix"] is None else np.vstack([rows["matrix"], vectors])
+            rows["ids"].extend(d["_id"] for d in new)
+            rows["created"] = np.concatenate([rows["created"], [c.timestamp() for c in created]])
+            rows["synced"] = max(rows["synced"], created[-1])
+        return rows
+
+    @staticmethod
+    def _keep(rows: dict, keep):
+        rows["ids"] = [rows["ids"][i] for i in keep]
+        rows["created"] = rows["created"][keep]
+        rows["matrix"] = rows["matrix"][keep] if len(keep) else None
+
+    def _forget(self, ids: set):
+        with self._lock:
+            for rows in self._rows.values():
+                keep = [i for i, eid in enumerate(rows["ids"]) if eid not in ids]
+                if len(keep) < len(rows["ids"]):
+                    self._keep(rows, np.asarray(keep, dtype=int))
+
+    def nearest(
+        self, vector: np.ndarray, lang: str, threshold: float = 0.0
+    ) -> Tuple[Optional[str], float]:
+        # The TTL monitor runs once a minute, so filter stale rows explicitly
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        with self._lock:
+            rows = self._sync(lang, cutoff)
+            if rows["matrix"] is None:
+                return None, 0.0
+            scores = rows["matrix"] @ vector
+            best = int(np.argmax(scores))
+            best_id, score = rows["ids"][best], float(scores[best])
+
+        if score < threshold:
+            return None, score  # a miss leaves last_hit alone
+
+        hit = self.collection.find_one_and_update(
+            {"_id": best_id},
+            {"$set": {"last_hit": datetime.now(timezone.utc)}},
+            projection={"answer": 1},
+        )
+        if hit is None:
+            self._forget({best_id})  # evicted by another worker since it was synced
+            return None, 0.0
+        return hit["answer"], score
+
+    def put(self, vector: np.ndarray, lang: str, answer: str):
+        size = _entry_size(vector, answer)
+        if size > self.max_bytes:
+            return
+
+        self.size_bytes  # resync the running counter if it is due
+        now = datetime.now(timezone.utc)
+        self.collection.insert_one(
+            {
+                "lang": lang,
+                "embedding": vector.tolist(),
+                "answer": answer,
+                "size": size,
+                "created_at": now,
+                "last_hit": now,
+            }
+        )
+        self._bytes += size
+        overflow = self._bytes - self.max_bytes
+        if overflow <= 0:
+            return
+
+        evicted = set()
+        for doc in self.collection.find({}, {"size": 1}).sort("last_hit", 1):
+            if overflow <= 0:
+                break
+            if self.collection.delete_one({"_id": doc["_id"]}).deleted_count:
+                self._bytes -= doc["size"]
+                overflow -= doc["size"]
+                evicted.add(doc["_id"])
+        self._forget(evicted)
+        metrics.counter("answer_cache_evictions_total").inc(len(evicted))
+
+
+# =================================================================
+# SEMANTIC CACHE
+# =================================================================
+class SemanticAnswerCache:
+    """
+    Returns a previously generated answer when a new query embedding is
+    close enough (cosine >= threshold) to a cached one in the same language.
+    """
+
+    def __init__(self, backend, threshold: float = 0.95):
+        self.backend = backend
+        self.threshold = threshold
+        self.hits = metrics.counter("answer_cache_hits_total", "semantic cache hits")
+        self.misses = metrics.counter(
+            "answer_cache_misses_total", "semantic cache misses"
+        )
+        metrics.gauge(
+            "answer_cache_bytes", "approximate cache size",
+            fn=lambda: self.backend.size_bytes,
+        )
+
+    def get(self, query_vector, lang: str) -> Optional[str]:
+        try:
+            answer, score = self.backend.nearest(_normalize(query_vector), lang, self.threshold)
+        except Exception as e:
+            print("[answer_cache] lookup failed:", e)
+            answer, score = None, 0.0
+
+        if answer is not None and score >= self.threshold:
+            self.hits.inc()
+            print(f"[answer_cache] HIT (cosine={score:.3f})")
+            return answer
+
+        self.misses.inc()
+        return None
+
+    def put(self, query_vector, lang: str, answer: str):
+        if not answer:
+            return
+        try:
+            self.backend.put(_normalize(query_vector), lang, answer)
+        except Exception as e:
+            print("[answer_cache] store failed:", e)
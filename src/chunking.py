@@ -0,0 +1,284 @@
+# src/chunking.py
+import re
+import zlib
+from collections import Counter
+from itertools import groupby
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+# Headings medical PDFs use without any markup ("Signs and Symptoms", "TREATMENT:")
+MEDICAL_HEADINGS = re.compile(
+    r"^(\d+(\.\d+)*\.?\s+)?("
+    r"overview|introduction|summary|definition|signs?( and symptoms)?|symptoms?|causes?|"
+    r"a?etiology|risk factors|pathophysiology|mechanism|diagnosis|tests?|screening|"
+    r"treatments?|management|therapy|medications?|drugs?|dosage|side effects|"
+    r"adverse effects|prevention|complications|prognosis|outlook|epidemiology|"
+    r"history|when to see a doctor|self[- ]care|home remedies|diet"
+    r")\b",
+    re.IGNORECASE,
+)
+WIKI_HEADING = re.compile(r"^(={2,6})\s*(.+?)\s*\1$")
+# Wikipedia tail sections: link lists and citations, no medical content
+SKIP_SECTIONS = {"see also", "references", "external links", "further reading", "notes", "bibliography"}
+SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]?\s+(?=[\"'(\[]?[A-Z0-9])")
+# Words Title Case headings leave lowercase ("Signs and Symptoms")
+MINOR_WORDS = {"a", "an", "and", "as", "at", "by", "for", "in", "of", "on", "or", "the", "to", "with"}
+ABBREVIATIONS = ("e.g.", "i.e.", "dr.", "mr.", "mrs.", "ms.", "vs.", "etc.", "fig.", "approx.", "no.", "st.")
+
+
+# ================================================================
+# SECTION- AND SENTENCE-AWARE CHUNKING
+# ================================================================
+def heading_level(line: str, prev: str = "", following: str = "") -> Optional[Tuple[int, str]]:
+    """
+    (level, title) if the line looks like a section heading, else None.
+    `prev` and `following` are the neighbouring lines of the same paragraph
+    ("" at a paragraph break). A line starting with a heading word only
+    counts if it is Title Case, ALL CAPS or ends in a colon, or stands on
+    its own: after a paragraph or sentence end and not continued by a
+    lowercase line. Wrapped prose ("Treatment of the patient with") stays.
+    Other ALL CAPS lines must stand on their own and not be followed by
+    another caps line, so acronyms in prose and table rows ("HIV AIDS")
+    don't open sections.
+    """
+    match = WIKI_HEADING.match(line)
+    if match:
+        return len(match.group(1)) - 1, match.group(2)
+
+    if not 3 <= len(line) <= 60 or line[-1] in ".,;!?" or sum(c.isalpha() for c in line) < 3:
+        return None
+    title = line.rstrip(":").strip()
+    if len(title.split()) > 6:
+        return None
+    # On its own: after a paragraph or sentence end, not continued in lowercase
+    stands_alone = (not prev or prev[-1] in ".!?:") and not (following and following[0].islower())
+    if title.isupper() and sum(c.isalpha() for c in title) >= 4:
+        # Acronym lines and table rows ("HIV AIDS", "NSAID") are caps too
+        if MEDICAL_HEADINGS.match(title) or (stands_alone and not following.isupper()):
+            return 1, title.title()
+        return None
+    if MEDICAL_HEADINGS.match(title) and (line.endswith(":") or _title_case(title) or stands_alone):
+        return 1, title
+    return None
+
+
+def _title_case(title: str) -> bool:
+    words = [w for w in re.sub(r"^[\d.]+\s*", "", title).split() if w[0].isalpha()]
+    return bool(words) and words[0][0].isupper() and all(
+        w[0].isupper() or w.lower() in MINOR_WORDS for w in words[1:]
+    )
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences, current = [], ""
+    for part in SENTENCE_END.split(text):
+        current = f"{current} {part}" if current else part
+        if not current.lower().endswith(ABBREVIATIONS):
+            sentences.append(current.strip())
+            current = ""
+    if current.strip():
+        sentences.append(current.strip())
+    return [s for s in sentences if s]
+
+
+def repeated_lines(pages: List[Document], min_pages: int = 3, share: float = 0.5) -> set:
+    """
+    Short lines that occur on at least `share` of a PDF's pages (and on
+    `min_pages` or more): running headers, footers, page furniture.
+    """
+    if len(pages) < min_pages:
+        return set()
+    counts = Counter()
+    for page in pages:
+        counts.update({
+            _normalize_line(line) for line in page.page_content.splitlines()
+            if 0 < len(line.strip()) <= 80
+        })
+    limit = max(min_pages, share * len(pages))
+    return {line for line, n in counts.items() if n >= limit}
+
+
+def _normalize_line(line: str) -> str:
+    # Page numbers differ from page to page; fold them so the footer still matches
+    return re.sub(r"\d+", "#", " ".join(line.split()).lower())
+
+
+class SectionChunker:
+    """
+    Splits documents on section headings (Wikipedia "== Symptoms ==" markup,
+    or short heading-like lines in PDFs), then packs whole sentences into
+    chunks of up to chunk_size characters, never crossing a section. Each
+    chunk gets metadata["section"], e.g. "Signs and symptoms > Fever".
+    Wikipedia's reference and link-list sections are left out.
+
+    Pages of one source are chunked together, so sentences and sections
+    continue across page breaks and lines repeated on most pages (running
+    headers and footers) are dropped first.
+    """
+
+    def __init__(self, chunk_size: int = 500, overlap_sentences: int = 0, min_chunk_chars: int = 40):
+        self.chunk_size = chunk_size
+        self.overlap_sentences = overlap_sentences
+        self.min_chunk_chars = min_chunk_chars
+
+    def split_documents(self, docs: Iterable[Document]) -> Iterator[Document]:
+        """Chunk a stream of pages; consecutive pages of one source form one document."""
+        for source, pages in groupby(docs, key=lambda d: d.metadata.get("source", "unknown")):
+            pages = list(pages)
+            boilerplate = repeated_lines(pages)
+            lines = [
+                line for page in pages for line in page.page_content.splitlines()
+                if _normalize_line(line) not in boilerplate
+            ]
+            yield from self._split_lines(lines, pages[0].metadata)
+
+    def _split_lines(self, lines: List[str], metadata: dict) -> Iterator[Document]:
+        path: List[Tuple[int, str]] = []
+        paragraph: List[str] = []
+        sentences: List[str] = []
+
+        def flush_paragraph():
+            if paragraph:
+                sentences.extend(split_sentences(" ".join(paragraph)))
+                paragraph.clear()
+
+        lines = [raw.strip() for raw in lines]
+        for i, line in enumerate(lines):
+            following = lines[i + 1] if i + 1 < len(lines) else ""
+            heading = heading_level(line, paragraph[-1] if paragraph else "", following) if line else None
+            if heading:
+                flush_paragraph()
+                yield from self._pack(sentences, path, metadata)
+                sentences.clear()
+                level, title = heading
+                path = [(lvl, t) for lvl, t in path if lvl < level] + [(level, title)]
+            elif line:
+                paragraph.append(line)
+            else:
+                flush_paragraph()
+        flush_paragraph()
+        yield from self._pack(sentences, path, metadata)
+
+    def _pack(self, sentences: List[str], path, metadata: dict) -> Iterator[Document]:
+        if any(title.lower() in SKIP_SECTIONS for _, title in path):
+            return
+        section = " > ".join(title for _, title in path)
+        chunk_meta = {**metadata, "section": section} if section else dict(metadata)
+
+        texts: List[str] = []
+        current: List[str] = []
+        size = 0
+        for sentence in self._fit(sentences):
+            if current and size + 1 + len(sentence) > self.chunk_size:
+                texts.append(" ".join(current))
+                current = current[-self.overlap_sentences:] if self.overlap_sentences else []
+                size = sum(len(s) + 1 for s in current)
+            current.append(sentence)
+            size += len(sentence) + 1
+        if current:
+            texts.append(" ".join(current))
+
+        # A short tail (the last sentence of a section) rides with the chunk before it
+        if len(texts) > 1 and len(texts[-1]) < self.min_chunk_chars:
+            texts[-2:] = [f"{texts[-2]} {texts[-1]}"]
+        for text in texts:
+            yield Document(page_content=text, metadata=dict(chunk_meta))
+
+    def _fit(self, sentences: List[str]) -> Iterator[str]:
+        """Sentences longer than a chunk (tables, run-on PDF text) are cut at word boundaries."""
+        for sentence in sentences:
+            while len(sentence) > self.chunk_size:
+                cut = sentence.rfind(" ", 0, self.chunk_size)
+                cut = cut if cut > 0 else self.chunk_size
+                yield sentence[:cut]
+                sentence = sentence[cut:].strip()
+            if sentence:
+                yield sentence
+
+
+# ================================================================
+# NEAR-DUPLICATE ELIMINATION (MINHASH + LSH)
+# ================================================================
+_PRIME = (1 << 61) - 1
+
+
+class NearDuplicateFilter:
+    """
+    Drops chunks whose word 5-gram set is at least `threshold` Jaccard-similar
+    to a chunk already kept (boilerplate, mirrored paragraphs, the same
+    article under two topics). MinHash signatures are banded into LSH
+    buckets so each chunk is only compared with its likely duplicates; the
+    candidates are then checked with the exact Jaccard similarity.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                 shingle_words: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_words = shingle_words
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 31 - 1, num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31 - 1, num_perm).astype(np.uint64)
+        self._buckets = {}
+        self._kept: List[frozenset] = []
+
+        self.seen = self.dropped = 0
+        self.chars_seen = self.chars_dropped = 0
+
+    def shingles(self, text: str) -> frozenset:
+        words = re.findall(r"\w+", text.lower())
+        n = self.shingle_words
+        if len(words) <= n:
+            return frozenset([zlib.crc32(" ".join(words).encode("utf-8"))])
+        return frozenset(
+            zlib.crc32(" ".join(words[i:i + n]).encode("utf-8")) for i in range(len(words) - n + 1)
+        )
+
+    def signature(self, shingles: frozenset) -> np.ndarray:
+        x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        return ((np.outer(x, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def is_duplicate(self, text: str) -> bool:
+        """True if text nearly duplicates an earlier text; otherwise remembers it."""
+        shingles = self.shingles(text)
+        signature = self.signature(shingles)
+        keys = [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+        candidates = {i for key in keys for i in self._buckets.get(key, ())}
+        for i in candidates:
+            other = self._kept[i]
+            if len(shingles & other) >= self.threshold * len(shingles | other):
+                return True
+
+        index = len(self._kept)
+        self._kept.append(shingles)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(index)
+        return False
+
+    def filter(self, chunks: Iterable[Document]) -> Iterator[Document]:
+        for chunk in chunks:
+            self.seen += 1
+            self.chars_seen += len(chunk.page_content)
+            if self.is_duplicate(chunk.page_content):
+                self.dropped += 1
+                self.chars_dropped += len(chunk.page_content)
+                continue
+            yield chunk
+
+    def report(self):
+        if not self.seen:
+            return
+        print(
+            f"Near-duplicates: dropped {self.dropped}/{self.seen} chunks "
+            f"({self.dropped / self.seen * 100:.1f}% fewer vectors, "
+            f"{self.chars_dropped / max(self.chars_seen, 1) * 100:.1f}% fewer characters to embed)"
+        )
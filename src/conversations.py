@@ -0,0 +1,172 @@
+# src/conversations.py
+"""
+Materialized conversation summaries (the `conversations` collection).
+
+One document per (user_id, conversation_id) with title, created_at,
+updated_at and message_count, kept up to date as messages are written, so
+the sidebar reads a handful of indexed documents instead of aggregating a
+user's whole chat history. The query/update builders are shared by the
+sync app (pymongo) and the async app (Motor).
+"""
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+TITLE_LENGTH = 40
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Newest conversation first; conversation_id breaks ties between equal timestamps
+PAGE_SORT = [("created_at", -1), ("conversation_id", -1)]
+SUMMARY_PROJECTION = {
+    "_id": 0, "conversation_id": 1, "title": 1, "created_at": 1,
+    "updated_at": 1, "message_count": 1,
+}
+
+
+def ensure_indexes(collection):
+    collection.create_index([("user_id", 1), ("conversation_id", 1)], unique=True)
+    collection.create_index([("user_id", 1), ("created_at", -1), ("conversation_id", -1)])
+
+
+def summary_update(user_id: str, conversation_id: str, role: str, message: str, timestamp):
+    """
+    (filter, update, upsert) for one written message. A conversation starts
+    with a user message, which creates the summary and fixes its title.
+    """
+    query = {"user_id": user_id, "conversation_id": conversation_id}
+    update = {"$set": {"updated_at": timestamp}, "$inc": {"message_count": 1}}
+    if role == "user":
+        update["$setOnInsert"] = {
+            "title": (message or "")[:TITLE_LENGTH],
+            "created_at": timestamp,
+        }
+        return query, update, True
+    return query, update, False
+
+
+# ================================================================
+# CURSOR PAGINATION
+# ================================================================
+def page_size(value) -> int:
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+def encode_cursor(doc) -> str:
+    created = doc["created_at"]
+    if created.tzinfo is None:  # pymongo returns naive UTC datetimes
+        created = created.replace(tzinfo=timezone.utc)
+    return f"{int(created.timestamp() * 1000)}_{doc['conversation_id']}"
+
+
+def page_filter(user_id: str, cursor: Optional[str] = None) -> dict:
+    """Filter for the page after `cursor` (as returned in next_cursor)."""
+    query = {"user_id": user_id}
+    if not cursor:
+        return query
+    try:
+        millis, conversation_id = cursor.split("_", 1)
+        created = datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc)
+    except ValueError:
+        raise ValueError("invalid cursor")
+    query["$or"] = [
+        {"created_at": {"$lt": created}},
+        {"created_at": created, "conversation_id": {"$lt": conversation_id}},
+    ]
+    return query
+
+
+def to_page(docs: List[dict], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """
+    Shape up to limit + 1 fetched summaries for the API: the extra document
+    only tells whether there is a next page.
+    """
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    items = [
+        {
+            "id": doc["conversation_id"],
+            "title": doc.get("title", ""),
+            "timestamp": doc["created_at"],
+            "updated_at": doc.get("updated_at"),
+            "message_count": doc.get("message_count", 0),
+        }
+        for doc in docs
+    ]
+    next_cursor = encode_cursor(docs[-1]) if has_more and docs else None
+    return items, next_cursor
+
+
+# ================================================================
+# BACKFILL
+# ================================================================
+def backfill(history_collection, conversations_collection, batch_size: int = 1000,
+             source_stages=()) -> int:
+    """
+    Rebuild every summary from chat_history (idempotent; safe to re-run).
+    source_stages unwind other schemas (history.UNWIND_BUCKETS) into one
+    document per message. Returns the number of conversations written.
+    """
+    ensure_indexes(conversations_collection)
+
+    # Pass 1: message count and last activity over all messages
+    stats = {}
+    for group in history_collection.aggregate(
+        list(source_stages) + [
+            {
+                "$group": {
+                    "_id": {"user_id": "$user_id", "conversation_id": "$conversation_id"},
+                    "updated_at": {"$max": "$timestamp"},
+                    "message_count": {"$sum": 1},
+                }
+            }
+        ],
+        allowDiskUse=True,
+    ):
+        stats[(group["_id"]["user_id"], group["_id"]["conversation_id"])] = group
+
+    # Pass 2: title and start time from the first user message (as the old
+    # /conversations aggregation did; conversations without one are not listed)
+    pipeline = list(source_stages) + [
+        {"$match": {"role": "user"}},
+        {"$sort": {"timestamp": 1}},
+        {
+            "$group": {
+                "_id": {"user_id": "$user_id", "conversation_id": "$conversation_id"},
+                "title": {"$first": "$message"},
+                "created_at": {"$first": "$timestamp"},
+            }
+        },
+    ]
+
+    written = 0
+    ops = []
+    for group in history_collection.aggregate(pipeline, allowDiskUse=True):
+        key = (group["_id"]["user_id"], group["_id"]["conversation_id"])
+        counts = stats.get(key, {})
+        ops.append(
+            UpdateOne(
+                {"user_id": key[0], "conversation_id": key[1]},
+                {
+                    "$set": {
+                        "title": (group["title"] or "")[:TITLE_LENGTH],
+                        "created_at": group["created_at"],
+                        "updated_at": counts.get("updated_at", group["created_at"]),
+                        "message_count": counts.get("message_count", 1),
+                    }
+                },
+                upsert=True,
+            )
+        )
+        if len(ops) >= batch_size:
+            conversations_collection.bulk_write(ops, ordered=False)
+            written += len(ops)
+            ops = []
+    if ops:
+        conversations_collection.bulk_write(ops, ordered=False)
+        written += len(ops)
+    return written
@@ -0,0 +1,113 @@
+# src/embedding_batcher.py
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from src import metrics
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+WAIT_BUCKETS_MS = [0.5, 1, 2, 5, 10, 25, 50, 100]
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Cross-request micro-batching in front of an embedding model.
+
+    embed_query() puts the text on a queue and returns when its vector is
+    ready. One worker thread takes the first queued text, keeps collecting
+    until max_batch texts are queued or max_wait_ms has passed, and encodes
+    them with a single embed_documents() call. Concurrent /get requests thus
+    share one forward pass instead of encoding one sentence each.
+    """
+
+    def __init__(self, inner: Embeddings, max_batch: int = 16, max_wait_ms: float = 5.0):
+        self.inner = inner
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+
+        metrics.gauge(
+            "embed_queue_depth", "texts waiting for the embedding batcher",
+            fn=lambda: self._queue.qsize(),
+        )
+        self._batch_size = metrics.histogram(
+            "embed_batch_size", BATCH_SIZE_BUCKETS, "texts per embedding forward pass"
+        )
+        self._wait_ms = metrics.histogram(
+            "embed_queue_wait_ms", WAIT_BUCKETS_MS, "time a query waited for its batch"
+        )
+
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        # Threads do not survive fork: a worker forked from a preloaded
+        # master (gunicorn --preload) starts its own queue and thread.
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            threading.Thread(target=self._run, name="embed-batcher", daemon=True).start()
+            self._pid = os.getpid()
+
+    # ================================================================
+    # PUBLIC API
+    # ================================================================
+    def submit(self, text: str) -> Future:
+        """Queue one text; the future resolves to its vector."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Bulk calls (indexing) are already batched; bypass the queue
+        return self.inner.embed_documents(texts)
+
+    # ================================================================
+    # WORKER
+    # ================================================================
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                self._wait_ms.observe((started - queued_at) * 1000)
+            self._batch_size.observe(len(batch))
+
+            try:
+                vectors = self.inner.embed_documents([text for text, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
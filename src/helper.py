@@ -1,10 +1,14 @@
 from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader, WikipediaLoader, PubMedLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from typing import List
+from typing import Iterable, Iterator, List, Optional
+from concurrent.futures import ProcessPoolExecutor
 from langchain.schema import Document
 from deep_translator import GoogleTranslator
 from langdetect import detect
+from src.onnx_embeddings import OnnxEmbeddings
+import glob
+import hashlib
 import os
 
 
@@ -26,6 +30,53 @@ def load_pdf_file(data: str) -> List[Document]:
     return documents
 
 
+def _load_single_pdf(path: str) -> List[Document]:
+    """Parse one PDF into page Documents (top-level so worker processes can pickle it)."""
+    try:
+        return PyPDFLoader(path).load()
+    except Exception as e:
+        print(f"PDF load failed for '{path}': {e}")
+        return []
+
+
+def iter_pdf_pages(data: str, max_workers: Optional[int] = None) -> Iterator[Document]:
+    """
+    Parse every PDF in a directory exactly once, in parallel worker processes,
+    yielding pages file by file in path order, whichever worker finishes first, so
+    dedupe_pages() keeps the same copy of a repeated page on every run and
+    the content-hashed chunk IDs stay stable.
+    """
+    paths = sorted(glob.glob(os.path.join(data, "*.pdf")))
+    if not paths:
+        return
+    if len(paths) == 1 or max_workers == 1:
+        for path in paths:
+            yield from _load_single_pdf(path)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_load_single_pdf, path) for path in paths]
+        for future in futures:
+            yield from future.result()
+
+
+def dedupe_pages(docs: Iterable[Document]) -> Iterator[Document]:
+    """
+    Drop empty pages and exact duplicates (same whitespace-normalized text),
+    e.g. the same PDF copied twice or repeated cover/licence pages.
+    """
+    seen = set()
+    for doc in docs:
+        text = " ".join(doc.page_content.split())
+        if not text:
+            continue
+        key = hashlib.sha1(text.encode("utf-8")).digest()
+        if key in seen:
+            continue
+        seen.add(key)
+        yield doc
+
+
 def load_pubmed_data(query: str = "diabetes mellitus", max_results: int = 5) -> List[Document]:
     """
     Load research abstracts from PubMed.
@@ -108,6 +159,15 @@ def filter_to_minimal_docs(docs: List[Document]) -> List[Document]:
     return minimal_docs
 
 
+def iter_minimal_docs(docs: Iterable[Document]) -> Iterator[Document]:
+    """Streaming version of filter_to_minimal_docs()."""
+    for doc in docs:
+        yield Document(
+            page_content=doc.page_content,
+            metadata={"source": doc.metadata.get("source", "unknown")}
+        )
+
+
 def text_split(extracted_data: List[Document]) -> List[Document]:
     """
     Split documents into smaller chunks for better retrieval performance.
@@ -121,12 +181,32 @@ def text_split(extracted_data: List[Document]) -> List[Document]:
     return text_chunks
 
 
+def iter_text_chunks(docs: Iterable[Document]) -> Iterator[Document]:
+    """
+    Streaming version of text_split(): split one document at a time so pages
+    flow into the splitter as they are parsed instead of via one big list.
+    """
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=500,
+        chunk_overlap=20
+    )
+    for doc in docs:
+        yield from text_splitter.split_documents([doc])
+
+
 def download_hugging_face_embeddings():
     """
     Load a lightweight multilingual embedding model.
     Model: paraphrase-multilingual-MiniLM-L12-v2
     Supports 50+ languages and performs well on semantic similarity.
+    With EMBEDDING_BACKEND=onnx the int8 ONNX export is used instead.
     """
+    if os.getenv("EMBEDDING_BACKEND", "torch") == "onnx":
+        return OnnxEmbeddings(
+            os.getenv("ONNX_MODEL_DIR", "models/minilm-int8"),
+            threads=int(os.getenv("EMBEDDING_THREADS", 0)) or None,
+            batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", 32)),
+        )
     embeddings = HuggingFaceEmbeddings(
         model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
     )
@@ -0,0 +1,317 @@
+# src/history.py
+"""
+Paged reads of one conversation's messages (chat_history).
+
+Pages run newest first and are keyed by a (timestamp, _id) cursor, so a
+long chat is sent a page at a time and older pages stay stable while new
+messages are appended. `since` mode returns only messages newer than a
+cursor the client already has. Shared by app.py (pymongo) and asgi.py
+(Motor).
+"""
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Fields a client may ask for with ?fields=; the default returns all of them
+MESSAGE_FIELDS = ("role", "message", "lang", "timestamp")
+
+NEWEST_FIRST = [("timestamp", -1), ("_id", -1)]
+OLDEST_FIRST = [("timestamp", 1), ("_id", 1)]
+
+
+def ensure_indexes(collection):
+    # Serves both the page queries and the full-conversation delete
+    collection.create_index(
+        [("user_id", 1), ("conversation_id", 1), ("timestamp", -1), ("_id", -1)]
+    )
+
+
+def page_size(value) -> int:
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+def select_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Fields named in ?fields=role,message (unknown names are ignored)."""
+    wanted = tuple(f for f in (fields or "").split(",") if f in MESSAGE_FIELDS)
+    return wanted or MESSAGE_FIELDS
+
+
+def projection(selected: Tuple[str, ...]) -> dict:
+    proj = {field: 1 for field in selected}
+    proj["timestamp"] = 1  # _id and timestamp are always needed for the cursor
+    return proj
+
+
+# ================================================================
+# CURSORS
+# ================================================================
+def encode_cursor(doc) -> str:
+    ts = doc["timestamp"]
+    if ts.tzinfo is None:  # pymongo returns naive UTC datetimes
+        ts = ts.replace(tzinfo=timezone.utc)
+    return f"{int(ts.timestamp() * 1000)}_{doc['_id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        millis, oid = cursor.split("_", 1)
+        return datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc), ObjectId(oid)
+    except (ValueError, InvalidId):
+        raise ValueError("invalid cursor")
+
+
+def page_query(user_id: str, conversation_id: str, before: Optional[str] = None,
+               since: Optional[str] = None) -> Tuple[dict, list]:
+    """
+    (filter, sort) for one page: the newest messages, the page older than
+    `before`, or the messages newer than `since`. Raises ValueError on a
+    malformed cursor.
+    """
+    query = {"user_id": user_id, "conversation_id": conversation_id}
+    if since:
+        ts, oid = decode_cursor(since)
+        query["$or"] = [{"timestamp": {"$gt": ts}}, {"timestamp": ts, "_id": {"$gt": oid}}]
+        return query, OLDEST_FIRST
+    if before:
+        ts, oid = decode_cursor(before)
+        query["$or"] = [{"timestamp": {"$lt": ts}}, {"timestamp": ts, "_id": {"$lt": oid}}]
+    return query, NEWEST_FIRST
+
+
+def to_page(docs: List[dict], limit: int, selected: Tuple[str, ...] = MESSAGE_FIELDS,
+            before: Optional[str] = None, since: Optional[str] = None) -> dict:
+    """
+    Shape up to limit + 1 fetched messages for the API. Messages are always
+    returned oldest first (display order). next_cursor loads the page before
+    them; latest_cursor (first page and since mode) is what the client
+    passes as ?since= to fetch newer messages.
+    """
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = latest_cursor = None
+    if since:
+        latest_cursor = encode_cursor(docs[-1]) if docs else since
+    else:
+        docs.reverse()
+        next_cursor = encode_cursor(docs[0]) if has_more and docs else None
+        if not before and docs:
+            latest_cursor = encode_cursor(docs[-1])
+
+    messages = [{field: doc.get(field) for field in selected} for doc in docs]
+
+    return {
+        "messages": messages,
+        "next_cursor": next_cursor,
+        "latest_cursor": latest_cursor,
+        "has_newer": bool(since) and has_more,
+    }
+
+
+# ================================================================
+# BUCKETED SCHEMA (HISTORY_SCHEMA=buckets)
+# ================================================================
+# One chat_history_buckets document holds up to BUCKET_SIZE consecutive
+# messages of one conversation:
+#   {user_id, conversation_id, seq, start, end, count, messages: [{_id,
+#    role, message, lang, timestamp}, ...]}
+# so the collection and its indexes grow per bucket instead of per message.
+# seq numbers a conversation's buckets 0, 1, 2, ... (buckets written before
+# it existed have none).
+BUCKET_SIZE = 100
+
+# Aggregation stages that turn buckets back into one document per message,
+# for pipelines written against the per-message schema
+UNWIND_BUCKETS = [
+    {"$unwind": "$messages"},
+    {
+        "$project": {
+            "_id": "$messages._id",
+            "user_id": 1,
+            "conversation_id": 1,
+            **{field: f"$messages.{field}" for field in MESSAGE_FIELDS},
+        }
+    },
+]
+
+
+def ensure_bucket_indexes(collection):
+    # Serves the append (open bucket of a conversation) and the page queries
+    collection.create_index([("user_id", 1), ("conversation_id", 1), ("start", -1)])
+    # One bucket per seq: concurrent appends that find the open bucket full
+    # race on this index instead of each opening a new bucket
+    collection.create_index(
+        [("user_id", 1), ("conversation_id", 1), ("seq", 1)],
+        unique=True,
+        partialFilterExpression={"seq": {"$exists": True}},
+    )
+
+
+def bucket_append(doc: dict, seq: int, bucket_size: int = BUCKET_SIZE) -> Tuple[dict, dict]:
+    """
+    (filter, update) appending one message (a chat_history document with its
+    _id) to bucket `seq` of its conversation if that has room; upserting
+    opens the bucket. If it exists and is full, the upsert fails with a
+    duplicate key error (see append_to_bucket()).
+    """
+    message = {
+        key: value for key, value in doc.items() if key not in ("user_id", "conversation_id")
+    }
+    query = {
+        "user_id": doc["user_id"],
+        "conversation_id": doc["conversation_id"],
+        "seq": seq,
+        "count": {"$lt": bucket_size},
+    }
+    update = {
+        "$push": {"messages": message},
+        "$inc": {"count": 1},
+        "$min": {"start": doc["timestamp"]},
+        "$max": {"end": doc["timestamp"]},
+    }
+    return query, update
+
+
+def append_to_bucket(collection, doc: dict, bucket_size: int = BUCKET_SIZE) -> int:
+    """
+    Append one message to its conversation's open (highest seq) bucket with
+    a single upserting find_one_and_update, moving on to the next seq when
+    that bucket is full. Returns the seq written to.
+    """
+    conversation = {"user_id": doc["user_id"], "conversation_id": doc["conversation_id"]}
+    latest = collection.find_one(conversation, {"seq": 1}, sort=[("seq", -1)])
+    seq = (latest or {}).get("seq", 0)
+    while True:
+        query, update = bucket_append(doc, seq, bucket_size)
+        try:
+            collection.find_one_and_update(query, update, {"_id": 1}, upsert=True)
+            return seq
+        except DuplicateKeyError:
+            # Bucket seq exists; retry it unless it is (still) full
+            bucket = collection.find_one({**conversation, "seq": seq}, {"count": 1})
+            if bucket is not None and bucket.get("count", 0) >= bucket_size:
+                seq += 1
+
+
+def bucket_query(user_id: str, conversation_id: str, before: Optional[str] = None,
+                 since: Optional[str] = None) -> Tuple[dict, list]:
+    """(filter, sort) over the buckets that can hold the requested page."""
+    query = {"user_id": user_id, "conversation_id": conversation_id}
+    if since:
+        query["end"] = {"$gte": decode_cursor(since)[0]}
+        return query, [("start", 1)]
+    if before:
+        query["start"] = {"$lte": decode_cursor(before)[0]}
+    return query, [("start", -1)]
+
+
+def _as_utc(ts: datetime) -> datetime:
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def messages_from_buckets(buckets, limit: int, before: Optional[str] = None,
+                          since: Optional[str] = None) -> List[dict]:
+    """
+    Up to limit + 1 messages from buckets ordered as bucket_query() sorts
+    them, in the same order and shape page_query() + find() would return, so
+    to_page() works unchanged. Reads buckets only until the page is full.
+    """
+    newest_first = not since
+    cursor = decode_cursor(before or since) if (before or since) else None
+    key = lambda m: (_as_utc(m["timestamp"]), m["_id"])  # noqa: E731
+
+    collected = []
+    for bucket in buckets:
+        if len(collected) > limit:
+            # Buckets are appended in time order: once the page is full, a
+            # bucket entirely outside it ends the scan
+            edge = key(collected[limit])[0]
+            if newest_first and _as_utc(bucket["end"]) < edge:
+                break
+            if not newest_first and _as_utc(bucket["start"]) > edge:
+                break
+        for message in bucket.get("messages", []):
+            if cursor is not None:
+                position = key(message)
+                if newest_first and not position < cursor:
+                    continue
+                if not newest_first and not position > cursor:
+                    continue
+            collected.append(message)
+        collected.sort(key=key, reverse=newest_first)
+    return collected[:limit + 1]
+
+
+def delete_buckets(collection, user_id: str, conversation_id: str) -> int:
+    """Delete a conversation's buckets; returns the number of messages removed."""
+    query = {"user_id": user_id, "conversation_id": conversation_id}
+    removed = sum(bucket.get("count", 0) for bucket in collection.find(query, {"count": 1}))
+    collection.delete_many(query)
+    return removed
+
+
+def migrate_to_buckets(history_collection, buckets_collection,
+                       bucket_size: int = BUCKET_SIZE, batch_size: int = 500) -> Tuple[int, int]:
+    """
+    Copy chat_history into buckets, conversation by conversation.
+    Conversations that already have buckets are skipped, so re-running it
+    (e.g. after HISTORY_SCHEMA=buckets went live) never touches messages
+    written since. chat_history itself is left untouched. Returns
+    (messages, buckets) written.
+    """
+    ensure_bucket_indexes(buckets_collection)
+    bucketed = {
+        (row["_id"]["user_id"], row["_id"]["conversation_id"])
+        for row in buckets_collection.aggregate([
+            {"$group": {"_id": {"user_id": "$user_id", "conversation_id": "$conversation_id"}}}
+        ])
+    }
+    messages_written = buckets_written = 0
+    pending: List[dict] = []
+    current = None
+    bucket = None
+
+    def flush():
+        nonlocal pending, buckets_written
+        if pending:
+            buckets_collection.insert_many(pending, ordered=False)
+            buckets_written += len(pending)
+            pending = []
+
+    for doc in history_collection.find({}).sort(
+        [("user_id", 1), ("conversation_id", 1), ("timestamp", 1), ("_id", 1)]
+    ):
+        conversation = (doc.get("user_id"), doc.get("conversation_id"))
+        if conversation != current:
+            current = conversation
+            bucket = None
+        if current in bucketed:
+            continue
+        if bucket is None or bucket["count"] >= bucket_size:
+            bucket = {
+                "user_id": current[0], "conversation_id": current[1],
+                "seq": 0 if bucket is None else bucket["seq"] + 1,
+                "start": doc["timestamp"], "end": doc["timestamp"], "count": 0, "messages": [],
+            }
+            pending.append(bucket)
+        message = {k: v for k, v in doc.items() if k not in ("user_id", "conversation_id")}
+        bucket["messages"].append(message)
+        bucket["count"] += 1
+        bucket["end"] = doc["timestamp"]
+        messages_written += 1
+        # Only full buckets are written early; the open one may still grow
+        if len(pending) > batch_size:
+            open_bucket = pending.pop()
+            flush()
+            pending.append(open_bucket)
+
+    flush()
+    return messages_written, buckets_written
@@ -0,0 +1,432 @@
+# src/history_writer.py
+import atexit
+import glob
+import os
+import queue
+import re
+import threading
+import time
+from typing import Callable, List, Optional
+
+from bson import json_util
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src import history as message_pages
+from src import metrics
+
+FLUSH_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+DUPLICATE_KEY = 11000
+HURRY_CHECK_S = 0.01  # how often a batching window checks for a waiting reader
+# spill-<owner pid>.jsonl, renamed to ...jsonl.replay-<pid> by the process replaying it
+SPILL_NAME = re.compile(r"^spill-(?P<pid>\d+)\.jsonl(?:.*\.replay-(?P<replayer>\d+))?$")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+def _idempotent(summary: tuple) -> List[tuple]:
+    """
+    Summary ops that are safe to apply a second time, for a message whose
+    earlier write may or may not have reached the conversations collection.
+    Each queued update also keeps the newest message id it counted
+    ($max last_message_id), so the $inc is applied only if no message with
+    this id or a newer one has been counted yet. An upserting (first user
+    message) update becomes an idempotent create plus the guarded update.
+    """
+    query, update, upsert = summary
+    message_id = update.get("$max", {}).get("last_message_id")
+    if message_id is None or "last_message_id" in query:
+        return [summary]  # a create op, or already guarded
+    guarded = ({**query, "last_message_id": {"$not": {"$gte": message_id}}}, update, False)
+    if not upsert:
+        return [guarded]
+    create = {**update.get("$setOnInsert", {}), "message_count": 0}
+    return [(query, {"$setOnInsert": create}, True), guarded]
+
+
+class _PartialWrite(Exception):
+    """Part of a batch was written; `remaining` holds what still has to be."""
+
+    def __init__(self, remaining: List[tuple]):
+        super().__init__(f"{len(remaining)} writes not applied")
+        self.remaining = remaining
+
+
+class HistoryWriter:
+    """
+    Write-behind persistence for chat messages.
+
+    submit() queues a chat_history document (with its conversation-summary
+    update) and returns at once, so a chat response never waits on MongoDB.
+    A worker thread flushes the queue with one insert_many + one bulk_write
+    every flush_interval_ms or as soon as max_batch records are queued.
+
+    While MongoDB is unavailable, failed batches are appended to a per-process
+    JSONL spill file (bounded by max_spill_bytes; beyond that records are
+    dropped and counted) and replayed, oldest first, once writes succeed
+    again - also by another process once this one has exited (a live
+    worker's spill file is never touched). Documents get their _id when
+    queued, so a replayed insert is idempotent, and summary updates of
+    replayed messages are guarded by that id (see _idempotent()).
+
+    With bucket_size set (HISTORY_SCHEMA=buckets) messages are appended to
+    per-conversation buckets with $push instead (see src/history.py).
+
+    Reads that must see a user's own messages (the sidebar, a conversation
+    page right after sending) call wait_for_user() first: it hurries the
+    worker and waits until that user's queued messages are written.
+    """
+
+    def __init__(
+        self,
+        history_fn: Callable,
+        summaries_fn: Callable,
+        max_batch: int = 100,
+        flush_interval_ms: float = 200,
+        spill_dir: Optional[str] = "cache/history_spill",
+        max_spill_bytes: int = 50 * 1024 * 1024,
+        retry_max_s: float = 30.0,
+        bucket_size: Optional[int] = None,
+    ):
+        # Callables, so the writer follows app.py re-connecting after fork
+        self.history_fn = history_fn
+        self.summaries_fn = summaries_fn
+        # Set for HISTORY_SCHEMA=buckets: history_fn is then the buckets collection
+        self.bucket_size = bucket_size
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval_ms / 1000
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        self.retry_max = retry_max_s
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._oldest = None  # enqueue time of the oldest unflushed record
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._retry_at = 0.0
+        self._backoff = 1.0
+        self._pending = {}  # user_id -> queued messages not yet written (or spilled)
+        self._pending_cond = threading.Condition()
+        self._hurry = threading.Event()  # a reader is waiting: skip the batching delay
+
+        metrics.gauge("history_queue_depth", "messages waiting to be written", fn=self.depth)
+        metrics.gauge("history_queue_lag_ms", "age of the oldest unwritten message", fn=self.lag_ms)
+        metrics.gauge("history_spill_bytes", "bytes in this process's spill file", fn=self.spill_bytes)
+        self.written = metrics.counter("history_written_total", "messages written to MongoDB")
+        self.spilled = metrics.counter("history_spilled_total", "messages spilled to disk")
+        self.dropped = metrics.counter("history_dropped_total", "messages dropped (spill full)")
+        self.flush_ms = metrics.histogram("history_flush_ms", FLUSH_BUCKETS_MS, "batch write latency")
+
+    # ================================================================
+    # PUBLIC API
+    # ================================================================
+    def submit(self, doc: dict, summary_update=None):
+        """Queue one chat_history document and its (filter, update, upsert)."""
+        self._ensure_worker()
+        doc.setdefault("_id", ObjectId())
+        if summary_update is not None:
+            query, update, upsert = summary_update
+            update = {**update, "$max": {"last_message_id": doc["_id"]}}
+            summary_update = (query, update, upsert)
+        with self._pending_cond:
+            self._pending[doc["user_id"]] = self._pending.get(doc["user_id"], 0) + 1
+        self._queue.put((doc, summary_update, time.time()))
+
+    def wait_for_user(self, user_id: str, timeout: float = 2.0) -> bool:
+        """
+        Block until every message this process queued for user_id has been
+        written (or spilled), at most `timeout` seconds. Returns False on
+        timeout; the caller then serves what MongoDB has.
+        """
+        deadline = time.monotonic() + timeout
+        with self._pending_cond:
+            while self._pending.get(user_id):
+                self._hurry.set()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._pending_cond.wait(remaining)
+        return True
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def lag_ms(self) -> float:
+        try:
+            oldest = self._queue.queue[0][2]
+        except IndexError:
+            oldest = self._oldest
+        return round((time.time() - oldest) * 1000, 1) if oldest else 0.0
+
+    def spill_bytes(self) -> int:
+        try:
+            return os.path.getsize(self._spill_path())
+        except (OSError, TypeError):
+            return 0
+
+    def close(self, timeout: float = 10.0):
+        """Flush what is queued (spilling it if MongoDB is down) and stop."""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        # Anything the worker did not get to
+        records = self._drain(block=False, limit=None)
+        if records:
+            self._write(records)
+            self._settle(records)
+
+    # ================================================================
+    # WORKER
+    # ================================================================
+    def _ensure_worker(self):
+        # Threads do not survive fork; each gunicorn worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._stop = threading.Event()
+            self._pending = {}
+            self._pending_cond = threading.Condition()
+            self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.close)
+
+    def _drain(self, block: bool, limit: Optional[int]) -> List[tuple]:
+        records = []
+        try:
+            if block:
+                records.append(self._queue.get(timeout=self.flush_interval))
+                # Let a burst build up to max_batch, but never wait past the interval
+                deadline = time.perf_counter() + self.flush_interval
+                while (
+                    len(records) < limit
+                    and time.perf_counter() < deadline
+                    and not self._hurry.is_set()
+                ):
+                    # Short waits, so a reader's wait_for_user() cuts the window short
+                    remaining = max(deadline - time.perf_counter(), 0)
+                    try:
+                        records.append(self._queue.get(timeout=min(remaining, HURRY_CHECK_S)))
+                    except queue.Empty:
+                        continue
+            while limit is None or len(records) < limit:
+                records.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return records
+
+    def _run(self):
+        # Also picks up files a crashed process was replaying
+        self._replay_spill("spill-*")
+        while not self._stop.is_set():
+            records = self._drain(block=True, limit=self.max_batch)
+            # Spilled (older) messages go first, so summaries are built in order
+            if time.time() >= self._retry_at and self._has_spill():
+                self._replay_spill()
+            if records:
+                self._hurry.clear()
+                self._oldest = records[0][2]
+                try:
+                    self._write(records)
+                finally:
+                    self._settle(records)
+                self._oldest = None
+
+    def _settle(self, records: List[tuple]):
+        """Queued records are written or spilled: release wait_for_user()."""
+        with self._pending_cond:
+            for doc, _, _ in records:
+                user_id = doc["user_id"]
+                if self._pending.get(user_id, 0) > 1:
+                    self._pending[user_id] -= 1
+                else:
+                    self._pending.pop(user_id, None)
+            self._pending_cond.notify_all()
+
+    # ================================================================
+    # MONGODB WRITES
+    # ================================================================
+    def _write(self, records: List[tuple]) -> bool:
+        """Write one batch; on failure spill what is left of it and back off."""
+        if time.time() < self._retry_at:
+            self._spill(records)
+            return False
+        start = time.perf_counter()
+        try:
+            self._insert(records)
+        except _PartialWrite as e:
+            return self._failed(e.remaining, e.__cause__)
+        except Exception as e:
+            return self._failed(records, e)
+        self.flush_ms.observe((time.perf_counter() - start) * 1000)
+        self.written.inc(len(records))
+        self._retry_at, self._backoff = 0.0, 1.0
+        return True
+
+    def _failed(self, records: List[tuple], error) -> bool:
+        print(f"[history_writer] write failed ({len(records)} messages spilled): {error}")
+        self._spill(records)
+        self._retry_at = time.time() + self._backoff
+        self._backoff = min(self._backoff * 2, self.retry_max)
+        return False
+
+    def _insert(self, records: List[tuple]):
+        docs = [doc for doc, _, _ in records if doc is not None]
+        written = set()
+        if docs and self.bucket_size:
+            self._append_to_buckets(records)
+        elif docs:
+            try:
+                self.history_fn().insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                # Replayed documents that already made it in are fine...
+                errors = e.details.get("writeErrors", [])
+                if any(err.get("code") != DUPLICATE_KEY for err in errors):
+                    raise
+                # ...but their summaries may not have been counted (the batch
+                # can have failed after the insert), so retry them guarded
+                written = {err["op"]["_id"] for err in errors}
+
+        # Messages are in; from here on only the summary updates are retried
+        pending = []
+        for doc, summary, t in records:
+            if not summary:
+                continue
+            if doc is None or doc["_id"] in written:
+                pending.extend((None, op, t) for op in _idempotent(summary))
+            else:
+                pending.append((None, summary, t))
+        if not pending:
+            return
+        try:
+            # Ordered, so a conversation's first user message creates its
+            # summary before the bot reply increments it
+            self.summaries_fn().bulk_write(
+                [UpdateOne(q, u, upsert=up) for _, (q, u, up), _ in pending], ordered=True
+            )
+        except BulkWriteError as e:
+            failed_at = e.details["writeErrors"][0]["index"]
+            raise _PartialWrite(pending[failed_at:]) from e
+        except Exception as e:
+            raise _PartialWrite(pending) from e
+
+    def _append_to_buckets(self, records: List[tuple]):
+        # $push is not idempotent: appends go one by one, so only the ones
+        # that did not land are retried (a dropped connection during an
+        # append can still repeat that message on replay)
+        collection = self.history_fn()
+        for i, (doc, _, _) in enumerate(records):
+            if doc is None:
+                continue
+            try:
+                message_pages.append_to_bucket(collection, doc, self.bucket_size)
+            except Exception as e:
+                done = [(None, summary, t) for _, summary, t in records[:i] if summary]
+                raise _PartialWrite(done + records[i:]) from e
+
+    # ================================================================
+    # SPILL FILE
+    # ================================================================
+    def _spill_path(self) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        return os.path.join(self.spill_dir, f"spill-{os.getpid()}.jsonl")
+
+    def _claimable(self, path: str) -> bool:
+        """
+        Our own spill file, or one whose owner (or replayer) has exited. A
+        live worker may be appending to its file at any moment, and
+        _spill_lock only serializes the threads of one process.
+        """
+        match = SPILL_NAME.match(os.path.basename(path))
+        if match is None:
+            return False
+        owner = int(match.group("replayer") or match.group("pid"))
+        # A .replay-<our pid> file found by glob is left over from a
+        # previous process with the same pid: we replay one file at a time
+        return owner == os.getpid() or not _pid_alive(owner)
+
+    def _spill_files(self, pattern: str = "spill-*.jsonl") -> List[str]:
+        if not self.spill_dir:
+            return []
+        return [
+            path for path in sorted(glob.glob(os.path.join(self.spill_dir, pattern)))
+            if self._claimable(path)
+        ]
+
+    def _has_spill(self) -> bool:
+        return bool(self._spill_files())
+
+    def _spill(self, records: List[tuple]):
+        path = self._spill_path()
+        if path is None:
+            self.dropped.inc(len(records))
+            return
+        lines = [
+            json_util.dumps({"doc": doc, "summary": summary}) + "\n"
+            for doc, summary, _ in records
+        ]
+        with self._spill_lock:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            size = self.spill_bytes()
+            kept = 0
+            with open(path, "a", encoding="utf-8") as f:
+                for line in lines:
+                    if size + len(line) > self.max_spill_bytes:
+                        break
+                    f.write(line)
+                    size += len(line)
+                    kept += 1
+        self.spilled.inc(kept)
+        if kept < len(records):
+            self.dropped.inc(len(records) - kept)
+            print(f"[history_writer] spill file full: dropped {len(records) - kept} messages")
+
+    def _replay_spill(self, pattern: str = "spill-*.jsonl"):
+        """Write back this process's spill file and any left by exited processes."""
+        for path in self._spill_files(pattern):
+            # Claim the file so two workers never replay it twice
+            claimed = f"{path}.replay-{os.getpid()}"
+            with self._spill_lock:
+                try:
+                    os.rename(path, claimed)
+                except OSError:
+                    continue
+            with open(claimed, encoding="utf-8") as f:
+                records = []
+                for line in f:
+                    try:
+                        item = json_util.loads(line)
+                    except ValueError:
+                        continue  # torn last line of a crashed process
+                    summary = tuple(item["summary"]) if item.get("summary") else None
+                    records.append((item["doc"], summary, time.time()))
+
+            print(f"[history_writer] replaying {len(records)} spilled messages")
+            failed = False
+            for i in range(0, len(records), self.max_batch):
+                # A failure re-spills the rest of this file into our own
+                if not self._write(records[i:i + self.max_batch]):
+                    self._spill(records[i + self.max_batch:])
+                    failed = True
+                    break
+            os.remove(claimed)
+            if failed:
+                return
@@ -0,0 +1,38 @@
+# src/language.py
+import re
+
+from langdetect import DetectorFactory, LangDetectException, detect_langs
+
+DetectorFactory.seed = 0  # langdetect is random by default; make it repeatable
+
+# Unicode blocks of the supported non-Latin scripts
+SCRIPTS = {
+    "hi": re.compile(r"[ऀ-ॿ]"),  # Devanagari
+    "ta": re.compile(r"[஀-௿]"),  # Tamil
+    "te": re.compile(r"[ఀ-౿]"),  # Telugu
+}
+LATIN_WORD = re.compile(r"[A-Za-z]{2,}")
+
+
+def detect_language(text: str, default: str = "en", min_confidence: float = 0.9) -> str:
+    """
+    Local (no network) language check for a chat message.
+
+    Indic scripts are recognised from their Unicode block. Latin text is
+    reported as English only when langdetect is confident, so romanised
+    Hindi ("mujhe bukhar hai") keeps the user's selected language.
+    """
+    for lang, script in SCRIPTS.items():
+        if script.search(text):
+            return lang
+
+    if len(LATIN_WORD.findall(text)) < 2:
+        return default  # too short to tell ("ok", "BP?")
+
+    try:
+        best = detect_langs(text)[0]
+    except LangDetectException:
+        return default
+    if best.lang == "en" and best.prob >= min_confidence:
+        return "en"
+    return default
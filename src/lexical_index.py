@@ -0,0 +1,241 @@
+# src/lexical_index.py
+import json
+import math
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+TERMS_FILE = "terms.json"
+OFFSETS_FILE = "offsets.npy"
+POSTINGS_FILE = "postings.npy"
+FREQS_FILE = "freqs.npy"
+LENGTHS_FILE = "lengths.npy"
+DOCS_FILE = "docs.jsonl"
+META_FILE = "meta.json"
+
+TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can could do does for from has have how i if in "
+    "into is it its me my of on or should so than that the their them there these they "
+    "this to was what when where which who why will with would you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens, stop words removed ("HbA1c" -> "hba1c", "NS1" -> "ns1")."""
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index over the same chunks as the vector index.
+
+    Postings are stored CSR-style in flat NumPy arrays: for term id t,
+    postings[offsets[t]:offsets[t + 1]] are the rows of the chunks that
+    contain it and freqs[...] its counts there, next to the chunk lengths.
+    The arrays are saved as .npy files and memory-mapped on load, the chunk
+    texts as docs.jsonl (as in src/local_index.py). A query touches only the
+    postings of its own terms.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms: List[str] = []
+        self._term_ids: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.zeros(0, dtype=np.int32)
+        self._freqs = np.zeros(0, dtype=np.uint16)
+        self._lengths = np.zeros(0, dtype=np.int32)
+        self._docs: List[dict] = []
+        self._avg_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # =================================================================
+    # BUILD
+    # =================================================================
+    @classmethod
+    def build(cls, ids: Iterable[str], chunks: Iterable[Document], **kwargs) -> "BM25Index":
+        index = cls(**kwargs)
+        term_rows: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for row, (doc_id, chunk) in enumerate(zip(ids, chunks)):
+            tokens = tokenize(chunk.page_content)
+            lengths.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term_rows.setdefault(token, []).append((row, count))
+            index._docs.append({"id": doc_id, "text": chunk.page_content, "metadata": chunk.metadata})
+
+        index.terms = sorted(term_rows)
+        index._term_ids = {term: i for i, term in enumerate(index.terms)}
+        sizes = [len(term_rows[term]) for term in index.terms]
+        index._offsets = np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)]).astype(np.int64)
+        index._postings = np.fromiter(
+            (row for term in index.terms for row, _ in term_rows[term]),
+            dtype=np.int32, count=int(index._offsets[-1]),
+        )
+        index._freqs = np.fromiter(
+            (min(count, 65535) for term in index.terms for _, count in term_rows[term]),
+            dtype=np.uint16, count=int(index._offsets[-1]),
+        )
+        index._lengths = np.asarray(lengths, dtype=np.int32)
+        index._avg_length = float(index._lengths.mean()) if lengths else 0.0
+        return index
+
+    # =================================================================
+    # SEARCH
+    # =================================================================
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """
+        Top-k chunks by BM25 score, each with metadata["bm25_score"] and
+        metadata["lexical_coverage"] (share of the query's terms it contains).
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms or not self._docs:
+            return []
+
+        n = len(self._docs)
+        scores = np.zeros(n, dtype=np.float32)
+        matched = np.zeros(n, dtype=np.int32)
+        norms = self.k1 * (1 - self.b + self.b * self._lengths / max(self._avg_length, 1e-9))
+        for term in query_terms:
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            rows = self._postings[start:end]
+            freqs = self._freqs[start:end].astype(np.float32)
+            df = end - start
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            scores[rows] += idf * freqs * (self.k1 + 1) / (freqs + norms[rows])
+            matched[rows] += 1
+
+        hits = np.flatnonzero(matched)
+        if not len(hits):
+            return []
+        k = min(k, len(hits))
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for row in top:
+            record = self._docs[int(row)]
+            metadata = {
+                **record["metadata"],
+                "bm25_score": float(scores[row]),
+                "lexical_coverage": float(matched[row]) / len(query_terms),
+            }
+            results.append(
+                (Document(id=record["id"], page_content=record["text"], metadata=metadata),
+                 float(scores[row]))
+            )
+        return results
+
+    def documents(self, ids: Iterable[str]) -> Dict[str, Document]:
+        """Chunks of this index by id (to carry them over into a rebuilt index)."""
+        wanted = set(ids)
+        return {
+            record["id"]: Document(page_content=record["text"], metadata=record["metadata"])
+            for record in self._docs if record["id"] in wanted
+        }
+
+    # =================================================================
+    # PERSISTENCE
+    # =================================================================
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            OFFSETS_FILE: self._offsets, POSTINGS_FILE: self._postings,
+            FREQS_FILE: self._freqs, LENGTHS_FILE: self._lengths,
+        }
+        # Temp files then rename, so a starting app never reads half a file
+        for name, array in arrays.items():
+            np.save(os.path.join(path, name + ".tmp.npy"), array)
+            os.replace(os.path.join(path, name + ".tmp.npy"), os.path.join(path, name))
+        _write_atomic(os.path.join(path, TERMS_FILE), json.dumps(self.terms, ensure_ascii=False))
+        _write_atomic(
+            os.path.join(path, DOCS_FILE),
+            "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in self._docs),
+        )
+        _write_atomic(
+            os.path.join(path, META_FILE),
+            json.dumps({
+                "count": len(self._docs), "terms": len(self.terms), "postings": len(self._postings),
+                "k1": self.k1, "b": self.b, "saved_at": time.time(),
+            }),
+        )
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in arrays)
+        print(
+            f"[lexical_index] saved {len(self._docs)} chunks, {len(self.terms)} terms, "
+            f"{len(self._postings)} postings ({size / 1024:.0f} KB of arrays) to {path}"
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        start = time.perf_counter()
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        index = cls(k1=meta["k1"], b=meta["b"])
+        with open(os.path.join(path, TERMS_FILE), encoding="utf-8") as f:
+            index.terms = json.load(f)
+        index._term_ids = {term: i for i, term in enumerate(index.terms)}
+        index._offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        index._postings = np.load(os.path.join(path, POSTINGS_FILE), mmap_mode="r")
+        index._freqs = np.load(os.path.join(path, FREQS_FILE), mmap_mode="r")
+        index._lengths = np.load(os.path.join(path, LENGTHS_FILE))
+        index._avg_length = float(index._lengths.mean()) if len(index._lengths) else 0.0
+        with open(os.path.join(path, DOCS_FILE), encoding="utf-8") as f:
+            index._docs = [json.loads(line) for line in f if line.strip()]
+
+        print(
+            f"[lexical_index] loaded {len(index._docs)} chunks, {len(index.terms)} terms "
+            f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        return index
+
+
+def _write_atomic(path: str, data: str):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+# =================================================================
+# FUSION
+# =================================================================
+def reciprocal_rank_fusion(
+    dense: List[Document], lexical: List[Document], k: int, rrf_k: int = 60
+) -> List[Document]:
+    """
+    Merge two ranked lists by reciprocal rank (sum of 1 / (rrf_k + rank)),
+    which needs no calibration between cosine and BM25 scores. A chunk found
+    by both keeps the dense copy's metadata plus the lexical scores; the
+    fused score is stored in metadata["fusion_score"].
+    """
+    fused: Dict[str, Document] = {}
+    scores: Dict[str, float] = {}
+    for ranked in (dense, lexical):
+        for rank, doc in enumerate(ranked):
+            key = doc.page_content
+            if key in fused:
+                for name in ("bm25_score", "lexical_coverage"):
+                    if name in doc.metadata:
+                        fused[key].metadata[name] = doc.metadata[name]
+            else:
+                fused[key] = doc
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+
+    ranked = sorted(fused, key=lambda key: scores[key], reverse=True)[:k]
+    for key in ranked:
+        fused[key].metadata["fusion_score"] = scores[key]
+    return [fused[key] for key in ranked]
@@ -0,0 +1,321 @@
+# src/local_index.py
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+VECTORS_FILE = "vectors.npy"
+DOCS_FILE = "docs.jsonl"
+META_FILE = "meta.json"
+HNSW_FILE = "hnsw.bin"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process replacement for the Pinecone index.
+
+    Vectors are stored as one row-normalized float32/float16 matrix
+    (vectors.npy, memory-mapped on load) so cosine similarity is a single
+    NumPy matrix-vector product followed by an argpartition top-k.
+    float16 halves the file size; since NumPy has no fast float16 matmul,
+    such a matrix is upcast to float32 in RAM on first search.
+    With mode="hnsw" an hnswlib graph is built next to the matrix for
+    sub-linear search once the corpus grows.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        path: Optional[str] = None,
+        dtype: str = "float32",
+        mode: str = "exact",
+        hnsw_ef: int = 64,
+        dim: int = 0,
+    ):
+        self._embedding = embedding
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.mode = mode
+        self.hnsw_ef = hnsw_ef
+        self.dim = dim  # 0 until the first vector is added
+
+        self._vectors: Optional[np.ndarray] = None  # (n, dim), normalized
+        self._ids: List[str] = []
+        self._docs: List[dict] = []
+        self._id_to_row = {}
+        self._hnsw = None
+        self._hnsw_lock = threading.Lock()  # concurrent first searches build one graph
+        self._search_matrix_cache = None
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # =================================================================
+    # WRITE PATH
+    # =================================================================
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_vectors(vectors, texts, metadatas, ids)
+
+    def add_vectors(
+        self,
+        vectors,
+        texts: List[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Upsert precomputed vectors; an existing id is overwritten in place."""
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        if not texts:
+            return []
+
+        new_rows = _normalize_rows(np.asarray(vectors, dtype=np.float32)).astype(self.dtype)
+        self.dim = new_rows.shape[1]
+        matrix = (
+            np.array(self._vectors)  # copy out of the read-only mmap
+            if self._vectors is not None and len(self._vectors)
+            # an empty index (older saves stored it as (0, 0))
+            else np.empty((0, self.dim), dtype=self.dtype)
+        )
+
+        appended = []
+        for row, (doc_id, text, metadata) in zip(new_rows, zip(ids, texts, metadatas)):
+            record = {"id": doc_id, "text": text, "metadata": metadata}
+            if doc_id in self._id_to_row:
+                i = self._id_to_row[doc_id]
+                if i < len(matrix):
+                    matrix[i] = row
+                else:  # repeated id within this batch
+                    appended[i - len(matrix)] = row
+                self._docs[i] = record
+            else:
+                # rows of this batch follow the existing matrix in order
+                self._id_to_row[doc_id] = len(matrix) + len(appended)
+                self._ids.append(doc_id)
+                self._docs.append(record)
+                appended.append(row)
+
+        if appended:
+            matrix = np.vstack([matrix, np.stack(appended)])
+        self._vectors = matrix
+        self._hnsw = None  # rebuilt on save / first search
+        self._search_matrix_cache = None
+        return list(ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        drop = {self._id_to_row[i] for i in ids if i in self._id_to_row}
+        if not drop:
+            return False
+
+        keep = [i for i in range(len(self._ids)) if i not in drop]
+        self._vectors = np.array(self._vectors)[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._docs = [self._docs[i] for i in keep]
+        self._id_to_row = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._hnsw = None
+        self._search_matrix_cache = None
+        return True
+
+    def get_by_ids(self, ids) -> List[Document]:
+        return [
+            self._to_document(self._id_to_row[i]) for i in ids if i in self._id_to_row
+        ]
+
+    # =================================================================
+    # SEARCH
+    # =================================================================
+    def _to_document(self, row: int) -> Document:
+        record = self._docs[row]
+        return Document(
+            id=record["id"], page_content=record["text"], metadata=dict(record["metadata"])
+        )
+
+    def _search_matrix(self) -> np.ndarray:
+        if self.dtype == np.float32:
+            return self._vectors
+        if self._search_matrix_cache is None:
+            self._search_matrix_cache = np.asarray(self._vectors, dtype=np.float32)
+        return self._search_matrix_cache
+
+    def _build_hnsw(self):
+        import hnswlib  # optional dependency, only needed for mode="hnsw"
+
+        n, dim = self._vectors.shape
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.init_index(max_elements=max(n, 1), ef_construction=200, M=16)
+        if n:
+            index.add_items(np.asarray(self._vectors, dtype=np.float32), np.arange(n))
+        index.set_ef(self.hnsw_ef)
+        return index
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        if self._vectors is None or not len(self._ids):
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        k = min(k, len(self._ids))
+
+        if self.mode == "hnsw":
+            index = self._hnsw
+            if index is None:
+                with self._hnsw_lock:
+                    if self._hnsw is None:
+                        self._hnsw = self._build_hnsw()
+                    index = self._hnsw
+            labels, distances = index.knn_query(query, k=k)
+            # hnswlib "ip" distance is 1 - dot product
+            return [
+                (self._to_document(int(row)), float(1.0 - dist))
+                for row, dist in zip(labels[0], distances[0])
+            ]
+
+        scores = self._search_matrix() @ query
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._to_document(int(row)), float(scores[row])) for row in top]
+
+    async def asimilarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        # In-process and sub-millisecond: no executor hop needed
+        return self.similarity_search_by_vector_with_score(embedding, k=k, **kwargs)
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        vector = self._embedding.embed_query(query)
+        return self.similarity_search_by_vector_with_score(vector, k=k, **kwargs)
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    # =================================================================
+    # PERSISTENCE
+    # =================================================================
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        os.makedirs(path, exist_ok=True)
+
+        matrix = (
+            np.asarray(self._vectors, dtype=self.dtype)
+            if self._vectors is not None and len(self._vectors)
+            else np.empty((0, self.dim), dtype=self.dtype)
+        )
+        # Write to temp files then rename, so a running app never sees half a file
+        np.save(os.path.join(path, VECTORS_FILE + ".tmp.npy"), matrix)
+        os.replace(
+            os.path.join(path, VECTORS_FILE + ".tmp.npy"), os.path.join(path, VECTORS_FILE)
+        )
+
+        with open(os.path.join(path, DOCS_FILE + ".tmp"), "w", encoding="utf-8") as f:
+            for record in self._docs:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(os.path.join(path, DOCS_FILE + ".tmp"), os.path.join(path, DOCS_FILE))
+
+        if self.mode == "hnsw" and self._vectors is not None:
+            with self._hnsw_lock:
+                self._hnsw = self._build_hnsw()
+            self._hnsw.save_index(os.path.join(path, HNSW_FILE))
+
+        with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "count": len(self._ids),
+                    "dim": self.dim,
+                    "dtype": self.dtype.name,
+                    "mode": self.mode,
+                    "saved_at": time.time(),
+                },
+                f,
+            )
+        print(f"[local_index] saved {len(self._ids)} vectors to {path}")
+
+    @classmethod
+    def load(
+        cls, path: str, embedding: Embeddings, mode: Optional[str] = None, hnsw_ef: int = 64
+    ) -> "LocalVectorStore":
+        start = time.perf_counter()
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        store = cls(
+            embedding, path=path, dtype=meta["dtype"], mode=mode or meta["mode"],
+            hnsw_ef=hnsw_ef, dim=meta.get("dim", 0),
+        )
+        store._vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        with open(os.path.join(path, DOCS_FILE), encoding="utf-8") as f:
+            store._docs = [json.loads(line) for line in f if line.strip()]
+        store._ids = [record["id"] for record in store._docs]
+        store._id_to_row = {doc_id: i for i, doc_id in enumerate(store._ids)}
+
+        hnsw_path = os.path.join(path, HNSW_FILE)
+        if store.mode == "hnsw" and os.path.exists(hnsw_path):
+            import hnswlib
+
+            store._hnsw = hnswlib.Index(space="ip", dim=store._vectors.shape[1])
+            store._hnsw.load_index(hnsw_path, max_elements=max(len(store._ids), 1))
+            store._hnsw.set_ef(hnsw_ef)
+
+        print(
+            f"[local_index] loaded {len(store._ids)} vectors "
+            f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        path: Optional[str] = None,
+        dtype: str = "float32",
+        mode: str = "exact",
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding, path=path, dtype=dtype, mode=mode)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        if path:
+            store.save(path)
+        return store
@@ -1,13 +1,35 @@
 # src/medical_news.py
+import os
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # PUT YOUR REAL KEY HERE (the one that worked in Postman)
-API_KEY = "pub_18151aa02e5642d7a42a25d813e510ca"   # ← PASTE YOUR WORKING KEY
+API_KEY = os.getenv("NEWS_DATA_API_KEY", "pub_18151aa02e5642d7a42a25d813e510ca")
+
+# Override to point at a local fake server (benchmarks/fake_news_server.py)
+NEWS_URL = os.getenv("NEWS_API_URL", "https://newsdata.io/api/1/latest")
+
+# (connect, read) seconds; fetches run in the news cache's background thread
+NEWS_TIMEOUT = (5, float(os.getenv("NEWS_READ_TIMEOUT", 15)))
+
+
+def _make_session():
+    """One pooled keep-alive session for every news fetch, with a single retry."""
+    session = requests.Session()
+    retry = Retry(total=1, backoff_factor=0.5, status_forcelist=(502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = _make_session()
 
-def fetch_latest_medical_news(lang="en", max_items=10):
-    url = "https://newsdata.io/api/1/latest"   # ← CHANGED TO /latest (more reliable)
-    
-    params = {
+
+def _news_params(lang):
+    return {
         "apikey": API_KEY,
         "q": "health OR medical OR diabetes OR cancer OR covid OR hypertension",
         "country": "in",
@@ -16,31 +38,42 @@ def fetch_latest_medical_news(lang="en", max_items=10):
         "size": 10
     }
 
+
+def fetch_latest_medical_news(lang="en", max_items=10, raise_errors=False):
+    """
+    Latest health news for lang; [] if the API has none. A failed request
+    also returns [] unless raise_errors is set (the news cache backs off
+    differently for the two).
+    """
     try:
         print(f"Fetching {lang.upper()} medical news from India...")
-        response = requests.get(url, params=params, timeout=25)
+        response = _session.get(NEWS_URL, params=_news_params(lang), timeout=NEWS_TIMEOUT)
         response.raise_for_status()
-        data = response.json()
+        return _parse_news(response.json(), max_items)
 
-        print(f"Raw API Response: {data.get('totalResults', 0)} total, {len(data.get('results', []))} returned")
+    except Exception as e:
+        print("Request failed:", e)
+        if raise_errors:
+            raise
+        return []
 
-        if data.get("status") != "success" and data.get("status") != "ok":
-            print("API Error:", data)
-            return []
 
-        results = []
-        for item in data.get("results", []):
-            results.append({
-                "title": item.get("title", "Health Update"),
-                "summary": (item.get("description") or item.get("content") or "Latest medical news from India...")[:200] + "...",
-                "link": item.get("link", "#"),
-                "published": item.get("pubDate", "")[:10],
-                "image": item.get("image_url") or "https://images.unsplash.com/photo-1576091160399-112ba8d25d1d?w=800&q=80"
-            })
+def _parse_news(data, max_items):
+    print(f"Raw API Response: {data.get('totalResults', 0)} total, {len(data.get('results', []))} returned")
 
-        print(f"SUCCESS → {len(results)} REAL articles loaded!")
-        return results[:max_items]
+    if data.get("status") != "success" and data.get("status") != "ok":
+        print("API Error:", data)
+        raise ValueError(f"news API status {data.get('status')!r}")
 
-    except Exception as e:
-        print("Request failed:", e)
-        return []
\ No newline at end of file
+    results = []
+    for item in data.get("results", []):
+        results.append({
+            "title": item.get("title", "Health Update"),
+            "summary": (item.get("description") or item.get("content") or "Latest medical news from India...")[:200] + "...",
+            "link": item.get("link", "#"),
+            "published": item.get("pubDate", "")[:10],
+            "image": item.get("image_url") or "https://images.unsplash.com/photo-1576091160399-112ba8d25d1d?w=800&q=80"
+        })
+
+    print(f"SUCCESS → {len(results)} REAL articles loaded!")
+    return results[:max_items]
\ No newline at end of file
@@ -0,0 +1,162 @@
+# src/metrics.py
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Default latency buckets in milliseconds
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class Counter:
+    """Monotonic counter (requests, cache hits, errors...)."""
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> dict:
+        return {"type": "counter", "help": self.help, "value": self._value}
+
+
+class Gauge:
+    """Point-in-time value, either set explicitly or read from a callback."""
+
+    def __init__(self, name: str, help: str = "", fn=None):
+        self.name = name
+        self.help = help
+        self._value = 0
+        self._fn = fn
+
+    def set(self, value: float):
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        if self._fn is not None:
+            try:
+                return self._fn()
+            except Exception:
+                return 0
+        return self._value
+
+    def snapshot(self) -> dict:
+        return {"type": "gauge", "help": self.help, "value": self.value}
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus style)."""
+
+    def __init__(self, name: str, buckets: List[float], help: str = ""):
+        self.name = name
+        self.help = help
+        self.buckets = sorted(buckets)
+        self._counts = [0] * len(self.buckets)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    self._counts[i] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "type": "histogram",
+                "help": self.help,
+                "count": self._count,
+                "sum": round(self._sum, 3),
+                "buckets": {str(b): c for b, c in zip(self.buckets, self._counts)},
+            }
+
+
+_registry: Dict[str, object] = {}
+_registry_lock = threading.Lock()
+
+
+def _get_or_create(name: str, factory):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = factory()
+            _registry[name] = metric
+        return metric
+
+
+def counter(name: str, help: str = "") -> Counter:
+    return _get_or_create(name, lambda: Counter(name, help))
+
+
+def gauge(name: str, help: str = "", fn=None) -> Gauge:
+    return _get_or_create(name, lambda: Gauge(name, help, fn))
+
+
+def histogram(
+    name: str, buckets: Optional[List[float]] = None, help: str = ""
+) -> Histogram:
+    return _get_or_create(
+        name, lambda: Histogram(name, buckets or LATENCY_BUCKETS_MS, help)
+    )
+
+
+def snapshot() -> dict:
+    """Return every registered metric as a JSON-serialisable dict."""
+    with _registry_lock:
+        metrics = dict(_registry)
+    return {name: m.snapshot() for name, m in sorted(metrics.items())}
+
+
+# =================================================================
+# PER-REQUEST STAGE TIMING
+# =================================================================
+class StageTimer:
+    """
+    Collects wall-clock durations (ms) for the stages of one request,
+    e.g. embed / search / generate / translate.
+    A stage entered more than once accumulates (query + answer translation).
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def summary(self) -> str:
+        parts = [f"{name}={ms:.1f}ms" for name, ms in list(self.stages.items())]
+        parts.append(f"total={self.total_ms():.1f}ms")
+        return " ".join(parts)
+
+    def record(self, prefix: str = "chat"):
+        """Export the collected stage timings into the global histograms."""
+        # list(): a shared (coalesced) run may still be adding stages
+        for name, ms in list(self.stages.items()):
+            histogram(f"{prefix}_{name}_ms", help=f"{name} stage latency").observe(ms)
+        histogram(f"{prefix}_total_ms", help="end-to-end latency").observe(
+            self.total_ms()
+        )
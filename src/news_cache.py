@@ -0,0 +1,204 @@
+# src/news_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src import metrics
+
+
+class NewsEntry:
+    """News for one language plus the validators served with it."""
+
+    def __init__(self, news: List[dict], updated_at: float):
+        self.news = news
+        self.updated_at = updated_at
+        self.etag = hashlib.sha1(
+            json.dumps(news, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def to_dict(self) -> dict:
+        return {"news": self.news, "updated_at": self.updated_at}
+
+
+class NewsCache:
+    """
+    Per-language news cache that never blocks a request on the news API.
+
+    get() answers from memory (or the on-disk last-good snapshot) and, when
+    the entry is older than ttl, asks the background thread to refresh it.
+    The thread also refreshes every requested language every
+    refresh_interval seconds. Failed or empty fetches keep the old entry,
+    so users see slightly stale news instead of an error.
+
+    Every fetch records its attempt time. After a failed fetch a language
+    is not retried for retry_base seconds, doubling per consecutive failure
+    up to retry_max; an empty result (a language the API has no news for)
+    is not retried for empty_ttl seconds. Requests in between are answered
+    from the cache without queueing a fetch.
+    """
+
+    def __init__(
+        self,
+        fetch_fn: Callable[[str], List[dict]],
+        ttl: float = 600,
+        refresh_interval: float = 900,
+        snapshot_path: Optional[str] = None,
+        fallback: Optional[List[dict]] = None,
+        languages: Iterable[str] = ("en",),
+        retry_base: float = 30,
+        retry_max: float = 3600,
+        empty_ttl: Optional[float] = None,
+    ):
+        self.fetch_fn = fetch_fn
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.empty_ttl = ttl if empty_ttl is None else empty_ttl
+        self.snapshot_path = snapshot_path
+        self.fallback = NewsEntry(fallback or [], 0.0)
+
+        self._entries: Dict[str, NewsEntry] = {}
+        self._languages = set(languages)
+        self._pending = set()
+        self._attempts: Dict[str, dict] = {}  # lang -> last_attempt, failures, retry_at
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+
+        self.hits = metrics.counter("news_cache_fresh_total", "news served fresh")
+        self.stale = metrics.counter("news_cache_stale_total", "news served stale")
+        self.failures = metrics.counter("news_refresh_failures_total", "failed news refreshes")
+        self.refresh_ms = metrics.histogram("news_refresh_ms", help="news API fetch latency")
+
+        self._load_snapshot()
+
+    # ================================================================
+    # READ PATH
+    # ================================================================
+    def get(self, lang: str) -> NewsEntry:
+        self._ensure_worker()
+        with self._lock:
+            self._languages.add(lang)
+            entry = self._entries.get(lang)
+
+        if entry is not None and time.time() - entry.updated_at < self.ttl:
+            self.hits.inc()
+            return entry
+
+        self.stale.inc()
+        if self.retry_due(lang):
+            self.request_refresh(lang)
+        if entry is not None:
+            return entry
+        # Nothing for this language yet: English snapshot, then the built-in list
+        return self._entries.get("en") or self.fallback
+
+    def retry_due(self, lang: str) -> bool:
+        """False while lang is backing off after a failed or empty fetch."""
+        with self._lock:
+            attempt = self._attempts.get(lang)
+        return attempt is None or time.time() >= attempt["retry_at"]
+
+    def request_refresh(self, lang: str):
+        with self._lock:
+            self._pending.add(lang)
+        self._wakeup.set()
+
+    # ================================================================
+    # REFRESH
+    # ================================================================
+    def refresh(self, lang: str) -> bool:
+        """Fetch one language now; keeps the old entry if the fetch fails."""
+        start = time.perf_counter()
+        try:
+            news = self.fetch_fn(lang)
+        except Exception as e:
+            print(f"[news_cache] refresh failed for {lang}: {e}")
+            news = None
+        self.refresh_ms.observe((time.perf_counter() - start) * 1000)
+
+        with self._lock:
+            attempt = self._attempts.setdefault(lang, {"failures": 0})
+            attempt["last_attempt"] = time.time()
+            if news is None or news == []:
+                if news is None:  # the API call failed: back off exponentially
+                    attempt["failures"] += 1
+                    delay = min(self.retry_base * 2 ** (attempt["failures"] - 1), self.retry_max)
+                else:  # nothing published for this language: remember that for a while
+                    attempt["failures"] = 0
+                    delay = self.empty_ttl
+                attempt["retry_at"] = attempt["last_attempt"] + delay
+            else:
+                attempt["failures"] = 0
+                attempt["retry_at"] = 0.0
+                self._entries[lang] = NewsEntry(news, time.time())
+
+        if not news:
+            self.failures.inc()
+            return False
+        self._save_snapshot()
+        return True
+
+    def _ensure_worker(self):
+        # Started lazily (and again in a forked worker: threads don't survive fork)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._run, name="news-refresh", daemon=True).start()
+
+    def _run(self):
+        next_full = time.time()
+        while True:
+            timeout = max(next_full - time.time(), 0)
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+            with self._lock:
+                if time.time() >= next_full:
+                    due = set(self._languages) | self._pending
+                    next_full = time.time() + self.refresh_interval
+                else:
+                    due = set(self._pending)
+                self._pending.clear()
+
+            for lang in sorted(due):
+                if self.retry_due(lang):
+                    self.refresh(lang)
+
+    # ================================================================
+    # LAST-GOOD SNAPSHOT
+    # ================================================================
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+            for lang, item in data.items():
+                self._entries[lang] = NewsEntry(item["news"], item["updated_at"])
+            print(f"[news_cache] loaded snapshot for {sorted(data)}")
+        except Exception as e:
+            print("[news_cache] snapshot unreadable:", e)
+
+    def _save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            data = {lang: entry.to_dict() for lang, entry in self._entries.items()}
+        try:
+            directory = os.path.dirname(self.snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.snapshot_path)
+        except Exception as e:
+            print("[news_cache] snapshot not saved:", e)
@@ -0,0 +1,135 @@
+# src/onnx_embeddings.py
+"""
+CPU embedding backend: an int8-quantized ONNX export of
+paraphrase-multilingual-MiniLM-L12-v2 run with onnxruntime.
+
+Export once (needs `pip install optimum[onnxruntime]`):
+
+    python -m src.onnx_embeddings --out models/minilm-int8
+
+then set EMBEDDING_BACKEND=onnx. At runtime only onnxruntime and
+tokenizers are needed (no torch).
+"""
+import argparse
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+QUANTIZED_FILE = "model_quantized.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+MAX_SEQ_LENGTH = 128  # same truncation as the sentence-transformers model
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Drop-in replacement for HuggingFaceEmbeddings backed by onnxruntime.
+
+    Texts are sorted by token length and batched, so each batch is padded
+    only to its own longest text; outputs are mean-pooled over the attention
+    mask exactly like the sentence-transformers pooling layer.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        threads: Optional[int] = None,
+        batch_size: int = 32,
+        model_file: str = QUANTIZED_FILE,
+    ):
+        # Optional dependencies, only needed for EMBEDDING_BACKEND=onnx
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        start = time.perf_counter()
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.no_padding()  # padded per batch in _run()
+        self.pad_id = self.tokenizer.token_to_id("<pad>") or 0
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.load_ms = (time.perf_counter() - start) * 1000
+        print(f"[onnx_embeddings] loaded {model_file} in {self.load_ms:.0f}ms")
+
+    def _run(self, encodings) -> np.ndarray:
+        width = max(len(e.ids) for e in encodings)
+        input_ids = np.full((len(encodings), width), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), width), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, : len(encoding.ids)] = encoding.ids
+            attention_mask[row, : len(encoding.ids)] = 1
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self.session.run(None, feeds)[0]  # (batch, width, dim)
+        mask = attention_mask[..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        encodings = self.tokenizer.encode_batch(list(texts))
+
+        # Length-bucketed batches: sort, embed, then restore input order
+        order = sorted(range(len(texts)), key=lambda i: len(encodings[i].ids))
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            batch = self._run([encodings[i] for i in rows])
+            if not vectors.shape[1]:
+                vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            vectors[rows] = batch
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+# ================================================================
+# EXPORT
+# ================================================================
+def export_quantized_model(out_dir: str, model_name: str = MODEL_NAME) -> str:
+    """Export the model to ONNX and apply dynamic int8 quantization."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    print(f"Exporting {model_name} to ONNX...")
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+
+    print("Quantizing weights to int8 (dynamic, per-tensor)...")
+    quantizer = ORTQuantizer.from_pretrained(model)
+    config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=out_dir, quantization_config=config)
+
+    path = os.path.join(out_dir, QUANTIZED_FILE)
+    print(f"Saved {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the int8 ONNX embedding model")
+    parser.add_argument("--out", default="models/minilm-int8", help="output directory")
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+    export_quantized_model(args.out, args.model)
@@ -0,0 +1,132 @@
+# src/reranker.py
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from langchain.schema import Document
+
+from src import metrics
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+CHARS_PER_TOKEN = 4  # rough average for English prose; Gemini's tokenizer is not local
+CONTEXT_TOKEN_BUCKETS = [50, 100, 200, 400, 800, 1600, 3200]
+
+
+class CrossEncoderReranker:
+    """
+    Reorders retrieved chunks by a local cross-encoder's (query, chunk) score.
+
+    The vector search only compares two independent embeddings; the
+    cross-encoder reads query and chunk together, so it is better at
+    telling the one chunk that answers the question from chunks that merely
+    share its topic. Pairs are scored in CPU batches and the scores are kept
+    in an LRU cache keyed by (query, chunk), so repeated questions skip the
+    model entirely. The model loads on first use.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, batch_size: int = 16,
+                 max_length: int = 512, cache_size: int = 4096):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self._model = None
+        self._cache: "OrderedDict[tuple, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = metrics.counter("rerank_cache_hits_total", "cached (query, chunk) scores")
+        self.misses = metrics.counter("rerank_cache_misses_total", "(query, chunk) pairs scored")
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    self._model = CrossEncoder(
+                        self.model_name, max_length=self.max_length, device="cpu"
+                    )
+        return self._model
+
+    def score(self, query: str, docs: List[Document]) -> List[float]:
+        query_key = " ".join(query.lower().split())
+        keys = [(query_key, _chunk_key(doc)) for doc in docs]
+
+        scores: List[Optional[float]] = []
+        with self._lock:
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                scores.append(score)
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        self.hits.inc(len(docs) - len(missing))
+        if missing:
+            self.misses.inc(len(missing))
+            predicted = self.model.predict(
+                [(query, docs[i].page_content) for i in missing],
+                batch_size=self.batch_size, show_progress_bar=False,
+            )
+            with self._lock:
+                for i, score in zip(missing, predicted):
+                    scores[i] = float(score)
+                    self._cache[keys[i]] = float(score)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores
+
+    def rerank(self, query: str, docs: List[Document], top_n: Optional[int] = None) -> List[Document]:
+        """Docs sorted by cross-encoder score (metadata["rerank_score"])."""
+        if not docs:
+            return []
+        for doc, score in zip(docs, self.score(query, docs)):
+            doc.metadata["rerank_score"] = score
+        ranked = sorted(docs, key=lambda d: d.metadata["rerank_score"], reverse=True)
+        return ranked[:top_n] if top_n else ranked
+
+
+def _chunk_key(doc: Document) -> str:
+    doc_id = getattr(doc, "id", None)
+    if doc_id:
+        return doc_id
+    return hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()[:16]
+
+
+# ================================================================
+# TOKEN-BUDGETED CONTEXT PACKING
+# ================================================================
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def pack_context(docs: List[Document], token_budget: int,
+                 count_tokens: Callable[[str], int] = estimate_tokens) -> List[Document]:
+    """
+    Keep docs, in rank order, while they fit into token_budget (0 = no
+    limit). Chunks that do not fit are skipped in favour of smaller
+    lower-ranked ones; if not even the best chunk fits, it is cut at a word
+    boundary so the prompt always has some context.
+    """
+    if token_budget <= 0 or not docs:
+        return docs
+
+    packed, used = [], 0
+    for doc in docs:
+        tokens = count_tokens(doc.page_content)
+        if used + tokens <= token_budget:
+            packed.append(doc)
+            used += tokens
+
+    if not packed:
+        best = docs[0]
+        text = best.page_content[: token_budget * CHARS_PER_TOKEN].rsplit(" ", 1)[0]
+        packed = [Document(page_content=text, metadata={**best.metadata, "truncated": True})]
+    return packed
+
+
+def context_tokens(docs: List[Document]) -> int:
+    return sum(estimate_tokens(doc.page_content) for doc in docs)
@@ -0,0 +1,220 @@
+# src/single_flight.py
+import asyncio
+import re
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterator, List, Optional
+
+from src import metrics
+
+
+def coalesce_key(user_message: str, lang: str) -> tuple:
+    """Questions that differ only in case, spacing or trailing punctuation share a key."""
+    text = " ".join(user_message.lower().split())
+    return re.sub(r"[\s?!.。।]+$", "", text), lang
+
+
+class _Metrics:
+    def __init__(self, name: str):
+        self.flights = metrics.counter(f"{name}_flights_total", "pipeline runs started")
+        self.coalesced = metrics.counter(
+            f"{name}_coalesced_total", "requests served by another request's pipeline run"
+        )
+        self.inflight = metrics.gauge(f"{name}_inflight", "distinct queries in flight")
+        self.wait = metrics.histogram(
+            f"{name}_coalesced_wait_ms", help="time a coalesced request waited for the shared run"
+        )
+
+
+class _Broadcast:
+    """Pieces of one streamed run, replayed to every subscriber from the start."""
+
+    def __init__(self, cond=None):
+        self.pieces: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.cond = cond
+        self.producer = None  # thread / task; also keeps the task referenced
+
+
+class SingleFlight:
+    """
+    Thread-based request coalescing (Go's singleflight): while a call for a
+    key is running, further calls with the same key wait for it and get its
+    result (or its exception) instead of running the pipeline again. The
+    key is forgotten once the call finishes, so later requests start fresh
+    (and hit the answer cache).
+
+    stream() does the same for generators: one background thread drives the
+    generator to the end, even if the request that started it goes away,
+    and every subscriber replays its pieces from the first one.
+    """
+
+    def __init__(self, name: str = "chat"):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, dict] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        self._cond = threading.Condition(self._lock)
+        self.metrics = _Metrics(name)
+
+    def _update_inflight(self):
+        self.metrics.inflight.set(len(self._calls) + len(self._streams))
+
+    def do(self, key: Hashable, fn: Callable[[], object]):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+                self._update_inflight()
+
+        if not leader:
+            self.metrics.coalesced.inc()
+            start = time.perf_counter()
+            call["done"].wait()
+            self.metrics.wait.observe((time.perf_counter() - start) * 1000)
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        self.metrics.flights.inc()
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                self._update_inflight()
+            call["done"].set()
+
+    def stream(self, key: Hashable, fn: Callable[[], Iterator[str]]) -> Iterator[str]:
+        with self._lock:
+            broadcast = self._streams.get(key)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._streams[key] = _Broadcast()
+                self._update_inflight()
+
+        if leader:
+            self.metrics.flights.inc()
+            broadcast.producer = threading.Thread(
+                target=self._produce, args=(key, broadcast, fn), name="single-flight", daemon=True
+            )
+            broadcast.producer.start()
+        else:
+            self.metrics.coalesced.inc()
+
+        sent = 0
+        while True:
+            with self._cond:
+                while sent == len(broadcast.pieces) and not broadcast.done:
+                    self._cond.wait()
+                pieces = broadcast.pieces[sent:]
+                finished = broadcast.done
+            sent += len(pieces)
+            yield from pieces
+            if finished:
+                if broadcast.error is not None:
+                    raise broadcast.error
+                return
+
+    def _produce(self, key: Hashable, broadcast: _Broadcast, fn):
+        try:
+            for piece in fn():
+                with self._cond:
+                    broadcast.pieces.append(piece)
+                    self._cond.notify_all()
+        except BaseException as e:
+            broadcast.error = e
+        finally:
+            with self._cond:
+                self._streams.pop(key, None)
+                self._update_inflight()
+                broadcast.done = True
+                self._cond.notify_all()
+
+
+class AsyncSingleFlight:
+    """
+    asyncio twin of SingleFlight for asgi.py. The shared run is a task, so a
+    cancelled (disconnected) request does not cancel it for the others.
+    """
+
+    def __init__(self, name: str = "chat"):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        self.metrics = _Metrics(name)
+
+    def _update_inflight(self):
+        self.metrics.inflight.set(len(self._calls) + len(self._streams))
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[object]]):
+        task = self._calls.get(key)
+        if task is not None:
+            self.metrics.coalesced.inc()
+            start = time.perf_counter()
+            try:
+                return await asyncio.shield(task)
+            finally:
+                self.metrics.wait.observe((time.perf_counter() - start) * 1000)
+
+        self.metrics.flights.inc()
+        task = self._calls[key] = asyncio.ensure_future(fn())
+        self._update_inflight()
+
+        def forget(_):
+            self._calls.pop(key, None)
+            self._update_inflight()
+
+        task.add_done_callback(forget)
+        return await asyncio.shield(task)
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.metrics.flights.inc()
+            broadcast = self._streams[key] = _Broadcast(asyncio.Condition())
+            self._update_inflight()
+            broadcast.producer = asyncio.ensure_future(self._produce(key, broadcast, fn))
+        else:
+            self.metrics.coalesced.inc()
+
+        sent = 0
+        while True:
+            async with broadcast.cond:
+                await broadcast.cond.wait_for(lambda: sent < len(broadcast.pieces) or broadcast.done)
+                pieces = broadcast.pieces[sent:]
+                finished = broadcast.done
+            sent += len(pieces)
+            for piece in pieces:
+                yield piece
+            if finished:
+                if broadcast.error is not None:
+                    raise broadcast.error
+                return
+
+    async def _produce(self, key: Hashable, broadcast: _Broadcast, fn):
+        try:
+            async for piece in fn():
+                async with broadcast.cond:
+                    broadcast.pieces.append(piece)
+                    broadcast.cond.notify_all()
+        except BaseException as e:
+            # Cancellation (shutdown) too: subscribers must not see a clean, truncated end
+            broadcast.error = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self._streams.pop(key, None)
+            self._update_inflight()
+            broadcast.done = True
+            # Shielded, so waking the subscribers survives a second cancellation
+            await asyncio.shield(self._notify(broadcast))
+
+    @staticmethod
+    async def _notify(broadcast: _Broadcast):
+        async with broadcast.cond:
+            broadcast.cond.notify_all()
@@ -0,0 +1,48 @@
+# src/startup.py
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from src import metrics
+
+
+class StartupProfile:
+    """
+    Wall-clock time (ms) of each startup component: module imports,
+    database connection, model load, vector store, LLM client...
+    Exported as startup_<step>_ms gauges and served by /ready.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, float] = {}
+        self._start = time.perf_counter()
+        self._last = self._start
+
+    def _record(self, name: str, ms: float):
+        self.steps[name] = self.steps.get(name, 0.0) + ms
+        metrics.gauge(f"startup_{name}_ms", f"startup time of {name}").set(
+            round(self.steps[name], 1)
+        )
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last = time.perf_counter()
+            self._record(name, (self._last - start) * 1000)
+
+    def lap(self, name: str):
+        """Record the time since the previous step/lap (e.g. a block of imports)."""
+        now = time.perf_counter()
+        self._record(name, (now - self._last) * 1000)
+        self._last = now
+
+    def snapshot(self) -> dict:
+        return {name: round(ms, 1) for name, ms in self.steps.items()}
+
+    def report(self, title: str = "Startup profile"):
+        print(f"{title}:")
+        for name, ms in self.steps.items():
+            print(f"   {name:<24} {ms:>9.1f}ms")
@@ -0,0 +1,51 @@
+# src/streaming.py
+import json
+import re
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+
+# Sentence ends: latin punctuation, Devanagari danda, or a newline
+SENTENCE_END = re.compile(r"(?<=[.!?।॥])\s+|\n+")
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events message."""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _split_complete(buffer: str):
+    """Split buffer into (complete sentences, unfinished remainder)."""
+    last_end = None
+    for match in SENTENCE_END.finditer(buffer):
+        last_end = match.end()
+    if not last_end:
+        return "", buffer
+    return buffer[:last_end], buffer[last_end:]
+
+
+def sentence_chunks(tokens: Iterable[str]) -> Iterator[str]:
+    """
+    Re-chunk a token stream into complete sentences (trailing whitespace kept),
+    so each piece can be translated on its own while the LLM keeps generating.
+    """
+    buffer = ""
+    for token in tokens:
+        complete, buffer = _split_complete(buffer + token)
+        if complete:
+            yield complete
+    if buffer.strip():
+        yield buffer
+
+
+async def asentence_chunks(tokens: AsyncIterable[str]) -> AsyncIterator[str]:
+    """Async-iterator version of sentence_chunks()."""
+    buffer = ""
+    async for token in tokens:
+        complete, buffer = _split_complete(buffer + token)
+        if complete:
+            yield complete
+    if buffer.strip():
+        yield buffer
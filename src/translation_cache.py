@@ -0,0 +1,280 @@
+# src/translation_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from src import metrics
+
+
+def normalize_text(text: str) -> str:
+    """Key normalisation: NFC, trimmed, internal whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TranslationMemory:
+    """
+    Two-tier translation cache keyed by (source, target, normalized text).
+      - memory tier: bounded LRU, per process
+      - disk tier:   SQLite file, survives restarts and is shared by workers
+
+    The disk tier is pruned back to max_disk_entries every prune_every
+    written rows rather than on every write, so it may briefly run over.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_memory_entries: int = 5000,
+        max_disk_entries: int = 200000,
+        prune_every: int = 1000,
+    ):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+        self._written = 0  # rows written since the last prune
+        self._memory: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.path = path
+
+        self.memory_hits = metrics.counter(
+            "translation_cache_memory_hits_total", "translation memory-tier hits"
+        )
+        self.disk_hits = metrics.counter(
+            "translation_cache_disk_hits_total", "translation disk-tier hits"
+        )
+        self.misses = metrics.counter(
+            "translation_cache_misses_total", "translation cache misses"
+        )
+        metrics.gauge(
+            "translation_cache_hit_rate", "hits / lookups", fn=self.hit_rate
+        )
+
+        if path:
+            try:
+                self._open(path)
+            except Exception as e:
+                print("[translation_cache] disk tier disabled:", e)
+                self._conn = None
+
+    def _open(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                text TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (source, target, text)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_translations_stored ON translations(stored_at)"
+        )
+        # Last run of once-per-deployment jobs (see claim())
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (name TEXT PRIMARY KEY, ran_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def reopen(self):
+        """New SQLite connection (a connection must not be shared across fork)."""
+        if self.path:
+            self._lock = threading.Lock()
+            try:
+                self._open(self.path)
+            except Exception as e:
+                print("[translation_cache] disk tier disabled:", e)
+                self._conn = None
+
+    # -----------------------------------------------------------------
+    # Lookup / store
+    # -----------------------------------------------------------------
+    def get(
+        self, source: str, target: str, text: str, record: bool = True
+    ) -> Optional[str]:
+        key = (source, target, normalize_text(text))
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                if record:
+                    self.memory_hits.inc()
+                return self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT translation FROM translations "
+                    "WHERE source = ? AND target = ? AND text = ?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    if record:
+                        self.disk_hits.inc()
+                    return row[0]
+
+        if record:
+            self.misses.inc()
+        return None
+
+    def put(self, source: str, target: str, text: str, translation: str):
+        self.put_many([(source, target, text, translation)])
+
+    def put_many(self, items):
+        """Store (source, target, text, translation) tuples in both tiers."""
+        rows = [
+            (src, tgt, normalize_text(text), translation, time.time())
+            for src, tgt, text, translation in items
+            if text and text.strip() and translation
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            for src, tgt, text, translation, _ in rows:
+                self._remember((src, tgt, text), translation)
+
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._written += len(rows)
+                if self._written >= self.prune_every:
+                    self._prune_disk()
+                    self._written = 0
+                self._conn.commit()
+
+    def _remember(self, key, translation: str):
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _prune_disk(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE rowid IN ("
+                "SELECT rowid FROM translations ORDER BY stored_at LIMIT ?)",
+                (overflow,),
+            )
+
+    def claim(self, job: str, every: float) -> bool:
+        """
+        True if this process should run `job` now: at most once per `every`
+        seconds across all workers sharing the disk tier. Without a disk
+        tier every process runs it (its memory tier is its own).
+        """
+        if self._conn is None:
+            return True
+        now = time.time()
+        try:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "INSERT INTO jobs VALUES (?, ?) ON CONFLICT(name) "
+                    "DO UPDATE SET ran_at = excluded.ran_at WHERE ran_at <= ?",
+                    (job, now, now - every),
+                )
+                self._conn.commit()
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            print("[translation_cache] could not claim", job, e)
+            return False
+
+    # -----------------------------------------------------------------
+    # Stats
+    # -----------------------------------------------------------------
+    def hit_rate(self) -> float:
+        hits = self.memory_hits.value + self.disk_hits.value
+        lookups = hits + self.misses.value
+        return round(hits / lookups, 4) if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits.value,
+            "disk_hits": self.disk_hits.value,
+            "misses": self.misses.value,
+            "hit_rate": self.hit_rate(),
+        }
+
+
+# =================================================================
+# PRE-WARMING
+# =================================================================
+def prewarm_from_ui_strings(memory: TranslationMemory, path: str) -> int:
+    """
+    Seed the cache with the curated UI strings in static/translations.json.
+    Every key present in both the "en" dict and a language dict gives a
+    known-good en -> lang (and lang -> en) pair, so no network call is made.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print("[translation_cache] could not read UI strings:", e)
+        return 0
+
+    english = data.get("en", {})
+    items = []
+    for lang, strings in data.items():
+        if lang == "en" or not isinstance(strings, dict):
+            continue
+        for key, translated in strings.items():
+            source_text = english.get(key)
+            if source_text and translated:
+                items.append(("en", lang, source_text, translated))
+                items.append((lang, "en", translated, source_text))
+
+    memory.put_many(items)
+    print(f"[translation_cache] pre-warmed {len(items)} UI string pairs")
+    return len(items)
+
+
+def prewarm_from_history(memory: TranslationMemory, collection, source_stages, translate_fn,
+                         limit=200, days=30, every=3600):
+    """
+    Translate the most frequently asked non-English user messages of the
+    last `days` days to English ahead of time. translate_fn(text, target,
+    source) goes through the cache, so results land in both tiers.
+    source_stages turn `collection` into one document per message (empty
+    for chat_history). Runs in one worker per `every` seconds; the others
+    read its results from the shared disk tier.
+    """
+    if not memory.claim("prewarm_from_history", every):
+        print("[translation_cache] history pre-warm already done by another worker")
+        return 0
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    pipeline = list(source_stages) + [
+        {"$match": {"role": "user", "lang": {"$ne": "en"}, "timestamp": {"$gte": since}}},
+        {"$group": {"_id": {"message": "$message", "lang": "$lang"}, "n": {"$sum": 1}}},
+        {"$sort": {"n": -1}},
+        {"$limit": limit},
+    ]
+    warmed = 0
+    for row in collection.aggregate(pipeline):
+        message, lang = row["_id"].get("message"), row["_id"].get("lang")
+        if not message or memory.get(lang, "en", message, record=False) is not None:
+            continue
+        translate_fn(message, "en", lang)
+        warmed += 1
+
+    print(f"[translation_cache] pre-warmed {warmed} frequent history messages")
+    return warmed
@@ -1,16 +1,223 @@
 # src/translator.py
 from deep_translator import LibreTranslator, MyMemoryTranslator, GoogleTranslator
-from typing import Optional
-import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, List, Optional
+import os
+import threading
+import time
+
+from src import metrics
 
 # Supported front-end language codes
 SUPPORTED_LANGS = {"en", "hi", "ta", "te"}
 
-def translate_text(text: str, src_lang: str, tgt_lang: str) -> str:
+# Start the next provider if the current one hasn't answered after this many
+# seconds. Set TRANSLATOR_HEDGE_AFTER=off to try providers strictly in order.
+_hedge_env = os.getenv("TRANSLATOR_HEDGE_AFTER", "1.5")
+HEDGE_AFTER: Optional[float] = None if _hedge_env == "off" else float(_hedge_env)
+
+# Circuit breaker: skip a provider for BREAKER_COOLDOWN seconds after
+# BREAKER_THRESHOLD consecutive failures, then let one trial call through.
+BREAKER_THRESHOLD = int(os.getenv("TRANSLATOR_BREAKER_THRESHOLD", 3))
+BREAKER_COOLDOWN = float(os.getenv("TRANSLATOR_BREAKER_COOLDOWN", 60))
+
+# Batch packing: strings joined by newlines into one request of at most
+# BATCH_MAX_CHARS (or the largest provider limit, if that is smaller).
+# Providers with a smaller max_chars (MyMemory: 500) sit out bigger batches.
+BATCH_MAX_CHARS = 4500
+BATCH_SEPARATOR = "\n"
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="translator")
+
+
+# =================================================================
+# PROVIDERS
+# =================================================================
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures; open -> half-open
+    once `cooldown` has passed. Half-open lets exactly one probe call
+    through and rejects every other call until that probe succeeds (closed)
+    or fails (open again). allow() must only be called right before the
+    call it admits is actually made.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.state = self.CLOSED
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN  # this caller is the probe
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+            self.opened_at = None
+
+    def failure(self) -> bool:
+        """Record a failure; returns True if this failure opened the breaker."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= self.threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class Provider:
+    """
+    A named translation backend. `factory(src, tgt)` must return an object
+    with a `.translate(text)` method (every deep_translator class does),
+    which keeps stub providers for local testing trivial to write.
+    `max_chars` mirrors the backend's input limit, so over-long requests
+    are never sent (and never count against its breaker).
+    """
+
+    def __init__(self, name: str, factory: Callable, max_chars: Optional[int] = None):
+        self.name = name
+        self.factory = factory
+        self.max_chars = max_chars  # texts must be shorter than this (None = no limit)
+        self.breaker = CircuitBreaker()
+
+    def accepts(self, text_length: int) -> bool:
+        return self.max_chars is None or text_length < self.max_chars
+
+    def translate(self, text: str, src: str, tgt: str) -> str:
+        return self.factory(src, tgt).translate(text)
+
+
+def _libre_factory(src, tgt):
+    custom_url = os.getenv("LIBRETRANSLATE_URL")
+    if custom_url:
+        return LibreTranslator(source=src, target=tgt, custom_url=custom_url, use_free_api=False)
+    return LibreTranslator(source=src, target=tgt)
+
+
+# Default failover order: LibreTranslate -> MyMemory -> Google
+# (max_chars as enforced by deep_translator: MyMemory 500, Google 5000)
+PROVIDERS: List[Provider] = [
+    Provider("LibreTranslate", _libre_factory),
+    Provider("MyMemory", lambda src, tgt: MyMemoryTranslator(source=src, target=tgt), max_chars=500),
+    # GoogleTranslator usually handles Tamil best
+    Provider(
+        "GoogleTranslator", lambda src, tgt: GoogleTranslator(source=src, target=tgt), max_chars=5000
+    ),
+]
+
+
+# =================================================================
+# FAILOVER / HEDGING
+# =================================================================
+def _call_provider(provider: Provider, call: Callable, is_good: Callable):
+    """Run one provider call, updating its breaker. Returns result or None."""
+    try:
+        result = call(provider)
+    except Exception as e:
+        print(f"[translator] {provider.name} failed: {e}")
+        result = None
+
+    if result is not None and is_good(result):
+        provider.breaker.success()
+        metrics.counter(f"translator_{provider.name.lower()}_success_total").inc()
+        return result
+
+    metrics.counter(f"translator_{provider.name.lower()}_failure_total").inc()
+    if provider.breaker.failure():
+        print(f"[translator] circuit opened for {provider.name}")
+        metrics.counter("translator_breaker_opened_total").inc()
+    return None
+
+
+def _run_with_failover(call, is_good, providers=None, hedge_after=HEDGE_AFTER, text_length=0):
+    """
+    Try providers in order until one returns a good result.
+    With hedge_after set, the next provider is also started when the
+    current one is slower than hedge_after seconds; first good result wins.
+    A provider's breaker is asked right before it is started, so skipped
+    providers never take a half-open probe; providers whose max_chars is
+    too small for text_length are skipped without counting a failure.
+    """
+    queue = [p for p in (providers or PROVIDERS) if p.accepts(text_length)]
+
+    def next_allowed() -> Optional[Provider]:
+        while queue:
+            provider = queue.pop(0)
+            if provider.breaker.allow():
+                return provider
+        return None
+
+    if hedge_after is None:
+        provider = next_allowed()
+        while provider is not None:
+            result = _call_provider(provider, call, is_good)
+            if result is not None:
+                return result, provider
+            provider = next_allowed()
+        return None, None
+
+    pending = {}
+
+    def launch_next() -> bool:
+        provider = next_allowed()
+        if provider is None:
+            return False
+        future = _executor.submit(_call_provider, provider, call, is_good)
+        pending[future] = provider
+        return True
+
+    launch_next()
+    while pending:
+        done, _ = wait(pending, timeout=hedge_after, return_when=FIRST_COMPLETED)
+        if not done:
+            # Current providers are slow: hedge with the next one
+            if launch_next():
+                metrics.counter("translator_hedged_total").inc()
+            continue
+
+        for future in done:
+            provider = pending.pop(future)
+            result = future.result()
+            if result is not None:
+                return result, provider
+            # A failure starts the next provider straight away
+            launch_next()
+    return None, None
+
+
+def _changed(text: str) -> Callable[[str], bool]:
+    return lambda t: bool(t) and t.strip() != text.strip()
+
+
+# =================================================================
+# PUBLIC API
+# =================================================================
+def translate_text(
+    text: str,
+    src_lang: str,
+    tgt_lang: str,
+    providers: Optional[List[Provider]] = None,
+    hedge_after: Optional[float] = HEDGE_AFTER,
+) -> str:
     """
     Translate text from src_lang -> tgt_lang.
-    Tries: LibreTranslate -> MyMemory -> GoogleTranslator.
-    Returns original text on failure.
+    Tries: LibreTranslate -> MyMemory -> GoogleTranslator (hedged, with
+    circuit breakers). Returns original text on failure.
     """
     if not text:
         return text
@@ -24,35 +231,115 @@ def translate_text(text: str, src_lang: str, tgt_lang: str) -> str:
 
     print(f"[translator] Translating from {src} -> {tgt}")
 
-    # 1️⃣ Try LibreTranslate (public instance)
-    try:
-        t = LibreTranslator(source=src, target=tgt).translate(text)
-        if t and t.strip() != text.strip():
-            print("[translator] ✅ LibreTranslate success")
-            return t
-    except Exception as e:
-        print(f"[translator] LibreTranslate failed: {e}")
-        traceback.print_exc(limit=1)
-
-    # 2️⃣ Fallback: MyMemoryTranslator
-    try:
-        t = MyMemoryTranslator(source=src, target=tgt).translate(text)
-        if t and t.strip() != text.strip():
-            print("[translator] ✅ MyMemory success")
-            return t
-    except Exception as e:
-        print(f"[translator] MyMemory failed: {e}")
-        traceback.print_exc(limit=1)
-
-    # 3️⃣ Fallback: GoogleTranslator (usually handles Tamil best)
-    try:
-        t = GoogleTranslator(source=src, target=tgt).translate(text)
-        if t and t.strip() != text.strip():
-            print("[translator] ✅ GoogleTranslator success")
-            return t
-    except Exception as e:
-        print(f"[translator] GoogleTranslator failed: {e}")
-        traceback.print_exc(limit=1)
+    result, provider = _run_with_failover(
+        lambda p: p.translate(text, src, tgt), _changed(text), providers, hedge_after, len(text)
+    )
+    if result is not None:
+        print(f"[translator] ✅ {provider.name} success")
+        return result
 
     print("[translator] ⚠️ All translators failed — returning original text")
     return text
+
+
+def _batch_limits(providers: Optional[List[Provider]] = None) -> List[int]:
+    """Joined batch sizes to try, largest first: one per provider size class."""
+    return sorted({
+        BATCH_MAX_CHARS if p.max_chars is None else min(BATCH_MAX_CHARS, p.max_chars - 1)
+        for p in (providers or PROVIDERS)
+    }, reverse=True)
+
+
+def batch_max_chars(providers: Optional[List[Provider]] = None) -> int:
+    """Largest joined batch some provider accepts (capped at BATCH_MAX_CHARS)."""
+    return _batch_limits(providers)[0]
+
+
+def _pack(texts: List[str], max_chars: int = BATCH_MAX_CHARS) -> List[List[int]]:
+    """Group indices of packable texts into batches of at most max_chars when joined."""
+    batches, current, size = [], [], 0
+    for i, text in enumerate(texts):
+        length = len(text) + len(BATCH_SEPARATOR)
+        # size counts one separator too many, so the joined batch is size - 1 chars
+        if current and size + length - len(BATCH_SEPARATOR) > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+
+def translate_many(
+    texts: List[str],
+    src_lang: str,
+    tgt_lang: str,
+    providers: Optional[List[Provider]] = None,
+    hedge_after: Optional[float] = HEDGE_AFTER,
+) -> List[str]:
+    """
+    Translate several strings with as few provider requests as possible.
+    Single-line strings are packed newline-separated into one request per
+    batch, sent only to providers whose max_chars fits it; a batch none of
+    them answers is re-packed for the providers with smaller limits. If a
+    reply doesn't have the same number of lines (the provider merged or
+    split some), that batch falls back to one translate_text call per string.
+    """
+    src = (src_lang or "en").lower()
+    tgt = (tgt_lang or "en").lower()
+    results = list(texts)
+    if src == tgt:
+        return results
+
+    limits = _batch_limits(providers)
+    packable, singles = [], []
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            continue
+        if BATCH_SEPARATOR in text or len(text) > limits[0]:
+            singles.append(i)
+        else:
+            packable.append(i)
+
+    # Batches no provider answered are re-packed for the next smaller providers
+    groups = [(packable, 0)]
+    while groups:
+        group, level = groups.pop(0)
+        for batch in _pack([texts[i] for i in group], limits[level]):
+            indices = [group[j] for j in batch]
+            joined = BATCH_SEPARATOR.join(texts[i] for i in indices)
+            translated, provider = _run_with_failover(
+                lambda p, joined=joined: p.translate(joined, src, tgt),
+                _changed(joined),
+                providers,
+                hedge_after,
+                len(joined),
+            )
+            if translated is None:
+                if level + 1 < len(limits) and len(joined) > limits[level + 1]:
+                    fits = [i for i in indices if len(texts[i]) <= limits[level + 1]]
+                    singles.extend(i for i in indices if i not in fits)
+                    groups.append((fits, level + 1))
+                else:
+                    singles.extend(indices)
+                continue
+
+            lines = translated.split(BATCH_SEPARATOR)
+            if len(lines) != len(indices):
+                # A reply with merged or split lines is not a provider failure
+                print(
+                    f"[translator] {provider.name} batch returned {len(lines)} lines, "
+                    f"expected {len(indices)}"
+                )
+                metrics.counter("translator_batch_mismatch_total").inc()
+                singles.extend(indices)
+                continue
+
+            print(f"[translator] ✅ {provider.name} batch of {len(indices)}")
+            for i, line in zip(indices, lines):
+                results[i] = line.strip() or texts[i]
+
+    for i in sorted(singles):
+        results[i] = translate_text(texts[i], src, tgt, providers, hedge_after)
+    return results
@@ -0,0 +1,162 @@
+# src/upsert_pipeline.py
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+from langchain.schema import Document
+
+
+class UpsertCheckpoint:
+    """
+    Append-only log of chunk ids whose vectors are already upserted, so an
+    interrupted upload resumes where it stopped. One JSON list per line
+    (one completed batch); a torn last line is ignored.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.done.update(json.loads(line))
+                    except ValueError:
+                        continue
+
+    def mark(self, ids: Sequence[str]):
+        with self._lock:
+            self.done.update(ids)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(list(ids)) + "\n")
+
+    def clear(self):
+        """Call once the run is recorded elsewhere (the index manifest)."""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class UpsertStats:
+    def __init__(self, total: int, skipped: int):
+        self.total = total
+        self.skipped = skipped
+        self.upserted = 0
+        self.embed_seconds = 0.0
+        self.upsert_seconds = 0.0
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, count: int, seconds: float):
+        with self._lock:
+            self.upserted += count
+            self.upsert_seconds += seconds
+
+    def rate(self) -> float:
+        return self.upserted / max(time.perf_counter() - self.start, 1e-9)
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start
+        print(
+            f"Upserted {self.upserted}/{self.total - self.skipped} vectors in {elapsed:.1f}s "
+            f"({self.rate():.1f} vectors/sec; embed {self.embed_seconds:.1f}s, "
+            f"upsert {self.upsert_seconds:.1f}s across workers"
+            + (f"; {self.skipped} resumed from checkpoint)" if self.skipped else ")")
+        )
+
+
+def upsert_in_batches(
+    chunks: List[Document],
+    ids: List[str],
+    embed_documents: Callable[[List[str]], List[List[float]]],
+    upsert: Callable[[List[str], List[List[float]], List[Document]], None],
+    batch_size: int = 100,
+    workers: int = 4,
+    queue_size: int = 8,
+    checkpoint: Optional[UpsertCheckpoint] = None,
+    retries: int = 3,
+    backoff: float = 1.0,
+) -> UpsertStats:
+    """
+    Embed chunks batch by batch in the calling thread and upsert them from
+    `workers` threads through a bounded queue, so embedding the next batch
+    overlaps the network round trips of the previous ones (and embedding
+    pauses when the queue is full instead of piling up vectors in memory).
+
+    Batches already in the checkpoint are skipped; each upserted batch is
+    added to it. Raises RuntimeError if a batch still fails after `retries`
+    attempts; the batches upserted so far stay checkpointed.
+    """
+    checkpoint = checkpoint or UpsertCheckpoint(None)
+    pending = [(cid, chunk) for cid, chunk in zip(ids, chunks) if cid not in checkpoint.done]
+    stats = UpsertStats(total=len(ids), skipped=len(ids) - len(pending))
+    if stats.skipped:
+        print(f"Resuming: {stats.skipped} vectors already upserted, {len(pending)} to go")
+
+    work: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    failed = threading.Event()
+    errors = []
+
+    def consume():
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            if failed.is_set():
+                continue  # keep draining so the producer never blocks
+            batch_ids, vectors, batch_chunks = item
+            delay = backoff
+            for attempt in range(1, retries + 1):
+                start = time.perf_counter()
+                try:
+                    upsert(batch_ids, vectors, batch_chunks)
+                except Exception as e:
+                    if attempt == retries:
+                        errors.append(e)
+                        failed.set()
+                        break
+                    print(f"   upsert attempt {attempt} failed ({e}); retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    delay *= 2
+                    continue
+                stats.add(len(batch_ids), time.perf_counter() - start)
+                checkpoint.mark(batch_ids)
+                break
+
+    threads = [
+        threading.Thread(target=consume, name=f"upsert-{i}", daemon=True) for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for i in range(0, len(pending), batch_size):
+            if failed.is_set():
+                break
+            batch = pending[i:i + batch_size]
+            start = time.perf_counter()
+            vectors = embed_documents([chunk.page_content for _, chunk in batch])
+            stats.embed_seconds += time.perf_counter() - start
+            work.put(([cid for cid, _ in batch], vectors, [chunk for _, chunk in batch]))
+
+            done = i + len(batch)
+            if (i // batch_size) % 10 == 9 or done == len(pending):
+                print(f"   embedded {done}/{len(pending)}, upserted {stats.upserted} "
+                      f"({stats.rate():.1f} vectors/sec)")
+    finally:
+        for _ in threads:
+            work.put(None)
+        for thread in threads:
+            thread.join()
+
+    stats.report()
+    if errors:
+        raise RuntimeError(
+            f"upsert failed after {retries} attempts ({errors[0]}); "
+            "re-run to resume from the checkpoint"
+        )
+    return stats
@@ -0,0 +1,170 @@
+# src/wiki_cache.py
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
+
+from langchain.schema import Document
+
+
+class WikiCache:
+    """
+    Local, content-addressed cache of Wikipedia articles for store_index.py.
+
+    Articles are stored once under objects/<sha256 of the article>.json and
+    topics.json maps every topic to its article hashes and fetch time, so
+    a rebuild (or a CI run without network) replays topics from disk and
+    only topics older than refresh_older_than are fetched again. Fetches run
+    in a bounded thread pool with retry and exponential backoff; a topic
+    whose fetch keeps failing falls back to its cached (stale) articles.
+    """
+
+    def __init__(self, cache_dir: str = "cache/wikipedia", max_docs: int = 3,
+                 workers: int = 8, retries: int = 3, backoff: float = 1.0):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.index_path = os.path.join(cache_dir, "topics.json")
+        self.max_docs = max_docs
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.topics = self._load_index()
+
+    # ================================================================
+    # PUBLIC API
+    # ================================================================
+    def iter_documents(self, topics: List[str], refresh_older_than: Optional[float] = None,
+                       offline: bool = False) -> Iterator[Document]:
+        """
+        Yield the articles of every topic, in topic order. Topics missing from
+        the cache, or fetched more than refresh_older_than seconds ago, are
+        fetched (in parallel) first; offline=True only replays the cache.
+        """
+        stale = [] if offline else [t for t in topics if self.is_stale(t, refresh_older_than)]
+        cached = sum(1 for t in topics if t in self.topics and t not in stale)
+        print(
+            f"   Wikipedia: {cached} topics from cache, "
+            f"{len(stale)} to fetch ({self.workers} workers)"
+        )
+        fetched = self.fetch_many(stale)
+
+        for topic in topics:
+            if topic in fetched:
+                yield from fetched[topic]
+            elif topic in self.topics:
+                yield from self.load_topic(topic)
+            else:
+                print(f"   Wikipedia: no articles for '{topic}' (not cached)")
+
+    def is_stale(self, topic: str, refresh_older_than: Optional[float] = None) -> bool:
+        entry = self.topics.get(topic)
+        if entry is None or entry.get("max_docs") != self.max_docs:
+            return True
+        if refresh_older_than is None:
+            return False
+        return time.time() - entry["fetched_at"] >= refresh_older_than
+
+    def fetch_many(self, topics: List[str]) -> Dict[str, List[Document]]:
+        """Fetch topics in parallel and cache them; returns topic -> articles."""
+        if not topics:
+            return {}
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._fetch_with_retry, topic): topic for topic in topics}
+            for future in as_completed(futures):
+                topic = futures[future]
+                try:
+                    docs = future.result()
+                except Exception as e:
+                    print(f"   Wikipedia: '{topic}' failed ({e}); using cached copy if any")
+                    continue
+                self.store_topic(topic, docs)
+                results[topic] = docs
+                print(f"   Loaded {len(docs)} Wikipedia documents for '{topic}'")
+        self._save_index()
+        return results
+
+    # ================================================================
+    # FETCH
+    # ================================================================
+    def _fetch_with_retry(self, topic: str) -> List[Document]:
+        # The wikipedia package is only needed when something is fetched
+        from langchain_community.document_loaders import WikipediaLoader
+
+        delay = self.backoff
+        for attempt in range(1, self.retries + 1):
+            try:
+                return WikipediaLoader(query=topic, load_max_docs=self.max_docs).load()
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                print(
+                    f"   Wikipedia: '{topic}' attempt {attempt} failed ({e}); "
+                    f"retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                delay *= 2
+
+    # ================================================================
+    # STORAGE
+    # ================================================================
+    def store_topic(self, topic: str, docs: List[Document]):
+        digests = []
+        for doc in docs:
+            data = json.dumps(
+                {"page_content": doc.page_content, "metadata": doc.metadata},
+                sort_keys=True, ensure_ascii=False,
+            )
+            digest = hashlib.sha256(data.encode("utf-8")).hexdigest()
+            path = os.path.join(self.objects_dir, f"{digest}.json")
+            if not os.path.exists(path):  # same article under another topic or run
+                _atomic_write(path, data)
+            digests.append(digest)
+        self.topics[topic] = {
+            "fetched_at": time.time(), "max_docs": self.max_docs, "objects": digests,
+        }
+
+    def load_topic(self, topic: str) -> List[Document]:
+        docs = []
+        for digest in self.topics.get(topic, {}).get("objects", []):
+            path = os.path.join(self.objects_dir, f"{digest}.json")
+            try:
+                with open(path, encoding="utf-8") as f:
+                    item = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"   Wikipedia cache: unreadable article for '{topic}': {e}")
+                continue
+            docs.append(Document(page_content=item["page_content"], metadata=item["metadata"]))
+        return docs
+
+    def _load_index(self) -> dict:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print("Wikipedia cache index unreadable, starting empty:", e)
+            return {}
+
+    def _save_index(self):
+        _atomic_write(self.index_path, json.dumps(self.topics, indent=1, ensure_ascii=False))
+
+
+def _atomic_write(path: str, data: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def parse_age(value: str) -> float:
+    """'90' (seconds), '30m', '12h' or '7d' -> seconds; for --refresh-older-than."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
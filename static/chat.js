@@ -94,6 +94,8 @@
       activeConversationId: null,
       conversationToDelete: null,
       typingMarker: null,
+      olderCursor: null, // next_cursor of the oldest loaded page
+      loadingOlder: false,
     };
 
     // ================================================================
@@ -114,7 +116,7 @@
         );
       },
 
-      addMessage(kind, html, shouldScroll = true) {
+      addMessage(kind, html, shouldScroll = true, prepend = false) {
         const wrapper = document.createElement("div");
         wrapper.className = `msg ${kind === "user" ? "user" : "bot"}`;
 
@@ -122,7 +124,11 @@
         bubble.className = `bubble${kind === "user" ? " user" : ""}`;
         bubble.innerHTML = html;
         wrapper.appendChild(bubble);
-        DOM.messages.appendChild(wrapper);
+        if (prepend) {
+          DOM.messages.insertBefore(wrapper, DOM.messages.firstChild);
+        } else {
+          DOM.messages.appendChild(wrapper);
+        }
 
         if (shouldScroll) {
           DOM.messages.scrollTop = DOM.messages.scrollHeight;
@@ -327,6 +333,7 @@
 
       async load(id = null) {
         DOM.messages.innerHTML = "";
+        state.olderCursor = null;
 
         if (id === state.activeConversationId) {
           Utils.addSystemMessage(
@@ -355,19 +362,14 @@
         }
 
         try {
-          const res = await fetch(`/conversation/${id}`);
+          const res = await fetch(`/conversation/${id}?fields=role,message`);
           if (!res.ok) throw new Error("Failed to load");
           const data = await res.json();
 
-          data.messages.forEach((msg) => {
-            const content =
-              msg.role === "bot"
-                ? marked.parse(msg.message || "")
-                : Utils.escapeHtml(msg.message || "");
-            Utils.addMessage(msg.role, content, false);
-          });
+          data.messages.forEach((msg) => Conversation.renderMessage(msg));
 
           state.activeConversationId = data.conversation_id;
+          state.olderCursor = data.next_cursor;
           DOM.messages.scrollTop = DOM.messages.scrollHeight;
 
           const firstMsg = data.messages[0]?.message || "";
@@ -389,6 +391,44 @@
         }
       },
 
+      renderMessage(msg, prepend = false) {
+        const content =
+          msg.role === "bot"
+            ? marked.parse(msg.message || "")
+            : Utils.escapeHtml(msg.message || "");
+        Utils.addMessage(msg.role, content, false, prepend);
+      },
+
+      // Fetch the page before the oldest rendered message and keep the view in place
+      async loadOlder() {
+        const id = state.activeConversationId;
+        if (!id || !state.olderCursor || state.loadingOlder) return;
+        state.loadingOlder = true;
+
+        try {
+          const res = await fetch(
+            `/conversation/${id}?fields=role,message&before=${encodeURIComponent(
+              state.olderCursor
+            )}`
+          );
+          if (!res.ok) throw new Error("Failed to load");
+          const data = await res.json();
+          if (state.activeConversationId !== id) return;
+
+          const previousHeight = DOM.messages.scrollHeight;
+          data.messages
+            .slice()
+            .reverse()
+            .forEach((msg) => Conversation.renderMessage(msg, true));
+          DOM.messages.scrollTop += DOM.messages.scrollHeight - previousHeight;
+          state.olderCursor = data.next_cursor;
+        } catch (err) {
+          console.error("Load older messages error:", err);
+        } finally {
+          state.loadingOlder = false;
+        }
+      },
+
       async toggleHistoryList(e) {
         e.preventDefault();
         let container = document.getElementById("historyListContainer");
@@ -406,8 +446,7 @@
         DOM.historyLink.insertAdjacentElement("afterend", container);
 
         try {
-          const res = await fetch("/conversations");
-          const { conversations = [] } = await res.json();
+          const { conversations = [], next_cursor } = await Conversation.fetchPage(null);
 
           if (!conversations.length) {
             container.innerHTML = `
@@ -417,47 +456,84 @@
             return;
           }
 
-          conversations.forEach((conv) => {
-            const row = document.createElement("div");
-            row.className = "history-item-row";
-            row.innerHTML = `
+          conversations.forEach((conv) => Conversation.appendRow(container, conv));
+          Conversation.watchForMore(container, next_cursor);
+        } catch (err) {
+          console.error("History Fetch Error:", err);
+          container.innerHTML = `
+        <span style="padding:6px;color:red;">
+          ${Conversation.t("msg_error_loading_history", "Error loading history.")}
+        </span>`;
+        }
+      },
+
+      async fetchPage(cursor) {
+        const url = cursor
+          ? `/conversations?cursor=${encodeURIComponent(cursor)}`
+          : "/conversations";
+        const res = await fetch(url);
+        if (!res.ok) throw new Error("Failed to load history");
+        return res.json();
+      },
+
+      appendRow(container, conv) {
+        const row = document.createElement("div");
+        row.className = "history-item-row";
+        row.innerHTML = `
           <a href="#" class="sidebar-link history-item" data-id="${conv.id}">
             <i class="bi bi-chat-text"></i>
             <span>${Utils.escapeHtml(conv.title)}...</span>
           </a>
           <button class="delete-chat-btn" data-id="${conv.id}" title="${Conversation.t(
-              "btn_delete",
-              "Delete"
-            )}">
+            "btn_delete",
+            "Delete"
+          )}">
             <i class="bi bi-trash"></i>
           </button>
         `;
 
-            row.querySelector(".history-item").onclick = (ev) => {
-              ev.preventDefault();
-              DOM.sidebar.classList.remove("open");
-              Conversation.load(conv.id);
-            };
+        row.querySelector(".history-item").onclick = (ev) => {
+          ev.preventDefault();
+          DOM.sidebar.classList.remove("open");
+          Conversation.load(conv.id);
+        };
 
-            row.querySelector(".delete-chat-btn").onclick = (ev) => {
-              ev.stopPropagation();
-              state.conversationToDelete = { id: conv.id, row };
-              DOM.deleteModal.classList.remove("hidden");
-            };
+        row.querySelector(".delete-chat-btn").onclick = (ev) => {
+          ev.stopPropagation();
+          state.conversationToDelete = { id: conv.id, row };
+          DOM.deleteModal.classList.remove("hidden");
+        };
 
-            container.appendChild(row);
-          });
-        } catch (err) {
-          console.error("History Fetch Error:", err);
-          container.innerHTML = `
-        <span style="padding:6px;color:red;">
-          ${Conversation.t("msg_error_loading_history", "Error loading history.")}
-        </span>`;
-        }
+        container.appendChild(row);
+      },
+
+      // Older conversations are fetched page by page when the end of the list scrolls into view
+      watchForMore(container, cursor) {
+        if (!cursor) return;
+        const sentinel = document.createElement("div");
+        sentinel.className = "history-list-sentinel";
+        container.appendChild(sentinel);
+
+        const observer = new IntersectionObserver(async (entries) => {
+          if (!entries[0].isIntersecting) return;
+          observer.disconnect();
+          sentinel.remove();
+          try {
+            const { conversations = [], next_cursor } = await Conversation.fetchPage(cursor);
+            conversations.forEach((conv) => Conversation.appendRow(container, conv));
+            Conversation.watchForMore(container, next_cursor);
+          } catch (err) {
+            console.error("History Fetch Error:", err);
+          }
+        });
+        observer.observe(sentinel);
       },
 
       init() {
         DOM.newChatBtn?.addEventListener("click", () => this.load(null));
+        DOM.messages.addEventListener("scroll", () => {
+          if (DOM.messages.scrollTop < 80) this.loadOlder();
+        });
         DOM.historyLink?.addEventListener("click", (e) =>
           Conversation.toggleHistoryList(e)
         );
@@ -514,10 +590,26 @@
           data.append("msg", text);
           data.append("lang", currentLang);
 
-          const res = await fetch("/get", { method: "POST", body: data });
-          const response = await res.text();
-          Utils.hideTyping();
-          Utils.addMessage("bot", marked.parse(response || "No response"));
+          const res = await fetch("/get/stream", { method: "POST", body: data });
+          if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+          // Render tokens / translated sentences as they arrive
+          let botMsg = null;
+          let response = "";
+          await this.readStream(res, (token) => {
+            if (!botMsg) {
+              Utils.hideTyping();
+              botMsg = Utils.addMessage("bot", "");
+            }
+            response += token;
+            botMsg.querySelector(".bubble").innerHTML = marked.parse(response);
+            DOM.messages.scrollTop = DOM.messages.scrollHeight;
+          });
+
+          if (!botMsg) {
+            Utils.hideTyping();
+            Utils.addMessage("bot", marked.parse("No response"));
+          }
 
           // Refresh history if new conversation started
           if (
@@ -537,6 +629,31 @@
         }
       },
 
+      // Parse a Server-Sent Events body, calling onToken for each data.token
+      async readStream(res, onToken) {
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+
+          const events = buffer.split("\n\n");
+          buffer = events.pop();
+
+          events.forEach((evt) => {
+            const dataLine = evt
+              .split("\n")
+              .find((line) => line.startsWith("data: "));
+            if (!dataLine) return;
+            const payload = JSON.parse(dataLine.slice(6));
+            if (typeof payload.token === "string") onToken(payload.token);
+          });
+        }
+      },
+
       async upload(file) {
         if (!file) return;
         Utils.addMessage(
@@ -602,6 +719,7 @@
     const News = {
       async show() {
         DOM.messages.innerHTML = "";
+        state.olderCursor = null;
 
         const header = document.createElement("div");
         header.style.padding = "12px 8px";
@@ -1,4 +1,8 @@
+import argparse
+import hashlib
+import json
 import os
+import time
 from dotenv import load_dotenv
 
 # LangChain + Pinecone
@@ -6,10 +10,16 @@ from pinecone import Pinecone, ServerlessSpec
 from langchain_pinecone import PineconeVectorStore
 
 # Local helpers
+from src.local_index import LocalVectorStore
+from src.lexical_index import BM25Index
+from src.wiki_cache import WikiCache, parse_age
+from src.upsert_pipeline import UpsertCheckpoint, upsert_in_batches
+from src.chunking import SectionChunker, NearDuplicateFilter
 from src.helper import (
-    load_pdf_and_wiki_data,
-    filter_to_minimal_docs,
-    text_split,
+    iter_pdf_pages,
+    dedupe_pages,
+    iter_minimal_docs,
+    iter_text_chunks,
     download_hugging_face_embeddings
 )
 
@@ -19,14 +29,23 @@ from src.helper import (
 # =================================================================
 load_dotenv()
 
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-if not PINECONE_API_KEY:
-    raise RuntimeError("PINECONE_API_KEY not found in .env")
+# "pinecone" (managed index) or "local" (in-process matrix, see src/local_index.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "vector_index")
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32")  # float32 | float16
+LOCAL_INDEX_MODE = os.getenv("LOCAL_INDEX_MODE", "exact")      # exact | hnsw
 
-os.environ["PINECONE_API_KEY"] = PINECONE_API_KEY
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+if VECTOR_BACKEND == "pinecone":
+    if not PINECONE_API_KEY:
+        raise RuntimeError("PINECONE_API_KEY not found in .env")
+    os.environ["PINECONE_API_KEY"] = PINECONE_API_KEY
 
 # Index configuration
 INDEX_NAME = "medical-chatbot-pdf-wiki"
+# Data-plane URL of the index; set it to skip the control plane (e.g. a local
+# fake server: python benchmarks/fake_vector_server.py)
+PINECONE_INDEX_HOST = os.getenv("PINECONE_INDEX_HOST")
 DIMENSION = 384  # paraphrase-multilingual-MiniLM-L12-v2
 METRIC = "cosine"
 CLOUD = "aws"
@@ -43,38 +62,112 @@ TOPICS = [
 ]
 
 PDF_DATA_PATH = "data/"  # Folder containing medical PDFs
+PDF_WORKERS = int(os.getenv("INGEST_PDF_WORKERS", 0)) or None  # default: one per CPU
+
+# Raw Wikipedia articles are cached on disk; only missing/stale topics are fetched
+WIKI_CACHE_DIR = os.getenv("WIKI_CACHE_DIR", "cache/wikipedia")
+WIKI_WORKERS = int(os.getenv("WIKI_WORKERS", 8))
+
+# "recursive": fixed 500-char windows (RecursiveCharacterTextSplitter)
+# "section": whole sentences within one section, tagged with metadata["section"]
+CHUNKER = os.getenv("CHUNKER", "recursive")
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 500))  # section chunker only
+# Drop chunks at least this Jaccard-similar to an earlier chunk (0 = off)
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", 0))
+
+# BM25 index of every chunk for RETRIEVAL_MODE=hybrid (empty = don't build)
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "lexical_index")
+
+# Manifest of what is already in the index (source -> chunk ids)
+MANIFEST_PATH = os.getenv("INDEX_MANIFEST_PATH", f"index_manifest.{VECTOR_BACKEND}.json")
+
+# Pinecone upload: embed UPSERT_BATCH_SIZE chunks at a time while
+# UPSERT_WORKERS threads upsert earlier batches; finished batches are logged
+# in the checkpoint so an interrupted upload resumes
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", 100))
+UPSERT_WORKERS = int(os.getenv("UPSERT_WORKERS", 4))
+UPSERT_QUEUE = int(os.getenv("UPSERT_QUEUE", 8))
+UPSERT_CHECKPOINT_PATH = os.getenv(
+    "UPSERT_CHECKPOINT_PATH", f"upsert_checkpoint.{VECTOR_BACKEND}.jsonl"
+)
 
 
 # =================================================================
 # 2. LOAD DOCUMENTS (PDFs + Wikipedia)
 # =================================================================
-def load_all_documents():
-    """Load and combine medical PDFs + Wikipedia articles for all topics"""
-    all_docs = []
+def iter_all_documents(refresh_older_than=None, offline=False):
+    """
+    Yield medical PDF pages (parsed once, in parallel, de-duplicated)
+    followed by the Wikipedia articles for every topic (from the local
+    cache; missing or stale topics are fetched in parallel first).
+    """
     print("Starting document loading (PDFs + Wikipedia)...")
 
-    for topic in TOPICS:
-        print(f"   Loading: {topic}")
-        docs = load_pdf_and_wiki_data(pdf_path=PDF_DATA_PATH, topic=topic)
-        all_docs.extend(docs)
+    print(f"   Parsing PDFs in '{PDF_DATA_PATH}' once...")
+    yield from dedupe_pages(iter_pdf_pages(PDF_DATA_PATH, max_workers=PDF_WORKERS))
 
-    print(f"Total raw documents loaded: {len(all_docs)}")
-    return all_docs
+    wiki = WikiCache(WIKI_CACHE_DIR, workers=WIKI_WORKERS)
+    yield from wiki.iter_documents(TOPICS, refresh_older_than=refresh_older_than, offline=offline)
 
 
 # =================================================================
 # 3. PROCESS DOCUMENTS
 # =================================================================
-def process_documents(raw_docs):
-    """Filter metadata and split into chunks"""
-    print("Filtering document metadata...")
-    filtered = filter_to_minimal_docs(raw_docs)
-    print(f"Documents after cleanup: {len(filtered)}")
-
-    print("Splitting into chunks...")
-    chunks = text_split(filtered)
-    print(f"Created {len(chunks)} text chunks")
-    return chunks
+class IngestStats:
+    """Counts pages/chunks flowing through the pipeline and reports rates"""
+
+    def __init__(self):
+        self.pages = 0
+        self.chunks = 0
+        self.chars = 0
+        self.near_duplicates = None
+        self.start = time.perf_counter()
+
+    def count_pages(self, docs):
+        for doc in docs:
+            self.pages += 1
+            yield doc
+
+    def count_chunks(self, chunks):
+        for chunk in chunks:
+            self.chunks += 1
+            self.chars += len(chunk.page_content)
+            yield chunk
+
+    def report(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        print(
+            f"Ingested {self.pages} pages → {self.chunks} chunks in {elapsed:.1f}s "
+            f"({self.pages / elapsed:.1f} pages/sec, {self.chunks / elapsed:.1f} chunks/sec)"
+        )
+        if self.near_duplicates is not None:
+            self.near_duplicates.report()
+
+    def report_index_size(self, manifest, sources):
+        """Compare the index this run produces with the one the manifest records"""
+        before = sum(len(ids) for ids in manifest["sources"].values())
+        after = sum(len(ids) for ids in sources.values())
+        line = f"Index size: {after} vectors, {self.chars} characters chunked"
+        if before:
+            line += f" (previous run: {before} vectors, {(after - before) / before * 100:+.1f}%"
+            if manifest.get("chars"):
+                line += f"; {(self.chars - manifest['chars']) / manifest['chars'] * 100:+.1f}% characters"
+            line += ")"
+        print(line)
+
+
+def process_documents(raw_docs, stats=None):
+    """Filter metadata and split into chunks, streaming one document at a time"""
+    stats = stats or IngestStats()
+    docs = iter_minimal_docs(stats.count_pages(raw_docs))
+    if CHUNKER == "section":
+        chunks = SectionChunker(chunk_size=CHUNK_SIZE).split_documents(docs)
+    else:
+        chunks = iter_text_chunks(docs)
+    if NEAR_DUP_THRESHOLD > 0:
+        stats.near_duplicates = NearDuplicateFilter(threshold=NEAR_DUP_THRESHOLD)
+        chunks = stats.near_duplicates.filter(chunks)
+    return stats.count_chunks(chunks)
 
 
 # =================================================================
@@ -108,55 +201,261 @@ def ensure_index_exists(pc_client):
 
 
 # =================================================================
-# 6. UPLOAD TO PINECONE
+# 6. INCREMENTAL SYNC (CONTENT-HASHED IDS + MANIFEST)
 # =================================================================
-def upload_to_pinecone(chunks, embeddings):
-    """Upload document chunks as vectors to Pinecone"""
-    print(f"Uploading {len(chunks)} vectors to '{INDEX_NAME}'... (this may take a while)")
-
-    PineconeVectorStore.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        index_name=INDEX_NAME
+def chunk_id(chunk) -> str:
+    """Deterministic vector ID: hash of source + chunk text"""
+    source = chunk.metadata.get("source", "unknown")
+    digest = hashlib.sha256(f"{source}\n{chunk.page_content}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        print(
+            f"No manifest at '{path}'. If the index was built before incremental "
+            "ingestion, run once with --rebuild to replace its random-ID vectors."
+        )
+        return {"sources": {}, "topics": []}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    manifest["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, path)
+
+
+def plan_changes(chunks, manifest, prune=True):
+    """
+    Compare this run's chunks with the manifest. Returns (new chunks, their
+    ids, stale ids to delete, updated sources map, id -> chunk of the corpus).
+    """
+    sources = {}
+    unique = {}
+    for chunk in chunks:
+        cid = chunk_id(chunk)
+        if cid in unique:
+            continue  # identical chunk from the same source (e.g. repeated PDF pages)
+        unique[cid] = chunk
+        sources.setdefault(chunk.metadata.get("source", "unknown"), []).append(cid)
+
+    indexed = {cid for ids in manifest["sources"].values() for cid in ids}
+    new_ids = [cid for cid in unique if cid not in indexed]
+    new_chunks = [unique[cid] for cid in new_ids]
+
+    if prune:
+        stale_ids = sorted(indexed - set(unique))
+    else:
+        # Keep sources that did not show up in this run (e.g. a failed fetch)
+        stale_ids = []
+        for source, ids in manifest["sources"].items():
+            if source in sources:
+                stale_ids.extend(cid for cid in ids if cid not in unique)
+            else:
+                sources[source] = ids
+
+    print(
+        f"Sync plan: {len(unique)} chunks in corpus, {len(new_ids)} new/changed, "
+        f"{len(stale_ids)} stale, {len(unique) - len(new_ids)} unchanged"
     )
+    return new_chunks, new_ids, stale_ids, sources, unique
 
+
+def open_vector_store(embeddings, rebuild=False):
+    """Handle on the target index; --rebuild starts from an empty index"""
+    if VECTOR_BACKEND == "local":
+        index_exists = os.path.exists(os.path.join(LOCAL_INDEX_PATH, "meta.json"))
+        if index_exists and not rebuild:
+            return LocalVectorStore.load(LOCAL_INDEX_PATH, embeddings)
+        return LocalVectorStore(
+            embeddings, path=LOCAL_INDEX_PATH, dtype=LOCAL_INDEX_DTYPE, mode=LOCAL_INDEX_MODE
+        )
+
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    if PINECONE_INDEX_HOST:
+        index = pc.Index(host=PINECONE_INDEX_HOST)
+    else:
+        ensure_index_exists(pc)
+        index = pc.Index(INDEX_NAME)
+    if rebuild:
+        print(f"Deleting all vectors in '{INDEX_NAME}' (rebuild)...")
+        try:
+            index.delete(delete_all=True)
+        except Exception as e:
+            print(f"   (nothing to delete: {e})")
+    return PineconeVectorStore(index=index, embedding=embeddings)
+
+
+def upload_to_pinecone(store, chunks, ids, checkpoint):
+    """Embed and upsert chunks in overlapping batches under deterministic IDs"""
+    print(
+        f"Uploading {len(chunks)} vectors to '{INDEX_NAME}' "
+        f"(batches of {UPSERT_BATCH_SIZE}, {UPSERT_WORKERS} upsert workers)..."
+    )
+    index = store.index
+
+    def upsert(batch_ids, vectors, batch_chunks):
+        # Same record layout as PineconeVectorStore.add_documents (text in "text")
+        index.upsert(
+            vectors=[
+                {
+                    "id": cid,
+                    "values": [float(x) for x in vector],
+                    "metadata": {**chunk.metadata, "text": chunk.page_content},
+                }
+                for cid, vector, chunk in zip(batch_ids, vectors, batch_chunks)
+            ]
+        )
+
+    upsert_in_batches(
+        chunks, ids, store.embeddings.embed_documents, upsert,
+        batch_size=UPSERT_BATCH_SIZE, workers=UPSERT_WORKERS,
+        queue_size=UPSERT_QUEUE, checkpoint=checkpoint,
+    )
     print(f"SUCCESS: {len(chunks)} vectors uploaded to '{INDEX_NAME}'")
-    print("Your medical chatbot knowledge base is ready!")
+
+
+def upload_to_local(store, chunks, ids):
+    """Upsert chunks into the in-process index (saved by the caller)"""
+    print(f"Adding {len(chunks)} vectors to local index '{LOCAL_INDEX_PATH}'...")
+    store.add_documents(chunks, ids=ids)
+    print(f"SUCCESS: {len(chunks)} vectors added to '{LOCAL_INDEX_PATH}'")
+
+
+def local_index_missing() -> bool:
+    """The manifest says what is indexed; with VECTOR_BACKEND=local that
+    only holds while the vector_index/ directory it describes exists."""
+    return VECTOR_BACKEND == "local" and not os.path.exists(
+        os.path.join(LOCAL_INDEX_PATH, "meta.json")
+    )
+
+
+def save_lexical_index(corpus, sources):
+    """
+    Rebuild the BM25 index over every chunk the manifest lists (no embedding
+    involved, so it is rebuilt in full each run). Chunks of sources kept by
+    --no-prune are carried over from the previous lexical index.
+    """
+    if not LEXICAL_INDEX_PATH:
+        return
+    ids = [cid for source_ids in sources.values() for cid in source_ids]
+    chunks = dict(corpus)
+    missing = [cid for cid in ids if cid not in chunks]
+    if missing and os.path.exists(os.path.join(LEXICAL_INDEX_PATH, "meta.json")):
+        chunks.update(BM25Index.load(LEXICAL_INDEX_PATH).documents(missing))
+    kept = [cid for cid in ids if cid in chunks]
+    if len(kept) < len(ids):
+        print(
+            f"[lexical_index] {len(ids) - len(kept)} chunks of sources not loaded in this "
+            "run are missing from the rebuilt index (previous index not found)"
+        )
+    ids = kept
+    BM25Index.build(ids, (chunks[cid] for cid in ids)).save(LEXICAL_INDEX_PATH)
+
+
+def delete_stale(store, stale_ids, batch_size=1000):
+    """Remove vectors whose chunk no longer exists in the corpus"""
+    for i in range(0, len(stale_ids), batch_size):
+        store.delete(ids=stale_ids[i:i + batch_size])
+    if stale_ids:
+        print(f"Deleted {len(stale_ids)} stale vectors")
 
 
 # =================================================================
 # 7. MAIN EXECUTION
 # =================================================================
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build / refresh the medical knowledge base")
+    parser.add_argument(
+        "--rebuild", action="store_true",
+        help="wipe the index and manifest, then index everything",
+    )
+    parser.add_argument(
+        "--no-prune", action="store_true",
+        help="keep vectors of sources that were not loaded in this run",
+    )
+    parser.add_argument(
+        "--refresh-older-than", type=parse_age, metavar="AGE",
+        help="refetch Wikipedia topics cached longer ago than AGE (e.g. 7d, 12h, 0 = all)",
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="use only the local Wikipedia cache (no network)",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    start = time.perf_counter()
+
     print("=" * 60)
     print("MEDI-ASSIST AI — KNOWLEDGE BASE SETUP")
     print("=" * 60)
 
-    # 1. Load documents
-    raw_documents = load_all_documents()
+    # 1-2. Load + process (streamed: pages flow straight into the splitter)
+    stats = IngestStats()
+    chunks = process_documents(
+        iter_all_documents(args.refresh_older_than, offline=args.offline), stats
+    )
+
+    # 3. Diff against what is already indexed
+    manifest = {"sources": {}, "topics": []} if args.rebuild else load_manifest()
+    if manifest["sources"] and local_index_missing():
+        print(f"Local index '{LOCAL_INDEX_PATH}' is missing — indexing every chunk again.")
+        manifest = {"sources": {}, "topics": []}
+    new_chunks, new_ids, stale_ids, sources, corpus = plan_changes(
+        chunks, manifest, prune=not args.no_prune
+    )
+    stats.report()
+    stats.report_index_size(manifest, sources)
 
-    if not raw_documents:
+    if not stats.pages:
         print("No documents loaded. Check 'data/' folder and internet connection.")
         return
 
-    # 2. Process
-    chunks = process_documents(raw_documents)
+    if not new_chunks and not stale_ids and not args.rebuild:
+        print("Index already up to date — nothing to embed.")
+        # Rebuilt every run (no embedding needed), so a deleted lexical_index/ comes back
+        save_lexical_index(corpus, sources)
+        save_manifest({**manifest, "sources": sources, "topics": TOPICS, "chars": stats.chars})
+        return
 
-    # 3. Load embeddings
+    # 4. Load embeddings + open the index
     embeddings = get_embeddings()
-
-    # 4. Initialize Pinecone
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-    ensure_index_exists(pc)
-
-    # 5. Upload
-    upload_to_pinecone(chunks, embeddings)
+    store = open_vector_store(embeddings, rebuild=args.rebuild)
+    if args.rebuild:
+        # The index is empty now: forget earlier uploads, so an interrupted
+        # rebuild resumes (without --rebuild) from this run's checkpoint
+        for path in (MANIFEST_PATH, UPSERT_CHECKPOINT_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # 5. Upsert new/changed chunks, delete removed ones
+    checkpoint = UpsertCheckpoint(UPSERT_CHECKPOINT_PATH)
+    if new_chunks:
+        if VECTOR_BACKEND == "local":
+            upload_to_local(store, new_chunks, new_ids)
+        else:
+            upload_to_pinecone(store, new_chunks, new_ids, checkpoint)
+    delete_stale(store, stale_ids)
+
+    if VECTOR_BACKEND == "local":
+        store.save()
+    save_lexical_index(corpus, sources)
+
+    save_manifest({**manifest, "sources": sources, "topics": TOPICS, "chars": stats.chars})
+    checkpoint.clear()  # the manifest now records everything upserted
 
     print("=" * 60)
-    print("SETUP COMPLETE")
+    print(f"SETUP COMPLETE in {time.perf_counter() - start:.1f}s")
     print("You can now run your Flask app with full RAG capabilities!")
     print("=" * 60)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# Tests import the app modules as `src.<module>`, as app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
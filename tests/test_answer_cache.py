@@ -0,0 +1,136 @@
+# tests/test_answer_cache.py
+import time
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import numpy as np
+import pytest
+
+from src.answer_cache import InMemoryCacheBackend, MongoCacheBackend, SemanticAnswerCache
+
+
+def unit(*values):
+    v = np.asarray(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient()["medical_chatbot"]["answer_cache"]
+
+
+def test_semantic_cache_hit_and_miss():
+    cache = SemanticAnswerCache(InMemoryCacheBackend(1 << 20, 3600), threshold=0.95)
+    cache.put([1, 0, 0], "en", "dengue answer")
+    assert cache.get([1, 0.01, 0], "en") == "dengue answer"
+    assert cache.get([0, 1, 0], "en") is None
+    assert cache.get([1, 0, 0], "hi") is None
+
+
+def test_in_memory_miss_does_not_refresh_recency():
+    backend = InMemoryCacheBackend(1 << 20, 3600)
+    backend.put(unit(1, 0, 0), "en", "a")
+    backend.put(unit(0, 1, 0), "en", "b")
+    # Closest to "a" but below the threshold: "a" must stay least recently used
+    assert backend.nearest(unit(1, 1, 1), "en", threshold=0.95)[0] is None
+    assert next(iter(backend._entries.values()))["answer"] == "a"
+
+    assert backend.nearest(unit(1, 0, 0), "en", threshold=0.95)[0] == "a"
+    assert next(iter(backend._entries.values()))["answer"] == "b"
+
+
+def test_in_memory_expiry_follows_creation_order_not_recency(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    backend = InMemoryCacheBackend(1 << 20, ttl_seconds=60)
+    backend.put(unit(1, 0, 0), "en", "old")
+    clock[0] += 30
+    backend.put(unit(0, 1, 0), "en", "new")
+    assert backend.nearest(unit(1, 0, 0), "en", threshold=0.95)[0] == "old"  # now most recent
+
+    clock[0] += 40  # "old" is 70s old, "new" 40s
+    assert backend.nearest(unit(1, 0, 0), "en", threshold=0.95)[0] is None
+    assert backend.nearest(unit(0, 1, 0), "en", threshold=0.95)[0] == "new"
+    assert list(backend._created) == list(backend._entries) == [1]
+    assert backend.size_bytes == backend._entries[1]["size"]
+
+
+def test_mongo_hit_touches_last_hit_only_on_a_hit(collection):
+    backend = MongoCacheBackend(collection, 1 << 20, 3600)
+    backend.put(unit(1, 0, 0), "en", "a")
+    before = collection.find_one()["last_hit"]
+
+    assert backend.nearest(unit(1, 1, 1), "en", threshold=0.95)[0] is None
+    assert collection.find_one()["last_hit"] == before
+
+    answer, score = backend.nearest(unit(1, 0, 0), "en", threshold=0.95)
+    assert answer == "a" and score == pytest.approx(1.0)
+    assert collection.find_one()["last_hit"] >= before
+
+
+def test_mongo_lookup_fetches_only_new_rows(collection):
+    backend = MongoCacheBackend(collection, 1 << 20, 3600)
+    backend.SYNC_OVERLAP = timedelta(0)
+    other_worker = MongoCacheBackend(collection, 1 << 20, 3600)
+    for i in range(5):
+        backend.put(unit(1, i, 0), "en", f"answer {i}")
+        collection.update_one(
+            {"answer": f"answer {i}"},
+            {"$set": {"created_at": datetime.now(timezone.utc) - timedelta(seconds=10 - i)}},
+        )
+    backend.nearest(unit(1, 0, 0), "en")
+
+    filters = []
+    find = collection.find
+    collection.find = lambda query=None, *args, **kwargs: filters.append(query) or find(query, *args, **kwargs)
+    other_worker.put(unit(0, 1, 0), "en", "b")
+    assert backend.nearest(unit(0, 1, 0), "en", threshold=0.95)[0] == "b"
+    # Only rows from the newest one already seen on, not the whole collection
+    sync_query = [q for q in filters if q and "lang" in q][-1]
+    assert collection.count_documents(sync_query) == 2
+    assert len(backend._rows["en"]["ids"]) == 6
+
+
+def test_mongo_row_evicted_elsewhere_is_a_miss(collection):
+    backend = MongoCacheBackend(collection, 1 << 20, 3600)
+    backend.put(unit(1, 0, 0), "en", "a")
+    backend.nearest(unit(1, 0, 0), "en")
+    collection.delete_many({})
+    assert backend.nearest(unit(1, 0, 0), "en", threshold=0.95)[0] is None
+    assert backend._rows["en"]["ids"] == []
+
+
+def test_mongo_expired_rows_are_ignored(collection):
+    backend = MongoCacheBackend(collection, 1 << 20, 60)
+    backend.put(unit(1, 0, 0), "en", "a")
+    collection.update_many({}, {"$set": {"created_at": datetime.now(timezone.utc) - timedelta(hours=1)}})
+    assert backend.nearest(unit(1, 0, 0), "en")[0] is None
+
+
+def test_mongo_size_is_a_running_counter(collection):
+    backend = MongoCacheBackend(collection, 1 << 20, 3600)
+    calls = []
+    aggregate = collection.aggregate
+    collection.aggregate = lambda *a, **k: calls.append(a) or aggregate(*a, **k)
+    for i in range(5):
+        backend.put(unit(1, i, 0), "en", f"answer {i}")
+    assert len(calls) == 1  # the first resync only
+    assert backend.size_bytes == sum(d["size"] for d in collection.find())
+
+
+def test_mongo_byte_cap_evicts_least_recently_hit(collection):
+    size = 3 * 4 + len("a") + 200
+    backend = MongoCacheBackend(collection, 2 * size, 3600)
+    backend.put(unit(1, 0, 0), "en", "a")
+    time.sleep(0.01)
+    backend.put(unit(0, 1, 0), "en", "b")
+    time.sleep(0.01)
+    backend.nearest(unit(1, 0, 0), "en", threshold=0.95)  # "a" is now the most recent hit
+    backend.put(unit(0, 0, 1), "en", "c")
+    assert sorted(d["answer"] for d in collection.find()) == ["a", "c"]
+
+
+def test_mongo_ttl_change_updates_the_index(collection):
+    MongoCacheBackend(collection, 1 << 20, 3600)
+    MongoCacheBackend(collection, 1 << 20, 7200)  # used to raise IndexOptionsConflict
+    assert collection.index_information()["created_at_1"]["expireAfterSeconds"] == 7200
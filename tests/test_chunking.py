@@ -0,0 +1,73 @@
+# tests/test_chunking.py
+from langchain.schema import Document
+
+from src.chunking import SectionChunker, heading_level
+
+# A PDF page with prose wrapped at ~45 characters; several wrapped lines
+# start with a heading word and carry no final punctuation
+WRAPPED_PAGE = """SYMPTOMS
+Most patients have a high fever for a week.
+Treatment of the patient with
+fever and joint pain is supportive. Rest helps.
+Diet and exercise can help
+lower blood pressure over several weeks.
+Drugs such as aspirin and
+ibuprofen should be avoided in dengue.
+
+Signs and symptoms
+A rash often appears on the third day.
+
+Prevention:
+Mosquito nets reduce bites at night.
+Management of Severe Dengue
+Severe cases need fluids in hospital.
+"""
+
+
+def sections(text):
+    chunker = SectionChunker(chunk_size=1000, min_chunk_chars=1)
+    docs = chunker.split_documents([Document(page_content=text, metadata={"source": "dengue.pdf"})])
+    return {doc.metadata.get("section"): doc.page_content for doc in docs}
+
+
+def test_wrapped_prose_lines_are_not_headings():
+    assert heading_level("Treatment of the patient with", "Most patients have a fever.", "fever and pain") is None
+    assert heading_level("Diet and exercise can help", "Rest helps.", "lower blood pressure.") is None
+    assert heading_level("Drugs such as aspirin and", "over several weeks.", "ibuprofen should") is None
+
+
+def test_headings_need_case_colon_or_a_line_of_their_own():
+    assert heading_level("Signs and symptoms") == (1, "Signs and symptoms")
+    assert heading_level("Signs and symptoms", "of the", "a rash appears") is None
+    assert heading_level("Treatment:", "of the", "rest and fluids") == (1, "Treatment")
+    assert heading_level("Management of Severe Dengue", "of the", "fluids") == (1, "Management of Severe Dengue")
+    assert heading_level("CAUSES", "of the", "a virus") == (1, "Causes")
+    assert heading_level("== Diagnosis ==") == (1, "Diagnosis")
+
+
+def test_chunker_keeps_wrapped_paragraphs_in_their_section():
+    found = sections(WRAPPED_PAGE)
+    assert list(found) == ["Symptoms", "Signs and symptoms", "Prevention", "Management of Severe Dengue"]
+    assert "Treatment of the patient with fever and joint pain" in found["Symptoms"]
+    assert "Drugs such as aspirin and ibuprofen should be avoided" in found["Symptoms"]
+
+
+def test_caps_lines_need_to_stand_alone():
+    # An acronym wrapped onto its own line, and the rows of a caps table
+    assert heading_level("NSAID", "Avoid any", "drugs in dengue.") is None
+    assert heading_level("HIV AIDS", "", "WHO GUIDELINES") is None
+    assert heading_level("WHO GUIDELINES", "HIV AIDS", "Testing is free.") is None
+    # A caps line between paragraphs is still a heading
+    assert heading_level("WHO GUIDELINES", "", "Testing is free.") == (1, "Who Guidelines")
+    assert heading_level("SYMPTOMS", "of the", "WHO GUIDELINES") == (1, "Symptoms")
+
+
+def test_chunker_keeps_caps_table_rows_in_the_section():
+    found = sections("""Prevention
+Screening is advised for adults.
+HIV AIDS
+HEPATITIS B
+Both are tested at the same visit.
+""")
+    assert list(found) == ["Prevention"]
+    assert "HIV AIDS HEPATITIS B Both are tested" in found["Prevention"]
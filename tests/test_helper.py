@@ -0,0 +1,22 @@
+# tests/test_helper.py
+import time
+
+from langchain.schema import Document
+
+from src import helper
+
+
+def slow_first_loader(path):
+    # The first file takes longest, so completion order differs from path order
+    time.sleep(0.3 if path.endswith("a.pdf") else 0.0)
+    return [Document(page_content="Shared cover page", metadata={"source": path})]
+
+
+def test_pdf_pages_come_back_in_path_order(tmp_path, monkeypatch):
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (tmp_path / name).write_bytes(b"")
+    monkeypatch.setattr(helper, "_load_single_pdf", slow_first_loader)
+
+    pages = list(helper.dedupe_pages(helper.iter_pdf_pages(str(tmp_path), max_workers=3)))
+    # The duplicate page keeps the source of the first file, however fast it parsed
+    assert [p.metadata["source"] for p in pages] == [str(tmp_path / "a.pdf")]
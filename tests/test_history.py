@@ -0,0 +1,64 @@
+# tests/test_history.py
+import threading
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+
+from src import history
+
+
+@pytest.fixture
+def buckets():
+    collection = mongomock.MongoClient()["medical_chatbot"]["chat_history_buckets"]
+    history.ensure_bucket_indexes(collection)
+    return collection
+
+
+def message(text, conversation="c1", minutes=0):
+    return {
+        "_id": ObjectId(), "user_id": "u1", "conversation_id": conversation, "role": "user",
+        "message": text, "lang": "en",
+        "timestamp": datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=minutes),
+    }
+
+
+def test_appends_fill_buckets_in_seq_order(buckets):
+    for i in range(7):
+        history.append_to_bucket(buckets, message(f"m{i}", minutes=i), bucket_size=3)
+    rows = list(buckets.find({}, {"seq": 1, "count": 1, "_id": 0}).sort("seq", 1))
+    assert rows == [{"seq": 0, "count": 3}, {"seq": 1, "count": 3}, {"seq": 2, "count": 1}]
+
+
+def test_concurrent_appends_to_a_full_bucket_open_only_one(buckets):
+    for i in range(3):
+        history.append_to_bucket(buckets, message(f"m{i}", minutes=i), bucket_size=3)
+
+    start = threading.Barrier(4)
+
+    def append(i):
+        start.wait()
+        history.append_to_bucket(buckets, message(f"n{i}", minutes=10 + i), bucket_size=3)
+
+    threads = [threading.Thread(target=append, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    counts = {b["seq"]: b["count"] for b in buckets.find()}
+    assert counts == {0: 3, 1: 3, 2: 1}
+
+
+def test_migration_skips_conversations_that_already_have_buckets(buckets):
+    chat_history = mongomock.MongoClient()["medical_chatbot"]["chat_history"]
+    chat_history.insert_many([message(f"old {i}", "c1", i) for i in range(5)])
+    assert history.migrate_to_buckets(chat_history, buckets, bucket_size=3) == (5, 2)
+
+    # Live traffic after the switch, then an accidental re-run
+    history.append_to_bucket(buckets, message("live", "c1", 60), bucket_size=3)
+    chat_history.insert_many([message(f"other {i}", "c2", i) for i in range(2)])
+    assert history.migrate_to_buckets(chat_history, buckets, bucket_size=3) == (2, 1)
+
+    c1 = [m["message"] for b in buckets.find({"conversation_id": "c1"}).sort("seq", 1) for m in b["messages"]]
+    assert c1 == ["old 0", "old 1", "old 2", "old 3", "old 4", "live"]
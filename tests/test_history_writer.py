@@ -0,0 +1,185 @@
+# tests/test_history_writer.py
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import mongomock
+import pytest
+from bson import json_util
+from bson.objectid import ObjectId
+
+from src import conversations
+from src.history_writer import HistoryWriter
+
+
+class FlakySummaries:
+    """Wraps the conversations collection; bulk_write fails `fail` times, before or after applying."""
+
+    def __init__(self, collection, fail=0, after_apply=False):
+        self.collection = collection
+        self.fail = fail
+        self.after_apply = after_apply
+
+    def bulk_write(self, ops, ordered=True):
+        if self.fail:
+            self.fail -= 1
+            if self.after_apply:
+                self.collection.bulk_write(ops, ordered=ordered)
+            raise ConnectionError("connection reset")
+        return self.collection.bulk_write(ops, ordered=ordered)
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()["medical_chatbot"]
+
+
+def message(role, text, conversation="c1"):
+    timestamp = datetime.now(timezone.utc)
+    doc = {
+        "user_id": "u1", "conversation_id": conversation, "role": role,
+        "message": text, "lang": "en", "timestamp": timestamp,
+    }
+    return doc, conversations.summary_update("u1", conversation, role, text, timestamp)
+
+
+def writer(db, tmp_path, summaries=None):
+    return HistoryWriter(
+        lambda: db["chat_history"],
+        lambda: summaries or db["conversations"],
+        flush_interval_ms=10,
+        spill_dir=str(tmp_path),
+    )
+
+
+def summary(db, conversation="c1"):
+    return db["conversations"].find_one({"conversation_id": conversation})
+
+
+def test_messages_and_summary_are_written(db, tmp_path):
+    w = writer(db, tmp_path)
+    w.submit(*message("user", "What is dengue?"))
+    w.submit(*message("bot", "A viral fever."))
+    w.close()
+    assert db["chat_history"].count_documents({}) == 2
+    assert summary(db)["message_count"] == 2
+    assert summary(db)["title"] == "What is dengue?"
+
+
+def test_bucket_mode_appends_to_numbered_buckets(db, tmp_path):
+    from src import history
+
+    history.ensure_bucket_indexes(db["chat_history_buckets"])
+    w = HistoryWriter(
+        lambda: db["chat_history_buckets"], lambda: db["conversations"],
+        flush_interval_ms=10, spill_dir=str(tmp_path), bucket_size=2,
+    )
+    for i in range(3):
+        w.submit(*message("user", f"question {i}"))
+    w.close()
+    assert [b["count"] for b in db["chat_history_buckets"].find().sort("seq", 1)] == [2, 1]
+    assert summary(db)["message_count"] == 3
+
+
+def test_wait_for_user_sees_queued_messages(db, tmp_path):
+    w = HistoryWriter(
+        lambda: db["chat_history"], lambda: db["conversations"],
+        flush_interval_ms=1000, spill_dir=str(tmp_path),
+    )
+    w.submit(*message("user", "What is dengue?"))
+    # Would sit in the batching window for up to 1s without a reader waiting
+    start = time.perf_counter()
+    assert w.wait_for_user("u1", timeout=5)
+    assert time.perf_counter() - start < 0.5
+    assert db["chat_history"].count_documents({}) == 1
+    assert summary(db)["message_count"] == 1
+    assert w.wait_for_user("someone-else", timeout=0)
+    w.close()
+
+
+def _replay(db, tmp_path):
+    # A fresh writer (next process start) replays the spill file of this pid
+    w = writer(db, tmp_path)
+    w._replay_spill()
+    return w
+
+
+def test_summary_lost_after_insert_is_replayed_once(db, tmp_path):
+    # The insert lands but its reply is lost: the whole batch is spilled and
+    # the summary bulk_write never runs
+    class AmbiguousInsert:
+        def insert_many(self, docs, ordered=True):
+            db["chat_history"].insert_many(docs, ordered=ordered)
+            raise ConnectionError("connection reset")
+
+    w = HistoryWriter(
+        lambda: AmbiguousInsert(), lambda: db["conversations"],
+        flush_interval_ms=10, spill_dir=str(tmp_path),
+    )
+    w.submit(*message("user", "What is dengue?"))
+    w.submit(*message("bot", "A viral fever."))
+    w.close()
+    assert db["chat_history"].count_documents({}) == 2
+    assert summary(db) is None
+
+    # Replaying hits duplicate keys for both docs and must still count them
+    _replay(db, tmp_path)
+    assert db["chat_history"].count_documents({}) == 2
+    assert summary(db)["message_count"] == 2
+    assert summary(db)["title"] == "What is dengue?"
+
+
+def test_summary_applied_before_the_error_is_not_counted_twice(db, tmp_path):
+    w = writer(db, tmp_path, FlakySummaries(db["conversations"], fail=1, after_apply=True))
+    w.submit(*message("user", "What is dengue?"))
+    w.submit(*message("bot", "A viral fever."))
+    w.close()
+    assert summary(db)["message_count"] == 2
+
+    _replay(db, tmp_path)
+    _replay(db, tmp_path)  # nothing left to replay the second time
+    assert summary(db)["message_count"] == 2
+
+
+# =================================================================
+# SPILL FILE OWNERSHIP
+# =================================================================
+def _spill_file(tmp_path, name, text):
+    doc, s = message("user", text, conversation=text)
+    doc["_id"] = ObjectId()
+    path = tmp_path / name
+    path.write_text(json_util.dumps({"doc": doc, "summary": s}) + "\n")
+    return path
+
+
+@pytest.fixture
+def live_pid():
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    yield process.pid
+    process.kill()
+    process.wait()
+
+
+@pytest.fixture
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_live_workers_spill_files_are_left_alone(db, tmp_path, live_pid):
+    spill = _spill_file(tmp_path, f"spill-{live_pid}.jsonl", "live")
+    replaying = _spill_file(tmp_path, f"spill-1.jsonl.replay-{live_pid}", "replaying")
+    _replay(db, tmp_path)
+    assert spill.exists() and replaying.exists()
+    assert db["chat_history"].count_documents({}) == 0
+
+
+def test_dead_workers_spill_files_are_replayed(db, tmp_path, dead_pid):
+    _spill_file(tmp_path, f"spill-{dead_pid}.jsonl", "crashed")
+    _spill_file(tmp_path, f"spill-{dead_pid}.jsonl.replay-{dead_pid}", "crashed mid-replay")
+    _replay(db, tmp_path)._replay_spill("spill-*")
+    assert db["chat_history"].count_documents({}) == 2
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,41 @@
+# tests/test_lexical_index.py
+from langchain.schema import Document
+
+from src.lexical_index import BM25Index, reciprocal_rank_fusion
+
+CHUNKS = [
+    "Fever and pain are common in patients with an infection.",
+    "Fever, pain and fatigue follow most viral infections in patients.",
+    "HbA1c reflects the average blood glucose over three months.",
+    "Patients with fever should drink fluids; pain relief helps.",
+]
+
+
+def build():
+    docs = [Document(page_content=text, metadata={"source": f"{i}.pdf"}) for i, text in enumerate(CHUNKS)]
+    return BM25Index.build([str(i) for i in range(len(docs))], docs)
+
+
+def test_search_reports_score_and_coverage():
+    (doc, score), = build().search("What is HbA1c?", k=1)
+    assert doc.page_content == CHUNKS[2]
+    assert doc.metadata["lexical_coverage"] == 1.0 and doc.metadata["bm25_score"] == score
+
+
+def test_common_words_score_lower_than_a_rare_term():
+    # Every "fever pain" hit has full coverage, so coverage alone can't tell it from a rare term
+    index = build()
+    common = index.search("fever pain", k=3)
+    rare, = index.search("HbA1c", k=1)
+    assert all(doc.metadata["lexical_coverage"] == 1.0 for doc, _ in common)
+    assert max(score for _, score in common) < rare[1]
+
+
+def test_round_trip_and_fusion_keep_lexical_scores(tmp_path):
+    build().save(str(tmp_path))
+    hits = [doc for doc, _ in BM25Index.load(str(tmp_path)).search("HbA1c", k=1)]
+    dense = [Document(page_content=CHUNKS[2], metadata={"score": 0.1})]
+
+    fused = reciprocal_rank_fusion(dense, hits, k=2)
+    assert len(fused) == 1
+    assert fused[0].metadata["score"] == 0.1 and fused[0].metadata["bm25_score"] > 0
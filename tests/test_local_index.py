@@ -0,0 +1,61 @@
+# tests/test_local_index.py
+import numpy as np
+
+from src.local_index import LocalVectorStore
+
+
+def test_search_returns_cosine_scores(tmp_path):
+    store = LocalVectorStore(None, path=str(tmp_path))
+    store.add_vectors([[1, 0, 0], [0, 2, 0]], ["fever", "cough"], ids=["a", "b"])
+    (doc, score), = store.similarity_search_by_vector_with_score([0, 1, 0], k=1)
+    assert doc.id == "b" and score == 1.0
+
+
+def test_empty_index_round_trips_and_accepts_vectors(tmp_path):
+    LocalVectorStore(None, dim=3).save(str(tmp_path))
+    assert np.load(tmp_path / "vectors.npy").shape == (0, 3)
+
+    store = LocalVectorStore.load(str(tmp_path), None)
+    assert store.similarity_search_by_vector_with_score([1, 0, 0]) == []
+    store.add_vectors([[1, 0, 0]], ["fever"], ids=["a"])
+    store.save()
+
+    reloaded = LocalVectorStore.load(str(tmp_path), None)
+    assert len(reloaded) == 1 and reloaded.dim == 3
+
+
+def test_index_emptied_by_delete_keeps_its_dimension(tmp_path):
+    store = LocalVectorStore(None, path=str(tmp_path))
+    store.add_vectors([[1, 0, 0]], ["fever"], ids=["a"])
+    store.delete(["a"])
+    store.save()
+    assert np.load(tmp_path / "vectors.npy").shape == (0, 3)
+
+
+def test_legacy_zero_by_zero_save_accepts_vectors(tmp_path):
+    store = LocalVectorStore(None)
+    store.save(str(tmp_path))
+    np.save(tmp_path / "vectors.npy", np.empty((0, 0), dtype=np.float32))
+
+    store = LocalVectorStore.load(str(tmp_path), None)
+    store.add_vectors([[0, 1, 0, 0]], ["fever"], ids=["a"])
+    assert store.similarity_search_by_vector_with_score([0, 1, 0, 0])[0][0].id == "a"
+
+
+def test_batch_rows_line_up_with_ids_for_lookup_and_delete():
+    store = LocalVectorStore(None)
+    store.add_vectors([[1, 0, 0], [0, 1, 0], [0, 0, 1]], ["fever", "cough", "rash"], ids=["A", "B", "C"])
+    # D is repeated within the second batch: the later vector wins
+    store.add_vectors(
+        [[1, 1, 0], [0, 1, 1], [1, 0, 1]], ["chills", "nausea", "chills again"], ids=["D", "E", "D"]
+    )
+    assert [doc.page_content for doc in store.get_by_ids(["C", "D", "E"])] == ["rash", "chills again", "nausea"]
+    (doc, _), = store.similarity_search_by_vector_with_score([1, 0, 1], k=1)
+    assert doc.id == "D"
+
+    store.delete(["B"])
+    assert [doc.page_content for doc in store.get_by_ids(["A", "B", "C", "D", "E"])] == [
+        "fever", "rash", "chills again", "nausea"
+    ]
+    (doc, score), = store.similarity_search_by_vector_with_score([0, 0, 1], k=1)
+    assert doc.id == "C" and round(score, 6) == 1.0
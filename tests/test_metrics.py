@@ -0,0 +1,29 @@
+# tests/test_metrics.py
+import time
+
+from src import metrics
+from src.metrics import StageTimer
+
+
+def test_registry_returns_the_same_metric():
+    assert metrics.counter("test_registry_total") is metrics.counter("test_registry_total")
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = metrics.Histogram("test_hist_ms", [10, 100])
+    for value in (5, 50, 500):
+        hist.observe(value)
+    snap = hist.snapshot()
+    assert snap["count"] == 3
+    assert snap["buckets"] == {"10": 1, "100": 2}
+
+
+def test_stage_timer_accumulates_repeated_stages():
+    timer = StageTimer()
+    with timer.stage("translate"):
+        time.sleep(0.01)
+    with timer.stage("translate"):
+        time.sleep(0.01)
+    assert timer.stages["translate"] >= 20
+    timer.record(prefix="test_timer")
+    assert metrics.histogram("test_timer_translate_ms").snapshot()["count"] == 1
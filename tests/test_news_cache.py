@@ -0,0 +1,84 @@
+# tests/test_news_cache.py
+import time
+
+import pytest
+
+from src.news_cache import NewsCache
+
+NEWS = [{"title": "Dengue cases rise", "summary": "...", "link": "#", "published": "", "image": ""}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock.time)
+    return clock
+
+
+def cache(fetch, **kwargs):
+    news_cache = NewsCache(fetch, ttl=600, retry_base=30, retry_max=240, **kwargs)
+    news_cache._ensure_worker = lambda: None  # refresh() is driven by the test
+    return news_cache
+
+
+def test_failed_fetch_backs_off_exponentially(clock):
+    def down(lang):
+        raise ConnectionError("news API down")
+
+    news_cache = cache(down)
+    delays = []
+    for _ in range(5):
+        news_cache.refresh("en")
+        assert not news_cache.retry_due("en")
+        delays.append(news_cache._attempts["en"]["retry_at"] - clock.now)
+        clock.now = news_cache._attempts["en"]["retry_at"]
+        assert news_cache.retry_due("en")
+    assert delays == [30, 60, 120, 240, 240]
+
+
+def test_requests_during_backoff_queue_no_fetch(clock):
+    def down(lang):
+        raise ConnectionError("news API down")
+
+    news_cache = cache(down, fallback=NEWS)
+    news_cache.refresh("hi")
+    news_cache._pending.clear()
+    for _ in range(10):
+        assert news_cache.get("hi").news == NEWS  # the fallback list
+    assert news_cache._pending == set()
+
+
+def test_empty_result_is_remembered_for_empty_ttl(clock):
+    calls = []
+    news_cache = cache(lambda lang: calls.append(lang) or [], empty_ttl=900)
+    assert not news_cache.refresh("ta")
+    assert not news_cache.retry_due("ta")
+    clock.now += 899
+    assert not news_cache.retry_due("ta")
+    clock.now += 1
+    assert news_cache.retry_due("ta")
+
+
+def test_success_resets_the_backoff(clock):
+    results = [ConnectionError("down"), NEWS]
+
+    def flaky(lang):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    news_cache = cache(flaky)
+    news_cache.refresh("en")
+    clock.now += 30
+    assert news_cache.refresh("en")
+    assert news_cache.retry_due("en")
+    assert news_cache.get("en").news == NEWS
@@ -0,0 +1,56 @@
+# tests/test_reranker.py
+from langchain.schema import Document
+
+from src.reranker import CrossEncoderReranker, context_tokens, estimate_tokens, pack_context
+
+
+class FakeCrossEncoder:
+    """Scores a pair by how often the chunk mentions 'dengue'."""
+
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs, batch_size=16, show_progress_bar=False):
+        self.pairs.extend(pairs)
+        return [chunk.lower().count("dengue") for _, chunk in pairs]
+
+
+def doc(words, name):
+    return Document(page_content=" ".join([name] + ["word"] * (words - 1)), metadata={"name": name})
+
+
+def names(docs):
+    return [d.metadata["name"] for d in docs]
+
+
+def test_packed_context_stays_within_the_budget_in_rank_order():
+    ranked = [doc(60, "a"), doc(200, "b"), doc(40, "c"), doc(30, "d"), doc(10, "e")]
+    packed = pack_context(ranked, token_budget=200)
+    # b does not fit after a, so the smaller lower-ranked chunks take its place
+    assert names(packed) == ["a", "c", "d", "e"]
+    assert context_tokens(packed) <= 200
+    assert pack_context(ranked, token_budget=0) == ranked
+
+
+def test_oversized_best_chunk_is_cut_to_the_budget():
+    (packed,) = pack_context([doc(400, "a"), doc(500, "b")], token_budget=50)
+    assert estimate_tokens(packed.page_content) <= 50
+    assert packed.metadata == {"name": "a", "truncated": True}
+    assert not packed.page_content.endswith(" ")
+
+
+def test_reranked_order_survives_packing():
+    reranker = CrossEncoderReranker()
+    reranker._model = FakeCrossEncoder()
+    docs = [
+        Document(page_content="Malaria spreads through mosquito bites.", metadata={"name": "malaria"}),
+        Document(page_content="Dengue and severe dengue need fluids.", metadata={"name": "severe"}),
+        Document(page_content="Dengue fever causes joint pain.", metadata={"name": "dengue"}),
+    ]
+    ranked = reranker.rerank("dengue treatment", docs, top_n=2)
+    assert names(ranked) == ["severe", "dengue"]
+    assert names(pack_context(ranked, token_budget=100)) == ["severe", "dengue"]
+
+    # Scores are cached per (query, chunk): asking again does not call the model
+    reranker.rerank("Dengue  treatment", docs)
+    assert len(reranker._model.pairs) == 3
@@ -0,0 +1,56 @@
+# tests/test_retrieval.py
+import pytest
+from langchain.schema import Document
+
+from src.lexical_index import BM25Index
+from src.metrics import StageTimer
+
+# Fever and pain are in most chunks, HbA1c in one
+CORPUS = [
+    f"Patient {i} had fever and pain for {i % 7 + 1} days and was treated at home."
+    for i in range(300)
+] + ["HbA1c reflects the average blood glucose over three months."]
+
+
+class DenseStub:
+    """Vector search returning fixed chunks with fixed cosine scores."""
+
+    def __init__(self, results):
+        self.results = results
+
+    def similarity_search_by_vector_with_score(self, vector, k=3, **kwargs):
+        return [(Document(page_content=text), score) for text, score in self.results[:k]]
+
+
+@pytest.fixture
+def core(monkeypatch):
+    from benchmarks import loadtest  # noqa: F401  (stub environment: no MongoDB, no models)
+    import app
+
+    docs = [Document(page_content=text) for text in CORPUS]
+    monkeypatch.setattr(app, "lexical_index", BM25Index.build([str(i) for i in range(len(docs))], docs))
+    monkeypatch.setattr(app, "SEARCH_K", 3)
+    return app
+
+
+def select(core, query, dense):
+    core.vectorstore = DenseStub(dense)
+    return [doc.page_content for doc in core.select_context([0.1] * 384, StageTimer(), query)]
+
+
+def test_lexical_only_hit_with_a_rare_term_is_kept(core):
+    (kept,) = select(core, "HbA1c", [(CORPUS[5], 0.1), (CORPUS[6], 0.05)])
+    assert kept == CORPUS[-1]
+
+
+def test_lexical_only_hits_below_the_min_score_are_dropped(core):
+    # Every fused chunk contains all query terms, but they are common words
+    hits = core.lexical_index.search("fever pain", k=3)
+    assert all(doc.metadata["lexical_coverage"] == 1.0 for doc, _ in hits)
+    assert all(score < core.LEXICAL_MIN_SCORE for _, score in hits)
+    assert select(core, "fever pain", [(CORPUS[5], 0.1), (CORPUS[6], 0.05)]) == []
+
+
+def test_dense_hits_above_the_threshold_pass_with_or_without_bm25(core):
+    kept = select(core, "fever pain", [(CORPUS[5], 0.6), (CORPUS[6], 0.05)])
+    assert kept == [CORPUS[5]]
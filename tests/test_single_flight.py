@@ -0,0 +1,96 @@
+# tests/test_single_flight.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.single_flight import AsyncSingleFlight, SingleFlight, coalesce_key
+
+
+def test_coalesce_key_ignores_case_spacing_and_trailing_punctuation():
+    assert coalesce_key("  What is  Dengue?", "en") == coalesce_key("what is dengue .", "en")
+    assert coalesce_key("What is dengue?", "en") != coalesce_key("What is dengue?", "hi")
+
+
+def test_concurrent_calls_share_one_run():
+    flight, runs = SingleFlight("test_do"), []
+
+    def pipeline():
+        runs.append(1)
+        time.sleep(0.2)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", pipeline))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["answer"] * 5 and len(runs) == 1
+
+
+def test_stream_error_reaches_every_subscriber():
+    flight = SingleFlight("test_stream")
+
+    def tokens():
+        yield "Dengue "
+        time.sleep(0.1)
+        raise RuntimeError("model down")
+
+    outcomes = []
+
+    def subscribe():
+        pieces = []
+        try:
+            for piece in flight.stream("k", tokens):
+                pieces.append(piece)
+        except RuntimeError as e:
+            outcomes.append((pieces, str(e)))
+
+    threads = [threading.Thread(target=subscribe) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert outcomes == [(["Dengue "], "model down")] * 3
+
+
+def test_async_stream_is_shared():
+    flight, runs = AsyncSingleFlight("test_async_stream"), []
+
+    async def tokens():
+        runs.append(1)
+        for piece in ("Stub ", "answer."):
+            await asyncio.sleep(0.05)
+            yield piece
+
+    async def collect():
+        return "".join([piece async for piece in flight.stream("k", tokens)])
+
+    async def main():
+        return await asyncio.gather(*(collect() for _ in range(4)))
+
+    assert asyncio.run(main()) == ["Stub answer."] * 4 and len(runs) == 1
+
+
+def test_cancelled_producer_is_an_error_not_a_short_answer():
+    flight = AsyncSingleFlight("test_async_cancel")
+
+    async def tokens():
+        yield "Dengue "
+        await asyncio.sleep(10)
+        yield "is a viral infection."
+
+    async def main():
+        subscriber = flight.stream("k", tokens)
+        assert await subscriber.__anext__() == "Dengue "
+        producer = flight._streams["k"].producer
+        producer.cancel()  # e.g. the worker shutting down mid-answer
+        with pytest.raises(asyncio.CancelledError):
+            await subscriber.__anext__()
+        with pytest.raises(asyncio.CancelledError):
+            await producer
+        assert not flight._streams
+
+    asyncio.run(asyncio.wait_for(main(), timeout=5))
@@ -0,0 +1,51 @@
+# tests/test_translation_cache.py
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+
+from src.translation_cache import TranslationMemory, prewarm_from_history
+
+
+def disk_rows(memory):
+    return memory._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+
+def test_disk_tier_is_pruned_every_n_writes(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "t.sqlite3"), max_disk_entries=5, prune_every=4)
+    for i in range(7):
+        memory.put("hi", "en", f"text {i}", f"translation {i}")
+    # over the cap, but only 3 rows written since the prune at the 4th
+    assert disk_rows(memory) == 7
+    memory.put("hi", "en", "text 7", "translation 7")
+    assert disk_rows(memory) == 5
+    assert memory.get("hi", "en", "text 0", record=False) == "translation 0"  # memory tier
+    assert memory.get("hi", "en", "text 7") == "translation 7"
+
+
+def test_a_job_is_claimed_by_one_worker_per_interval(tmp_path):
+    path = str(tmp_path / "t.sqlite3")
+    first, second = TranslationMemory(path), TranslationMemory(path)
+    assert first.claim("prewarm", every=3600)
+    assert not second.claim("prewarm", every=3600)
+    assert second.claim("prewarm", every=0)
+    assert TranslationMemory(None).claim("prewarm", every=3600)
+
+
+def test_history_prewarm_uses_recent_messages_once(tmp_path):
+    history = mongomock.MongoClient().db.chat_history
+    now = datetime.now(timezone.utc)
+    history.insert_many([
+        {"role": "user", "lang": "hi", "message": "बुखार", "timestamp": now},
+        {"role": "user", "lang": "hi", "message": "पुराना सवाल", "timestamp": now - timedelta(days=90)},
+        {"role": "user", "lang": "en", "message": "fever", "timestamp": now},
+    ])
+    path = str(tmp_path / "t.sqlite3")
+    translated = []
+
+    def translate(text, target, source):
+        translated.append(text)
+
+    assert prewarm_from_history(TranslationMemory(path), history, [], translate, days=30) == 1
+    assert translated == ["बुखार"]
+    # A second worker finds the job done
+    assert prewarm_from_history(TranslationMemory(path), history, [], translate, days=30) == 0
@@ -0,0 +1,181 @@
+# tests/test_translator.py
+import threading
+import time
+
+from src import translator
+from src.translator import CircuitBreaker, Provider, translate_many, translate_text
+
+
+class Stub:
+    """Local stand-in for a deep_translator class: upper-cases, or fails."""
+
+    def __init__(self, delay=0.0, fail=False, max_chars=None):
+        self.delay = delay
+        self.fail = fail
+        self.max_chars = max_chars
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def translate(self, text):
+        with self.lock:
+            self.calls.append(text)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("provider down")
+        if self.max_chars is not None and len(text) >= self.max_chars:
+            raise ValueError("text too long")
+        return text.upper()
+
+
+def provider(name, stub, max_chars=None, threshold=3, cooldown=60):
+    p = Provider(name, lambda src, tgt: stub, max_chars=max_chars)
+    p.breaker = CircuitBreaker(threshold, cooldown)
+    return p
+
+
+def trip(breaker):
+    for _ in range(breaker.threshold):
+        breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+# =================================================================
+# FAILOVER / HEDGING
+# =================================================================
+def test_failover_to_the_next_provider():
+    down, up = Stub(fail=True), Stub()
+    providers = [provider("A", down), provider("B", up)]
+    assert translate_text("fever", "en", "hi", providers, hedge_after=None) == "FEVER"
+    assert len(down.calls) == 1 and len(up.calls) == 1
+
+
+def test_all_providers_failing_returns_the_original_text():
+    providers = [provider("A", Stub(fail=True)), provider("B", Stub(fail=True))]
+    assert translate_text("fever", "en", "hi", providers, hedge_after=None) == "fever"
+
+
+def test_slow_provider_is_hedged():
+    slow, fast = Stub(delay=0.5), Stub()
+    providers = [provider("A", slow), provider("B", fast)]
+    start = time.perf_counter()
+    assert translate_text("fever", "en", "hi", providers, hedge_after=0.05) == "FEVER"
+    assert time.perf_counter() - start < 0.4
+    assert len(fast.calls) == 1
+
+
+def test_fast_provider_is_not_hedged():
+    first, second = Stub(), Stub()
+    providers = [provider("A", first), provider("B", second)]
+    assert translate_text("fever", "en", "hi", providers, hedge_after=0.5) == "FEVER"
+    assert second.calls == []
+
+
+# =================================================================
+# CIRCUIT BREAKER
+# =================================================================
+def test_breaker_opens_after_threshold_failures():
+    down, up = Stub(fail=True), Stub()
+    providers = [provider("A", down, threshold=2), provider("B", up)]
+    for _ in range(4):
+        translate_text("fever", "en", "hi", providers, hedge_after=None)
+    assert len(down.calls) == 2  # skipped once open
+    assert providers[0].breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_admits_a_single_probe():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    trip(breaker)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert [breaker.allow() for _ in range(5)] == [False] * 5
+
+
+def test_half_open_probe_success_closes_and_failure_reopens():
+    breaker = CircuitBreaker(threshold=3, cooldown=0)
+    trip(breaker)
+    assert breaker.allow()
+    breaker.failure()  # a single failed probe is enough
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    assert all(breaker.allow() for _ in range(5))
+
+
+def test_unused_provider_keeps_its_open_breaker():
+    up, cooled = Stub(), Stub()
+    providers = [provider("A", up), provider("B", cooled, cooldown=0)]
+    trip(providers[1].breaker)
+    for hedge_after in (None, 0.5):
+        assert translate_text("fever", "en", "hi", providers, hedge_after=hedge_after) == "FEVER"
+    # B was never needed, so it must not have been moved to half-open
+    assert cooled.calls == []
+    assert providers[1].breaker.state == CircuitBreaker.OPEN
+
+
+# =================================================================
+# BATCHING
+# =================================================================
+def test_batch_fits_the_provider_limit():
+    mymemory = Stub(max_chars=500)
+    providers = [provider("MyMemory", mymemory, max_chars=500)]
+    texts = [f"sentence number {i} about fever and its care" for i in range(40)]
+    out = translate_many(texts, "en", "hi", providers, hedge_after=None)
+    assert out == [t.upper() for t in texts]
+    assert len(mymemory.calls) > 1
+    assert all(len(call) < 500 for call in mymemory.calls)
+    assert providers[0].breaker.failures == 0
+
+
+def test_large_batch_skips_a_small_provider():
+    libre, mymemory, google = Stub(fail=True), Stub(max_chars=500), Stub()
+    providers = [
+        provider("Libre", libre),
+        provider("MyMemory", mymemory, max_chars=500),
+        provider("Google", google, max_chars=5000),
+    ]
+    texts = [f"sentence number {i} about fever and its care" for i in range(40)]
+    assert translate_many(texts, "en", "hi", providers, hedge_after=None) == [t.upper() for t in texts]
+    # One full-size request, not 499-character batches
+    assert len(libre.calls) == 1 and len(google.calls) == 1
+    assert mymemory.calls == [] and providers[1].breaker.failures == 0
+
+
+def test_batch_is_repacked_for_a_smaller_provider_when_the_large_ones_fail():
+    mymemory, google = Stub(max_chars=500), Stub(fail=True)
+    providers = [provider("MyMemory", mymemory, max_chars=500), provider("Google", google, max_chars=5000)]
+    texts = [f"sentence number {i} about fever and its care" for i in range(40)]
+    assert translate_many(texts, "en", "hi", providers, hedge_after=None) == [t.upper() for t in texts]
+    assert 1 < len(mymemory.calls) < len(texts)
+    assert all(len(call) < 500 for call in mymemory.calls)
+
+
+class MergingStub(Stub):
+    """Answers batches with their lines merged into one."""
+
+    def translate(self, text):
+        return super().translate(text).replace("\n", " ")
+
+
+def test_line_count_mismatch_falls_back_to_singles_without_a_breaker_failure():
+    merging = MergingStub()
+    providers = [provider("Libre", merging, threshold=1)]
+    texts = ["fever", "cough", "rash"]
+    assert translate_many(texts, "en", "hi", providers, hedge_after=None) == ["FEVER", "COUGH", "RASH"]
+    assert merging.calls == ["fever\ncough\nrash", "fever", "cough", "rash"]
+    assert providers[0].breaker.state == CircuitBreaker.CLOSED
+
+
+def test_over_long_text_skips_a_small_provider_without_a_failure():
+    small, large = Stub(max_chars=500), Stub()
+    providers = [provider("MyMemory", small, max_chars=500), provider("Google", large, max_chars=5000)]
+    assert translate_text("x" * 800, "en", "hi", providers, hedge_after=None) == "X" * 800
+    assert small.calls == []
+    assert providers[0].breaker.failures == 0
+
+
+def test_batch_max_chars_defaults():
+    assert translator.batch_max_chars([provider("Libre", Stub())]) == translator.BATCH_MAX_CHARS
+    assert translator.batch_max_chars() == translator.BATCH_MAX_CHARS  # MyMemory sits out
+    assert translator.batch_max_chars([provider("MyMemory", Stub(), max_chars=500)]) == 499
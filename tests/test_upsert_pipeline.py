@@ -0,0 +1,93 @@
+# tests/test_upsert_pipeline.py
+import json
+import threading
+
+import pytest
+from langchain.schema import Document
+
+from src.upsert_pipeline import UpsertCheckpoint, upsert_in_batches
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FakeIndex:
+    """Upserts by id like Pinecone; can fail a given batch (after applying it, if asked)."""
+
+    def __init__(self, fail_batch=None, failures=0, after_apply=False):
+        self.vectors = {}
+        self.calls = []
+        self.fail_batch = fail_batch
+        self.failures = failures
+        self.after_apply = after_apply
+        self._lock = threading.Lock()
+
+    def __call__(self, ids, vectors, chunks):
+        with self._lock:
+            self.calls.append(list(ids))
+            failing = ids[0] == self.fail_batch and self.failures
+            if failing:
+                self.failures -= 1
+            if not failing or self.after_apply:
+                self.vectors.update(zip(ids, vectors))
+        if failing:
+            raise ConnectionError("connection reset")
+
+
+def corpus(n):
+    return [Document(page_content=f"chunk {i} about fever") for i in range(n)], [f"id-{i}" for i in range(n)]
+
+
+def test_chunks_are_embedded_and_upserted_in_batches():
+    chunks, ids = corpus(250)
+    embed, index = FakeEmbedder(), FakeIndex()
+    stats = upsert_in_batches(chunks, ids, embed, index, batch_size=100, workers=3)
+    assert [len(batch) for batch in embed.batches] == [100, 100, 50]
+    assert sorted(len(call) for call in index.calls) == [50, 100, 100]
+    assert set(index.vectors) == set(ids) and stats.upserted == 250
+
+
+def test_retried_batch_is_checkpointed_once_without_duplicate_ids(tmp_path):
+    chunks, ids = corpus(30)
+    path = str(tmp_path / "checkpoint.jsonl")
+    # The second batch lands but the reply is lost, twice
+    index = FakeIndex(fail_batch="id-10", failures=2, after_apply=True)
+    stats = upsert_in_batches(
+        chunks, ids, FakeEmbedder(), index, batch_size=10, workers=2,
+        checkpoint=UpsertCheckpoint(path), retries=3, backoff=0,
+    )
+    assert len(index.vectors) == 30 and stats.upserted == 30
+    assert sum(call == ids[10:20] for call in index.calls) == 3
+
+    with open(path, encoding="utf-8") as f:
+        checkpointed = [cid for line in f for cid in json.loads(line)]
+    assert sorted(checkpointed) == sorted(ids)
+
+
+def test_failed_run_resumes_from_the_checkpoint(tmp_path):
+    chunks, ids = corpus(40)
+    path = str(tmp_path / "checkpoint.jsonl")
+    broken = FakeIndex(fail_batch="id-20", failures=99)
+    with pytest.raises(RuntimeError, match="re-run to resume"):
+        upsert_in_batches(
+            chunks, ids, FakeEmbedder(), broken, batch_size=10, workers=1,
+            checkpoint=UpsertCheckpoint(path), retries=2, backoff=0,
+        )
+    done = UpsertCheckpoint(path).done
+    assert set(ids[:20]) <= done and not done & set(ids[20:30])
+
+    embed, index = FakeEmbedder(), FakeIndex()
+    stats = upsert_in_batches(
+        chunks, ids, embed, index, batch_size=10, workers=2, checkpoint=UpsertCheckpoint(path)
+    )
+    # Only what was not upserted before is embedded and sent again
+    resent = [cid for call in index.calls for cid in call]
+    assert sorted(resent) == sorted(set(ids) - done)
+    assert stats.skipped == len(done) and done | set(index.vectors) == set(ids)
+    assert sum(len(batch) for batch in embed.batches) == 40 - len(done)